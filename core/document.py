@@ -12,14 +12,14 @@ import os
 import os.path as op
 from functools import wraps
 
-from hscommon.notify import Repeater
+from hscommon.notify import Repeater, batched
 from hscommon.util import nonone, allsame, dedupe, extract, first
 from hscommon.trans import tr
 from hscommon.gui.base import GUIObject
 
 from .const import NOEDIT, DATE_FORMAT_FOR_PREFERENCES
 from .exception import FileFormatError, OperationAborted
-from .loader import native
+from .loader import native, binary
 from .model.account import Account, Group, AccountList, GroupList, AccountType
 from .model.amount import parse_amount, format_amount
 from .model.currency import Currency
@@ -31,7 +31,9 @@ from .model.date import (
 from .model.oven import Oven
 from .model.recurrence import Spawn
 from .model.transaction_list import TransactionList
+from .model.journal import Journal
 from .model.undo import Undoer, Action
+from .saver.binary import save as save_binary
 from .saver.native import save as save_native
 
 SELECTED_DATE_RANGE_PREFERENCE = 'SelectedDateRange'
@@ -69,7 +71,13 @@ class ScheduleScope:
     Global = 1
     Cancel = 2
 
-AUTOSAVE_BUFFER_COUNT = 10 # Number of autosave files that will be kept in the cache.
+AUTOSAVE_BUFFER_COUNT = 10 # Number of autosave snapshots that will be kept in the cache.
+# Number of journal records after which the next autosave writes a new snapshot.
+JOURNAL_COMPACT_THRESHOLD = 50
+
+def journal_path(snapshot_path):
+    """Returns the path of the journal that goes with the autosave snapshot at ``snapshot_path``."""
+    return op.splitext(snapshot_path)[0] + '.journal'
 
 def handle_abort(method):
     @wraps(method)
@@ -149,7 +157,7 @@ class BaseDocument:
                 self.transactions.add(transaction)
             elif date_changed:
                 self.transactions.move_last(transaction)
-        self.transactions.clear_cache()
+        self.transactions.clear_cache(changed=[transaction])
 
     def _clean_empty_categories(self, from_account=None):
         for account in list(self.accounts.auto_created):
@@ -163,9 +171,20 @@ class BaseDocument:
         self.transactions.clear()
         self._cook()
 
-    def _cook(self, from_date=None):
+    def _cook(self, from_date=None, affected_accounts=None):
         # Without date ranges and spawns, it's OK to pass `None` as an `until_date`.
-        self.oven.cook(from_date=from_date, until_date=None)
+        self.oven.cook(from_date=from_date, until_date=None, affected_accounts=affected_accounts)
+
+    def _get_affected_accounts(self, transactions):
+        # Returns the accounts that will need re-cooking if `transactions` are changed. For spawns,
+        # all accounts of the schedule are affected because changing a spawn resets the schedule's
+        # spawn cache.
+        result = set()
+        for txn in transactions:
+            result |= txn.affected_accounts()
+            if isinstance(txn, Spawn):
+                result |= txn.recurrence.affected_accounts()
+        return result
 
     # --- Public
     def change_transaction(self, original, new, global_scope=False):
@@ -193,13 +212,15 @@ class BaseDocument:
         for split in new.splits:
             if split.account is not None:
                 split.account = self.accounts.find(split.account.name, split.account.type)
+        affected_accounts = self._get_affected_accounts([original])
         original.set_splits(new.splits, preserve_instances=True)
         min_date = min(original.date, new.date)
         self._change_transaction(
             original, date=new.date, description=new.description,
             payee=new.payee, checkno=new.checkno, notes=new.notes, global_scope=global_scope
         )
-        self._cook(from_date=min_date)
+        affected_accounts |= self._get_affected_accounts([original])
+        self._cook(from_date=min_date, affected_accounts=affected_accounts)
         self._clean_empty_categories()
 
     def change_transactions(
@@ -237,13 +258,15 @@ class BaseDocument:
             Currency.get_rates_db().ensure_rates(date, currencies_to_ensure)
 
         min_date = date if date is not NOEDIT else datetime.date.max
+        affected_accounts = self._get_affected_accounts(transactions)
         for transaction in transactions:
             min_date = min(min_date, transaction.date)
             self._change_transaction(
                 transaction, date=date, description=description, payee=payee, checkno=checkno,
                 from_=from_, to=to, amount=amount, currency=currency, global_scope=global_scope
             )
-        self._cook(from_date=min_date)
+        affected_accounts |= self._get_affected_accounts(transactions)
+        self._cook(from_date=min_date, affected_accounts=affected_accounts)
         self._clean_empty_categories()
 
     def delete_transactions(self, transactions, from_account=None, global_scope=False):
@@ -407,6 +430,12 @@ class Document(BaseDocument, Repeater, GUIObject):
     :class:`hscommon.gui.base.GUIObject`.
     """
     REPEATED_NOTIFICATIONS = {'saved_custom_ranges_changed'}
+    # Mutative methods batch their notifications so that our listeners only refresh once per
+    # operation. These notifications ask listeners to act before things change, so they can't wait.
+    UNBATCHED_NOTIFICATIONS = {
+        'date_range_will_change', 'document_will_close', 'edition_must_stop',
+        'document_restoring_preferences',
+    }
 
     def __init__(self, app):
         BaseDocument.__init__(self, app)
@@ -422,6 +451,9 @@ class Document(BaseDocument, Repeater, GUIObject):
         #: :class:`.GroupList` containing all account groups of the document.
         self.groups = GroupList()
         self._undoer = Undoer(self.accounts, self.groups, self.transactions, self.schedules, self.budgets)
+        self._journal = Journal(
+            self.accounts, self.groups, self.transactions, self.schedules, self.budgets, self._properties
+        )
         self._date_range = YearRange(datetime.date.today())
         self._filter_string = ''
         self._filter_type = None
@@ -450,16 +482,40 @@ class Document(BaseDocument, Repeater, GUIObject):
         # exactly as the user is commiting a change. In these cases, the autosaved file might be a
         # save of the data in a quite weird state. I think this risk is acceptable. The alternative
         # is to put locks everywhere, which would complexify the application.
-        existing_names = [name for name in os.listdir(self.app.cache_path) if name.startswith('autosave')]
+        # Most of the time, we only append what changed since the last autosave to the journal of
+        # our last snapshot. Once in a while, we write a new snapshot (with a new journal).
+        touched_transactions = self._undoer.pop_touched_transactions()
+        if self._journal.path is not None and self._journal.record_count < JOURNAL_COMPACT_THRESHOLD:
+            self._journal.append(touched_transactions)
+            return
+        existing_names = [
+            name for name in os.listdir(self.app.cache_path)
+            if name.startswith('autosave') and name.endswith('.moneyguru')
+        ]
         existing_names.sort()
         timestamp = int(time.time())
         autosave_name = 'autosave{0}.moneyguru'.format(timestamp)
         while autosave_name in existing_names:
             timestamp += 1
             autosave_name = 'autosave{0}.moneyguru'.format(timestamp)
-        self.save_to_xml(op.join(self.app.cache_path, autosave_name), autosave=True)
+        autosave_path = op.join(self.app.cache_path, autosave_name)
+        self.save_to_xml(autosave_path, autosave=True)
+        self._journal.start(journal_path(autosave_path))
         if len(existing_names) >= AUTOSAVE_BUFFER_COUNT:
-            os.remove(op.join(self.app.cache_path, existing_names[0]))
+            oldest_path = op.join(self.app.cache_path, existing_names[0])
+            os.remove(oldest_path)
+            if op.exists(journal_path(oldest_path)):
+                os.remove(journal_path(oldest_path))
+
+    def _is_autosave_snapshot(self, path):
+        # Only our own autosave snapshots have journals. Other documents might very well have an
+        # unrelated ".journal" file next to them.
+        cache_path = self.app.cache_path
+        if not cache_path:
+            return False
+        dirname, name = op.split(op.abspath(path))
+        in_cache = op.normcase(dirname) == op.normcase(op.abspath(cache_path))
+        return in_cache and name.startswith('autosave') and name.endswith('.moneyguru')
 
     def _clear(self):
         self._document_id = None
@@ -467,11 +523,14 @@ class Document(BaseDocument, Repeater, GUIObject):
         del self.schedules[:]
         del self.budgets[:]
         self._undoer.clear()
+        self._journal.reset()
         self._dirty_flag = False
         BaseDocument._clear(self)
 
-    def _cook(self, from_date=None):
-        self.oven.cook(from_date=from_date, until_date=self.date_range.end)
+    def _cook(self, from_date=None, affected_accounts=None):
+        self.oven.cook(
+            from_date=from_date, until_date=self.date_range.end, affected_accounts=affected_accounts
+        )
 
     def _get_action_from_changed_transactions(self, transactions, global_scope=False):
         if len(transactions) == 1 and not isinstance(transactions[0], Spawn) \
@@ -582,7 +641,51 @@ class Document(BaseDocument, Repeater, GUIObject):
         excluded_account_names = [a.name for a in self.excluded_accounts]
         self.set_default(EXCLUDED_ACCOUNTS_PREFERENCE, excluded_account_names)
 
+    def _load_from_loader(self, loader, filename):
+        try:
+            loader.parse(filename)
+        except FileFormatError:
+            raise FileFormatError(tr('"%s" is not a moneyGuru file') % filename)
+        loader.load()
+        self._clear()
+        self._document_id = loader.document_id
+        for propname in self._properties:
+            if propname in loader.properties:
+                self._properties[propname] = loader.properties[propname]
+        for group in loader.groups:
+            self.groups.append(group)
+        for account in loader.accounts:
+            self.accounts.add(account)
+        for transaction in loader.transactions:
+            self.transactions.add(transaction, position=transaction.position)
+        for recurrence in loader.schedules:
+            self.schedules.append(recurrence)
+        for budget in loader.budgets:
+            self.budgets.append(budget)
+        self.accounts.default_currency = self.default_currency
+        self._cook()
+        self._restore_preferences_after_load()
+        self.notify('document_changed')
+        self._undoer.set_save_point()
+        self._refresh_date_range()
+
+    def _save_with(self, save_func, filename, autosave):
+        # When called from _async_autosave, it should not disrupt the user: no stop edition, no
+        # change in the save state.
+        if not autosave:
+            self.stop_edition()
+        if self._document_id is None:
+            self._document_id = uuid.uuid4().hex
+        save_func(
+            filename, self._document_id, self._properties, self.accounts, self.groups,
+            self.transactions, self.schedules, self.budgets
+        )
+        if not autosave:
+            self._undoer.set_save_point()
+            self._dirty_flag = False
+
     # --- Account
+    @batched
     def change_accounts(
             self, accounts, name=NOEDIT, type=NOEDIT, currency=NOEDIT, group=NOEDIT,
             account_number=NOEDIT, inactive=NOEDIT, notes=NOEDIT):
@@ -620,11 +723,13 @@ class Document(BaseDocument, Repeater, GUIObject):
                 account.inactive = inactive
             if notes is not NOEDIT:
                 account.notes = notes
+        self.accounts.clear_cache(changed=accounts)
         self._undoer.record(action)
         self._cook()
         self.transactions.clear_cache()
         self.notify('account_changed')
 
+    @batched
     def delete_accounts(self, accounts, reassign_to=None):
         """Removes ``accounts`` from the document.
 
@@ -664,6 +769,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self._cook()
         self.notify('account_deleted')
 
+    @batched
     def new_account(self, type, group):
         """Create a new account in the document.
 
@@ -686,6 +792,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self.notify('account_added')
         return account
 
+    @batched
     def toggle_accounts_exclusion(self, accounts):
         """Toggles "excluded" state for ``accounts``.
 
@@ -702,6 +809,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self.notify('accounts_excluded')
 
     # --- Group
+    @batched
     def change_group(self, group, name=NOEDIT):
         """Properly sets properties for ``group``.
 
@@ -719,6 +827,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self._undoer.record(action)
         self.notify('account_changed')
 
+    @batched
     def delete_groups(self, groups):
         """Removes ``groups`` from the document.
 
@@ -739,6 +848,7 @@ class Document(BaseDocument, Repeater, GUIObject):
             account.group = None
         self.notify('account_deleted')
 
+    @batched
     def new_group(self, type):
         """Creates a new group of type ``type``.
 
@@ -781,6 +891,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         after_date = after.date if after else None
         return from_date in (before_date, after_date)
 
+    @batched
     @handle_abort
     def change_transaction(self, original, new):
         """Changes the attributes of ``original`` so that they match those of ``new``.
@@ -800,6 +911,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         if not self._adjust_date_range(original.date):
             self.notify('transaction_changed')
 
+    @batched
     @handle_abort
     def change_transactions(
             self, transactions, date=NOEDIT, description=NOEDIT, payee=NOEDIT, checkno=NOEDIT,
@@ -834,6 +946,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         if action.changed_schedules:
             self.notify('schedule_changed')
 
+    @batched
     @handle_abort
     def delete_transactions(self, transactions, from_account=None):
         """Removes every transaction in ``transactions`` from the document.
@@ -860,6 +973,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         if action.changed_schedules:
             self.notify('schedule_changed')
 
+    @batched
     def duplicate_transactions(self, transactions):
         """Create copies of ``transactions`` in the document.
 
@@ -878,6 +992,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self._add_transactions(duplicated)
         self.notify('transaction_changed')
 
+    @batched
     def move_transactions(self, transactions, to_transaction):
         """Re-orders ``transactions`` so that they are right before ``to_transaction``.
 
@@ -898,6 +1013,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self.notify('transaction_changed')
 
     # --- Entry
+    @batched
     @handle_abort
     def change_entry(
             self, entry, date=NOEDIT, reconciliation_date=NOEDIT, description=NOEDIT, payee=NOEDIT,
@@ -937,6 +1053,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         if not self._adjust_date_range(entry.date):
             self.notify('transaction_changed')
 
+    @batched
     def toggle_entries_reconciled(self, entries):
         """Toggle the reconcile flag of `entries`.
 
@@ -1005,6 +1122,7 @@ class Document(BaseDocument, Repeater, GUIObject):
             budgeted_amount = target.normalize_amount(budgeted_amount)
         return budgeted_amount
 
+    @batched
     def change_budget(self, original, new):
         """Changes the attributes of ``original`` so that they match those of ``new``.
 
@@ -1036,6 +1154,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self._cook(from_date=min_date)
         self.notify('budget_changed')
 
+    @batched
     def delete_budgets(self, budgets):
         """Removes ``budgets`` from the document.
 
@@ -1053,6 +1172,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self.notify('budget_deleted')
 
     # --- Schedule
+    @batched
     def change_schedule(self, schedule, new_ref, repeat_type, repeat_every, stop_date):
         """Change attributes of ``schedule``.
 
@@ -1091,6 +1211,7 @@ class Document(BaseDocument, Repeater, GUIObject):
         self._cook(from_date=min_date)
         self.notify('schedule_changed')
 
+    @batched
     def delete_schedules(self, schedules):
         """Removes ``schedules`` from the document.
 
@@ -1132,6 +1253,7 @@ class Document(BaseDocument, Repeater, GUIObject):
             for split in txn.splits:
                 if split.reconciliation_date is not None:
                     split.reconciliation_date = txn.date
+        self.transactions.clear_cache()
         for schedule in self.schedules:
             date2exception = schedule.date2exception
             schedule.start_date = inc_month_overflow(schedule.start_date, month_diff)
@@ -1147,6 +1269,8 @@ class Document(BaseDocument, Repeater, GUIObject):
                     continue
                 newdate = inc_month_overflow(date, month_diff)
                 schedule.date2exception[newdate] = exception
+        # These changes aren't recorded by the undoer, so our journal can't follow them.
+        self._journal.reset()
         self._cook()
         self.notify('document_changed') # do it again to refresh the guis
 
@@ -1158,43 +1282,26 @@ class Document(BaseDocument, Repeater, GUIObject):
     def load_from_xml(self, filename):
         """Clears the document and loads data from ``filename``.
 
-        ``filename`` must be a path to a moneyGuru XML document.
+        ``filename`` must be a path to a moneyGuru XML document. If it's one of our autosave
+        snapshots (in the app's cache) with a journal next to it, changes recorded in the journal
+        are replayed on top of it. If there are any, the document is considered modified.
 
         :param filename: ``str``
         """
-        loader = native.Loader(self.default_currency)
-        try:
-            loader.parse(filename)
-        except FileFormatError:
-            raise FileFormatError(tr('"%s" is not a moneyGuru file') % filename)
-        loader.load()
-        self._clear()
-        self._document_id = loader.document_id
-        for propname in self._properties:
-            if propname in loader.properties:
-                self._properties[propname] = loader.properties[propname]
-        for group in loader.groups:
-            self.groups.append(group)
-        for account in loader.accounts:
-            self.accounts.add(account)
-        for transaction in loader.transactions:
-            self.transactions.add(transaction, position=transaction.position)
-        for recurrence in loader.schedules:
-            self.schedules.append(recurrence)
-        for budget in loader.budgets:
-            self.budgets.append(budget)
-        self.accounts.default_currency = self.default_currency
-        self._cook()
-        self._restore_preferences_after_load()
-        self.notify('document_changed')
-        self._undoer.set_save_point()
-        self._refresh_date_range()
+        self._load_from_loader(native.Loader(self.default_currency), filename)
+        if not self._is_autosave_snapshot(filename):
+            return
+        path = journal_path(filename)
+        if op.exists(path) and self._journal.replay(path):
+            self.accounts.default_currency = self.default_currency
+            self._dirty_flag = True
+            self._cook()
+            self.notify('document_changed')
+            self._refresh_date_range()
 
     def save_to_xml(self, filename, autosave=False):
         """Saves the document to ``filename``.
 
-        ``filename`` must be a path to a moneyGuru XML document.
-
         If ``autosave`` is true, the operation will not affect the document's modified state and
         will not make editing stop, if editing there is (like it normally does without the autosave
         flag to make sure that the input being currently done by the user is saved).
@@ -1202,20 +1309,29 @@ class Document(BaseDocument, Repeater, GUIObject):
         :param filename: ``str``
         :param autosave: ``bool``
         """
-        # When called from _async_autosave, it should not disrupt the user: no stop edition, no
-        # change in the save state.
-        if not autosave:
-            self.stop_edition()
-        if self._document_id is None:
-            self._document_id = uuid.uuid4().hex
-        save_native(
-            filename, self._document_id, self._properties, self.accounts, self.groups,
-            self.transactions, self.schedules, self.budgets
-        )
-        if not autosave:
-            self._undoer.set_save_point()
-            self._dirty_flag = False
+        self._save_with(save_native, filename, autosave)
 
+    def load_from_binary(self, filename):
+        """Clears the document and loads data from ``filename``.
+
+        Same as :meth:`load_from_xml`, but for documents saved with :meth:`save_to_binary`.
+
+        :param filename: ``str``
+        """
+        self._load_from_loader(binary.Loader(self.default_currency), filename)
+
+    def save_to_binary(self, filename, autosave=False):
+        """Saves the document to ``filename`` in moneyGuru's binary format.
+
+        This format is much faster to load than XML, but it's not meant to be read by anything
+        else than moneyGuru. See :meth:`save_to_xml` for ``autosave``.
+
+        :param filename: ``str``
+        :param autosave: ``bool``
+        """
+        self._save_with(save_binary, filename, autosave)
+
+    @batched
     def import_entries(self, target_account, ref_account, matches):
         """Imports entries in ``mathes`` into ``target_account``.
 
@@ -1271,15 +1387,19 @@ class Document(BaseDocument, Repeater, GUIObject):
             self.accounts.add(account)
         if target_account is not ref_account and ref_account.reference is not None:
             target_account.reference = ref_account.reference
+            self.accounts.clear_cache(changed=[target_account])
         for entry, ref in matches:
             if ref is not None:
                 ref.transaction.date = entry.date
                 ref.split.amount = entry.split.amount
                 ref.transaction.balance(strong_split=ref.split, keep_two_splits=True)
                 ref.split.reference = entry.split.reference
-            else:
-                if entry.transaction not in self.transactions:
-                    self.transactions.add(entry.transaction)
+        # Matched transactions have to be re-indexed under their new date before we add new
+        # transactions so that those get proper positions.
+        self.transactions.clear_cache(changed=[ref.transaction for entry, ref in matches if ref is not None])
+        for entry, ref in matches:
+            if ref is None and entry.transaction not in self.transactions:
+                self.transactions.add(entry.transaction)
         self._cook()
         self.notify('transactions_imported')
 
@@ -1390,10 +1510,12 @@ class Document(BaseDocument, Repeater, GUIObject):
         """Returns a string describing what would be undone if :meth:`undo` was called."""
         return self._undoer.undo_description()
 
+    @batched
     def undo(self):
         """Undo the last undoable action."""
         self.stop_edition()
         self._undoer.undo()
+        self.transactions.clear_cache()
         self._cook()
         self.notify('performed_undo_or_redo')
 
@@ -1405,10 +1527,12 @@ class Document(BaseDocument, Repeater, GUIObject):
         """Returns a string describing what would be redone if :meth:`redo` was called."""
         return self._undoer.redo_description()
 
+    @batched
     def redo(self):
         """Redo the last redoable action."""
         self.stop_edition()
         self._undoer.redo()
+        self.transactions.clear_cache()
         self._cook()
         self.notify('performed_undo_or_redo')
 
@@ -1586,6 +1710,6 @@ class ImportDocument(BaseDocument):
         self.cook_flag = True
         self.oven.cook(from_date=None, until_date=None)
 
-    def _cook(self, from_date=None):
+    def _cook(self, from_date=None, affected_accounts=None):
         pass
 
@@ -26,6 +26,10 @@ class BalanceSheet(Report):
         Column('delta_perc', display=trcol("Change %"), visible=False, optional=True),
         Column('budgeted', display=trcol("Budgeted"), optional=True),
     ]
+    ACCOUNT_NODE_ATTRS = [
+        'start_amount', 'end_amount', 'budgeted_amount', 'start', 'end', 'budgeted', 'delta',
+        'delta_perc',
+    ]
 
     # --- Override
     def _compute_account_node(self, node):
@@ -99,6 +99,7 @@ class CSVOptions(MainWindowGUIObject):
 
         MainWindowGUIObject.__init__(self, mainwindow)
         self.lines = []
+        self._linecount = 0
         self._colcount = 0
         self._target_accounts = []
         self._default_layout = Layout(tr('Default'))
@@ -118,7 +119,9 @@ class CSVOptions(MainWindowGUIObject):
         self.view.refresh_columns()
 
     def _refresh_lines(self):
+        # ``lines`` are only the first lines of the file, which can have many more.
         self.lines = self.mainwindow.loader.lines
+        self._linecount = self.mainwindow.loader.line_count
         self.view.refresh_lines()
 
     def _refresh_targets(self):
@@ -130,8 +133,7 @@ class CSVOptions(MainWindowGUIObject):
     def continue_import(self):
         loader = self.mainwindow.loader
         loader.columns = self.layout.columns
-        lines = [line for index, line in enumerate(self.lines) if not self.line_is_excluded(index)]
-        loader.lines = lines
+        loader.excluded_lines = set(self.excluded_lines)
         target_name = self.layout.target_account_name
         loader.target_account = first(t for t in self._target_accounts if t.name == target_name)
         try:
@@ -157,7 +159,7 @@ class CSVOptions(MainWindowGUIObject):
     def line_is_excluded(self, index):
         if index in self.excluded_lines:
             return True
-        elif index - len(self.lines) in self.excluded_lines:
+        elif index - self._linecount in self.excluded_lines:
             return True
         else:
             return False
@@ -203,7 +205,7 @@ class CSVOptions(MainWindowGUIObject):
         self.view.refresh_columns_name()
 
     def set_line_excluded(self, index, value):
-        self.layout.set_line_excluded(index, value, len(self.lines))
+        self.layout.set_line_excluded(index, value, self._linecount)
 
     def show(self):
         self._default_layout = Layout(tr('Default'))
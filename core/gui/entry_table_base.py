@@ -12,7 +12,7 @@ from operator import attrgetter
 from hscommon.util import nonone
 from hscommon.trans import tr
 
-from ..model.amount import convert_amount
+from ..model.amount import convert_amount, convert_amounts
 from ..model.date import ONE_DAY
 from ..model.entry import Entry
 from ..model.recurrence import Spawn
@@ -384,27 +384,33 @@ class EntryTableBase(TransactionTableBase):
 
     # --- Private
     def _get_account_rows(self, account):
-        result = []
+        # Returns `(previous_balance_row, entries, total_row)` for `account`. Rows for `entries`
+        # aren't created here. They're meant to be added to the table with `_extend_with_entries()`
+        # so that we only create those that are displayed. When there's nothing to show for
+        # `account`, `total_row` is None.
         date_range = self.document.date_range
+        previous_balance_row = None
         if account.is_balance_sheet_account():
             prev_entry = account.entries.last_entry(date_range.start-ONE_DAY)
             if prev_entry is not None:
                 balance = prev_entry.balance_with_budget
                 rbalance = prev_entry.reconciled_balance
-                result.append(PreviousBalanceRow(self, date_range.start, balance, rbalance, account))
-        total_debit = 0
-        total_credit = 0
+                previous_balance_row = PreviousBalanceRow(self, date_range.start, balance, rbalance, account)
         entries = self.mainwindow.visible_entries_for_account(account)
-        for entry in entries:
-            row = self.ENTRY_ROWCLASS(self, entry, account)
-            result.append(row)
-            convert = lambda a: convert_amount(a, account.currency, entry.date)
-            total_debit += convert(row._debit)
-            total_credit += convert(row._credit)
-        if result:
+        amounts = convert_amounts(
+            [e.amount for e in entries], account.currency, [e.date for e in entries]
+        )
+        total_debit = sum(a for a in amounts if a > 0)
+        total_credit = -sum(a for a in amounts if a < 0)
+        if previous_balance_row is not None or entries:
             total_row = TotalRow(self, account, date_range.end, total_debit, total_credit)
-            result.append(total_row)
-        return result
+        else:
+            total_row = None
+        return previous_balance_row, entries, total_row
+
+    def _extend_with_entries(self, entries, account):
+        rowclass = self.ENTRY_ROWCLASS
+        self.extend_lazily(entries, lambda entry: rowclass(self, entry, account))
 
     def _new_entry(self):
         account = self._get_current_account()
@@ -419,7 +425,7 @@ class EntryTableBase(TransactionTableBase):
         # returns (selected_count, total_count, total_debit, total_credit)
         entries = self.selected_entries
         selected = len(entries)
-        total = sum(1 for row in self if isinstance(row, EntryTableRow))
+        total = sum(1 for i in range(len(self)) if isinstance(self.row_source(i), (Entry, EntryTableRow)))
         total_currency = self._get_totals_currency()
         amounts = [convert_amount(e.amount, total_currency, e.date) for e in entries]
         total_debit = sum(a for a in amounts if a > 0)
@@ -51,12 +51,14 @@ class GeneralLedgerTable(EntryTableBase):
         accounts = self.document.accounts
         sort_accounts(accounts)
         for account in accounts:
-            rows = self._get_account_rows(account)
-            if not rows:
+            previous_balance_row, entries, total_row = self._get_account_rows(account)
+            if total_row is None:
                 continue
             self.append(AccountRow(self, account))
-            for row in rows:
-                self.append(row)
+            if previous_balance_row is not None:
+                self.append(previous_balance_row)
+            self._extend_with_entries(entries, account)
+            self.append(total_row)
     
     def _get_current_account(self):
         row = self.selected_row
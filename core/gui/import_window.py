@@ -17,7 +17,7 @@ from ..exception import OperationAborted
 from ..model.date import DateFormat
 from .base import MainWindowGUIObject, LinkedSelectableList
 from .import_table import ImportTable
-from core.plugin import ImportActionPlugin, ImportBindPlugin, EntryMatch
+from core.plugin import ImportActionPlugin, ImportBindPlugin, EntryMatch, ImportEntryIndex
 from core.document import ImportDocument
 from core.model.account import Account
 from core.model.entry import Entry
@@ -104,6 +104,9 @@ class AccountPane:
         """
 
         import_entries = self.import_entries
+        # Imported entries are re-created when the import document is cooked. This index gives us
+        # the current version of the entries referred to in ``_match_entries`` and ``_user_binds``.
+        import_index = ImportEntryIndex(import_entries)
 
         existing_entries = self.existing_entries
 
@@ -139,10 +142,9 @@ class AccountPane:
                     # entry because it is not recooked.
                     self.matches.append([match_entry.existing, entry])
                 else:
-                    # Otherwise, we have to search through our import entries based on equality
+                    # Otherwise, we have to look our import entry up based on equality
                     # because the reference will have changed between cooks.
-                    [import_entry] = [e for e in import_entries
-                                      if e == match_entry.imported]
+                    import_entry = import_index.find(match_entry.imported)
                     self.matches.append([entry, import_entry])
 
                 # Add both items to our processed set.
@@ -171,8 +173,7 @@ class AccountPane:
         # First, we must put in our user binds.
         user_binds = list(self._user_binds.items())
         for (existing_entry, import_entry), bound in user_binds:
-            new_import_entry = self._get_matching_entry(import_entry, import_entries)
-            if new_import_entry is None:
+            if import_entry not in import_index:
                 # If a plugin has modified our imports such that the imported entry
                 # no longer exists, then clean up that record in ``_user_binds``.
                 del self._user_binds[(existing_entry, import_entry)]
@@ -199,29 +200,26 @@ class AccountPane:
 
         # So our last step is to ensure that if a plugin has made a recommendation about a match
         # that the user has indicated was incorrect, we must make sure that match is broken.
-        for (existing_entry, import_entry), bound in self._user_binds.items():
-            if not bound:
-                import_entry = self._get_matching_entry(import_entry, import_entries)
-                match = [[e, i] for [e, i] in self.matches if
-                         e and i and
-                         (e, i) == (existing_entry, import_entry)]
-                if match:
-                    [[e, i]] = match
-                    self.matches.remove([e, i])
-                else:
-                    continue
-                # if not e.reconciled?
-                # So here, the end effect is that if the entry is reconciled the existing
-                # entry disappears when the bind is broken.
-                self.matches.append([e, None])
-                self.matches.append([None, i])
-
-    @staticmethod
-    def _get_matching_entry(entry, entry_list):
-        for e in entry_list:
-            if e == entry:
-                return e
-        return None
+        unbinds = [pair for pair, bound in self._user_binds.items() if not bound]
+        if not unbinds:
+            return
+        pair2index = {}
+        for index, (e, i) in enumerate(self.matches):
+            if e is not None and i is not None:
+                pair2index.setdefault((e, i), index)
+        broken = set()
+        for existing_entry, import_entry in unbinds:
+            index = pair2index.pop((existing_entry, import_entry), None)
+            if index is None:
+                continue
+            e, i = self.matches[index]
+            broken.add(index)
+            # if not e.reconciled?
+            # So here, the end effect is that if the entry is reconciled the existing
+            # entry disappears when the bind is broken.
+            self.matches.append([e, None])
+            self.matches.append([None, i])
+        self.matches[:] = [m for index, m in enumerate(self.matches) if index not in broken]
 
     def match_entries(self, binding_plugins=None, import_entries=None):
         """Match existing to imported entries.
@@ -231,14 +229,16 @@ class AccountPane:
         self.account = self.import_document.accounts.find(self.name)
         import_entries = self.account.entries[:] if not import_entries else import_entries
         existing_entries = self.existing_entries
+        # Built once for all plugins so that they don't each have to index imported entries.
+        import_index = ImportEntryIndex(import_entries)
 
         for plugin in self.binding_plugins:
             # Each matching plugin makes it's own recommendations
-            matches = plugin.match_entries(self.selected_target,
-                                           None,
-                                           self.import_document,
-                                           existing_entries,
-                                           import_entries)
+            matches = plugin.match_indexed_entries(self.selected_target,
+                                                   None,
+                                                   self.import_document,
+                                                   existing_entries,
+                                                   import_index)
 
             # The best is chosen by weight
             self._determine_best_matches(matches)
@@ -22,6 +22,10 @@ class IncomeStatement(Report):
         Column('delta_perc', display=trcol("Change %"), visible=False, optional=True),
         Column('budgeted', display=trcol("Budgeted"), optional=True),
     ]
+    ACCOUNT_NODE_ATTRS = [
+        'cash_flow_amount', 'last_cash_flow_amount', 'budgeted_amount', 'cash_flow',
+        'last_cash_flow', 'budgeted', 'delta', 'delta_perc',
+    ]
 
     # --- Override
     def _compute_account_node(self, node):
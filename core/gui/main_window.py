@@ -11,14 +11,16 @@ from hscommon.notify import Repeater
 from hscommon.util import first, minmax
 from hscommon.trans import tr
 from hscommon.gui.base import GUIObject
+from hscommon.jobprogress.job import nulljob
 
 from ..const import PaneType
 from ..document import FilterType
 from ..exception import OperationAborted, FileFormatError
 from ..model.date import inc_month, DateFormat
 from ..model.recurrence import Recurrence, RepeatType
-from ..loader import csv, qif, ofx, native
-from .base import MESSAGES_DOCUMENT_CHANGED
+from ..loader import csv
+from ..loader.parallel import parse_for_import, load_for_import
+from .base import MESSAGES_EVERYTHING_CHANGED
 from .search_field import SearchField
 from .date_range_selector import DateRangeSelector
 from .account_lookup import AccountLookup
@@ -107,7 +109,10 @@ class MainWindow(Repeater, GUIObject):
         self.csv_options = CSVOptions(self)
         self.import_window = ImportWindow(self)
 
-        msgs = MESSAGES_DOCUMENT_CHANGED | {'filter_applied', 'date_range_changed'}
+        # Visible entries are cached with the account's entries generation and our filters, so we
+        # only have to invalidate them when something that isn't followed by a cook changes (account
+        # and group names are used in searches) and to get rid of deleted accounts.
+        msgs = MESSAGES_EVERYTHING_CHANGED | {'account_changed', 'account_deleted'}
         self.bind_messages(msgs, self._invalidate_visible_entries)
 
     # --- Private
@@ -266,18 +271,25 @@ class MainWindow(Repeater, GUIObject):
         self.view.refresh_panes()
         self._change_current_pane(newpane)
 
+    def _show_loaded_file_for_import(self):
+        if any(a.is_balance_sheet_account() for a in self.loader.accounts) and self.loader.transactions:
+            self.import_window.show()
+        else:
+            raise FileFormatError('This file does not contain any account to import.')
+
     def _update_area_visibility(self):
         self.notify('area_visibility_changed')
         self.view.update_area_visibility()
 
     def _visible_entries_for_account(self, account):
         date_range = self.document.date_range
-        entries = [e for e in account.entries if e.date in date_range]
+        entries = account.entries.entries_in_range(date_range)
         query_string = self.document.filter_string
         filter_type = self.document.filter_type
         if query_string:
             query = self.app.parse_search_query(query_string)
-            entries = [e for e in entries if e.transaction.matches(query)]
+            matching = set(self.document.transactions.filter_matching({e.transaction for e in entries}, query))
+            entries = [e for e in entries if e.transaction in matching]
         if filter_type is FilterType.Unassigned:
             entries = [e for e in entries if not e.transfer]
         elif (filter_type is FilterType.Income) or (filter_type is FilterType.Expense):
@@ -364,10 +376,7 @@ class MainWindow(Repeater, GUIObject):
         parsed data into model instances, ready to be shown in the Import window.
         """
         self.loader.load()
-        if any(a.is_balance_sheet_account() for a in self.loader.accounts) and self.loader.transactions:
-            self.import_window.show()
-        else:
-            raise FileFormatError('This file does not contain any account to import.')
+        self._show_loaded_file_for_import()
 
     def make_schedule_from_selected(self):
         current_view = self._current_pane.view
@@ -446,24 +455,47 @@ class MainWindow(Repeater, GUIObject):
         :meth:`load_parsed_file_for_import`.
         """
         default_date_format = DateFormat(self.app.date_format).sys_format
-        for loaderclass in (native.Loader, ofx.Loader, qif.Loader, csv.Loader):
-            try:
-                loader = loaderclass(
-                    self.document.default_currency, default_date_format=default_date_format
-                )
-                loader.parse(filename)
-                break
-            except FileFormatError:
-                pass
-        else:
-            # No file fitted
-            raise FileFormatError(tr('%s is of an unknown format.') % filename)
-        self.loader = loader
+        self.loader = parse_for_import(
+            filename, self.document.default_currency, default_date_format
+        )
         if isinstance(self.loader, csv.Loader):
             self.csv_options.show()
         else:
             self.load_parsed_file_for_import()
 
+    def parse_files_for_import(self, filenames, j=nulljob):
+        """Parses and loads ``filenames`` in parallel and shows them in the Import window.
+
+        Files are parsed and loaded in a pool of processes. Each time a file is loaded, its panes
+        are added to the Import window, so we don't have to wait for all files to be loaded before
+        starting to work on the first ones. Progress is reported to ``j``.
+
+        CSV files need to go through the CSV options window, one at a time, before they can be
+        loaded. We don't load them here, but return their filenames so that they can be imported
+        with :meth:`parse_file_for_import` afterwards.
+
+        A file that can't be imported doesn't prevent the others from being imported. Returns
+        ``(csv_filenames, errors)`` where ``errors`` is a list of ``(filename, FileFormatError)``
+        for files that couldn't be imported.
+        """
+        default_date_format = DateFormat(self.app.date_format).sys_format
+        loaded = load_for_import(filenames, self.document.default_currency, default_date_format, j=j)
+        csv_filenames = []
+        errors = []
+        for filename, loader, error in loaded:
+            if error is not None:
+                errors.append((filename, error))
+                continue
+            if loader is None:
+                csv_filenames.append(filename)
+                continue
+            self.loader = loader
+            try:
+                self._show_loaded_file_for_import()
+            except FileFormatError as e:
+                errors.append((filename, e))
+        return csv_filenames, errors
+
     def select_pane_of_type(self, pane_type, clear_filter=True):
         if clear_filter:
             self.document.filter_string = ''
@@ -516,9 +548,16 @@ class MainWindow(Repeater, GUIObject):
     def visible_entries_for_account(self, account):
         if account is None:
             return []
-        if account not in self._account2visibleentries:
-            self._account2visibleentries[account] = self._visible_entries_for_account(account)
-        return self._account2visibleentries[account]
+        date_range = self.document.date_range
+        key = (
+            date_range.start, date_range.end, self.document.filter_string,
+            self.document.filter_type, account.entries.generation
+        )
+        cached = self._account2visibleentries.get(account)
+        if cached is None or cached[0] != key:
+            cached = (key, self._visible_entries_for_account(account))
+            self._account2visibleentries[account] = cached
+        return cached[1]
 
     # Column menu
     def column_menu_items(self):
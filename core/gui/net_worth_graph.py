@@ -23,6 +23,19 @@ class NetWorthGraph(BalanceGraph, SheetViewNotificationsMixin):
         date_range = DateRange(date.min, date)
         return self.document.budgeted_amount_for_target(None, date_range)
     
+    def _balance_change_dates(self, date_range):
+        result = set()
+        currencies = set()
+        for account in self._accounts:
+            result.update(account.entries.entry_dates(date_range))
+            # Converted balances change with exchange rates, but an account without entries has
+            # no balance to convert.
+            if account.currency != self._currency and account.entries.last_entry(date_range.end):
+                currencies.add(account.currency)
+        for currency in currencies:
+            result.update(currency.rate_change_dates(self._currency, date_range.start, date_range.end))
+        return result
+    
     def compute_data(self):
         accounts = set(a for a in self.document.accounts if a.is_balance_sheet_account())
         self._accounts = accounts - self.document.excluded_accounts
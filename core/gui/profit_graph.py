@@ -19,13 +19,21 @@ class ProfitGraph(BarGraph, SheetViewNotificationsMixin):
     def _currency(self):
         return self.document.default_currency
 
-    def _get_cash_flow(self, date_range):
-        self.document.oven.continue_cooking(date_range.end) # it's possible that the overflow is not cooked
+    def _get_cash_flows(self, date_ranges):
+        if not date_ranges:
+            return []
+        self.document.oven.continue_cooking(date_ranges[-1].end) # it's possible that the overflow is not cooked
         accounts = {a for a in self.document.accounts if a.is_income_statement_account()}
         accounts = accounts - self.document.excluded_accounts
-        cash_flow = -sum(a.entries.cash_flow(date_range, currency=self.document.default_currency) for a in accounts)
-        budgeted_amount = self.document.budgeted_amount_for_target(None, date_range)
-        return cash_flow + budgeted_amount
+        currency = self.document.default_currency
+        cash_flows = [0] * len(date_ranges)
+        for account in accounts:
+            account_cash_flows = account.entries.cash_flows(date_ranges, currency=currency)
+            cash_flows = [total + cash_flow for total, cash_flow in zip(cash_flows, account_cash_flows)]
+        return [
+            -cash_flow + self.document.budgeted_amount_for_target(None, date_range)
+            for cash_flow, date_range in zip(cash_flows, date_ranges)
+        ]
 
     def _is_reverted(self):
         return True
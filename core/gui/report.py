@@ -5,6 +5,7 @@
 # http://www.gnu.org/licenses/gpl-3.0.html
 
 import csv
+from datetime import date
 from io import StringIO
 
 from hscommon.gui import tree
@@ -12,6 +13,7 @@ from hscommon.trans import tr
 from hscommon.gui.column import Columns
 
 from ..exception import DuplicateAccountNameError
+from ..model.currency import Currency
 from .base import ViewChild, SheetViewNotificationsMixin, MESSAGES_DOCUMENT_CHANGED
 
 # used in both bsheet and istatement
@@ -25,6 +27,9 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
     SAVENAME = ''
     COLUMNS = []
     INVALIDATING_MESSAGES = MESSAGES_DOCUMENT_CHANGED | {'accounts_excluded', 'date_range_changed'}
+    # Attributes set by _compute_account_node(). We cache them for each account (see
+    # _account_node_key()) so that we only compute nodes for accounts that were re-cooked.
+    ACCOUNT_NODE_ATTRS = []
 
     def __init__(self, parent_view):
         ViewChild.__init__(self, parent_view)
@@ -33,6 +38,8 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
         self.columns = Columns(self, prefaccess=parent_view.document, savename=self.SAVENAME)
         self.edited = None
         self._expanded_paths = {(0, ), (1, )}
+        # account: (key, {attr: value})
+        self._account2nodevalues = {}
 
     # --- Override
     def _do_restore_view(self):
@@ -53,6 +60,16 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
         self.restore_view()
 
     # --- Virtual
+    def _account_node_key(self, account):
+        # What the values computed by _compute_account_node() depend on. Entry list generations
+        # change whenever an account is cooked and the rates DB generation changes whenever rates
+        # change, which affects converted amounts.
+        date_range = self.document.date_range
+        return (
+            date_range.start, date_range.end, date.today(), self.document.default_currency,
+            account.entries.generation, Currency.get_rates_db().generation
+        )
+
     def _compute_account_node(self, node):
         pass
 
@@ -65,6 +82,9 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
         pass
 
     # --- Protected
+    def _invalidate_account_nodes(self):
+        self._account2nodevalues = {}
+
     def _node_of_account(self, account):
         return self.find(lambda n: getattr(n, 'account', None) is account)
 
@@ -193,7 +213,15 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
         node.account_number = account.account_number
         node.is_excluded = account in self.document.excluded_accounts
         if not node.is_excluded:
-            self._compute_account_node(node)
+            key = self._account_node_key(account)
+            cached = self._account2nodevalues.get(account)
+            if cached is not None and cached[0] == key:
+                for attr, value in cached[1].items():
+                    setattr(node, attr, value)
+            else:
+                self._compute_account_node(node)
+                values = {attr: getattr(node, attr) for attr in self.ACCOUNT_NODE_ATTRS}
+                self._account2nodevalues[account] = (key, values)
         return node
 
     def make_blank_node(self):
@@ -331,9 +359,12 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
         self.refresh()
 
     def account_changed(self):
+        # Account and group changes aren't necessarily followed by a cook.
+        self._invalidate_account_nodes()
         self.refresh()
 
     def account_deleted(self):
+        self._invalidate_account_nodes()
         selected_path = self.selected_path
         self.refresh(refresh_view=False)
         next_node = self.get_node(selected_path)
@@ -345,6 +376,8 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
         self.view.refresh()
 
     def accounts_excluded(self):
+        # Budgets touching excluded accounts are ignored in budgeted amounts.
+        self._invalidate_account_nodes()
         self.refresh()
 
     def date_range_changed(self):
@@ -363,6 +396,7 @@ class Report(ViewChild, tree.Tree, SheetViewNotificationsMixin):
         self.view.refresh()
 
     def document_changed(self):
+        self._invalidate_account_nodes()
         self.refresh(refresh_view=False)
         self._select_first()
         self.view.refresh()
@@ -11,7 +11,7 @@ from operator import attrgetter
 
 from hscommon.trans import trget, tr
 from hscommon.gui.column import Column
-from ..model.amount import convert_amount
+from ..model.amount import convert_amounts
 from ..model.recurrence import Spawn
 from ..model.transaction import Transaction
 from .table import Row, RowWithDateMixIn, rowattr
@@ -54,15 +54,15 @@ class TransactionTable(TransactionTableBase):
             self.document.delete_transactions(transactions)
 
     def _fill(self):
-        self._all_amounts_are_native = True
-        total_amount = 0
-        for transaction in self.parent_view.visible_transactions:
-            self.append(TransactionTableRow(self, transaction))
-            convert = lambda a: convert_amount(a, self.document.default_currency, transaction.date)
-            total_amount += convert(transaction.amount)
-            if not self.document.is_amount_native(transaction.amount):
-                self._all_amounts_are_native = False
+        transactions = self.parent_view.visible_transactions
+        amounts = [t.amount for t in transactions]
+        is_native = self.document.is_amount_native
+        self._all_amounts_are_native = all(is_native(amount) for amount in amounts)
+        converted = convert_amounts(amounts, self.document.default_currency, [t.date for t in transactions])
+        total_amount = sum(converted)
         self.footer = TotalRow(self, self.document.date_range.end, total_amount)
+        # Rows are only created when they're displayed.
+        self.extend_lazily(transactions, lambda transaction: TransactionTableRow(self, transaction))
         self._restore_from_explicit_selection(refresh_view=False)
 
     # --- Private
@@ -23,9 +23,13 @@ class TransactionSelectionMixin:
 
 
     def select_transactions(self, transactions):
+        # We look at row sources so that we don't create rows that haven't been created yet. Rows
+        # and entries have a `transaction` attribute. Other sources are transactions themselves.
+        transactions = set(transactions)
         selected_indexes = []
-        for index, row in enumerate(self):
-            if hasattr(row, 'transaction') and row.transaction in transactions:
+        for index in range(len(self)):
+            source = self.row_source(index)
+            if getattr(source, 'transaction', source) in transactions:
                 selected_indexes.append(index)
         self.selected_indexes = selected_indexes
 
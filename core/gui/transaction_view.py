@@ -11,9 +11,9 @@ import weakref
 from hscommon.trans import tr
 from ..const import PaneType
 from ..document import FilterType
-from ..model.account import AccountType
 from ..model.amount import convert_amount
 from ..model.budget import BudgetSpawn
+from ..model.oven import TransactionFlag
 from .base import BaseView, MESSAGES_DOCUMENT_CHANGED
 from .filter_bar import FilterBar
 from .mass_edition_panel import MassEditionPanel
@@ -22,6 +22,16 @@ from .transaction_print import TransactionPrint
 from .transaction_panel import TransactionPanel
 
 
+# filter type: (flag, expected value of the flag)
+FILTER_TYPE2FLAG = {
+    FilterType.Unassigned: (TransactionFlag.Unassigned, TransactionFlag.Unassigned),
+    FilterType.Income: (TransactionFlag.Income, TransactionFlag.Income),
+    FilterType.Expense: (TransactionFlag.Expense, TransactionFlag.Expense),
+    FilterType.Transfer: (TransactionFlag.Transfer, TransactionFlag.Transfer),
+    FilterType.Reconciled: (TransactionFlag.Reconciled, TransactionFlag.Reconciled),
+    FilterType.NotReconciled: (TransactionFlag.Reconciled, 0),
+}
+
 class ViewWithTransactionsMixin:
     def edit_selected_transactions(self):
         editable_txns = [txn for txn in self.mainwindow.selected_transactions if not isinstance(txn, BudgetSpawn)]
@@ -73,29 +83,20 @@ class TransactionView(BaseView, ViewWithTransactionsMixin):
 
     def _set_visible_transactions(self):
         date_range = self.document.date_range
-        txns = [t for t in self.document.oven.transactions if t.date in date_range]
-        query_string = self.document.filter_string
+        oven = self.document.oven
         filter_type = self.document.filter_type
-        if not query_string and filter_type is None:
-            self._visible_transactions = txns
-            return
+        if filter_type is None:
+            txns = [t for t in oven.transactions if t.date in date_range]
+        else:
+            flag, expected = FILTER_TYPE2FLAG[filter_type]
+            txns = [
+                t for t, flags in zip(oven.transactions, oven.transaction_flags)
+                if (flags & flag) == expected and t.date in date_range
+            ]
+        query_string = self.document.filter_string
         if query_string:
             query = self.app.parse_search_query(query_string)
-            txns = [t for t in txns if t.matches(query)]
-        if filter_type is FilterType.Unassigned:
-            txns = [t for t in txns if t.has_unassigned_split]
-        elif filter_type is FilterType.Income:
-            txns = [t for t in txns if any(getattr(s.account, 'type', '') == AccountType.Income for s in t.splits)]
-        elif filter_type is FilterType.Expense:
-            txns = [t for t in txns if any(getattr(s.account, 'type', '') == AccountType.Expense for s in t.splits)]
-        elif filter_type is FilterType.Transfer:
-            def is_transfer(t):
-                return len([s for s in t.splits if s.account is not None and s.account.is_balance_sheet_account()]) >= 2
-            txns = list(filter(is_transfer, txns))
-        elif filter_type is FilterType.Reconciled:
-            txns = [t for t in txns if any(s.reconciled for s in t.splits)]
-        elif filter_type is FilterType.NotReconciled:
-            txns = [t for t in txns if all(not s.reconciled for s in t.splits)]
+            txns = self.document.transactions.filter_matching(txns, query)
         self._visible_transactions = txns
 
     # --- Override
@@ -7,6 +7,7 @@
 import datetime
 import logging
 import re
+from sys import intern
 from itertools import groupby
 from operator import attrgetter
 
@@ -254,7 +255,7 @@ class Loader:
                 amount = split_info.amount
                 if split_info.amount_reversed:
                     amount = -amount
-                memo = nonone(split_info.memo, '')
+                memo = intern(nonone(split_info.memo, ''))
                 split = Split(transaction, account, amount)
                 split.memo = memo
                 if account is None or not of_currency(amount, account.currency):
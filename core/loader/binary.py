@@ -0,0 +1,293 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+# Compact binary document format. The file starts with a header followed by a directory of columns
+# (one (offset, length) pair per column in COLUMNS). Each column is a raw array of fixed-width
+# values which we read directly from a memory-mapped file, without any parsing.
+#
+# * Strings are interned in a single string table. Everywhere else, strings are indexes in that
+#   table, with -1 meaning None.
+# * Dates are ordinals, with 0 meaning None.
+# * Amounts are int64 values shifted by their currency's exponent (like Amount's internal value)
+#   along with the string index of the currency code (-1 for a currency-less zero).
+# * Accounts are indexes in the account columns, with -1 meaning None.
+# * Transactions of schedules (refs, changes and exceptions) are stored with regular transactions,
+#   after them.
+
+import datetime
+import mmap
+import struct
+import sys
+from sys import intern
+from itertools import groupby
+from operator import attrgetter
+
+from hscommon.util import tryint
+from hscommon.trans import tr
+
+from ..exception import FileFormatError
+from ..model.account import Account, AccountType, Group
+from ..model.amount import Amount
+from ..model.budget import Budget
+from ..model.currency import Currency
+from ..model.recurrence import Recurrence, Spawn
+from ..model.transaction import Transaction, Split
+from . import base
+
+MAGIC = b'MGBINARY'
+VERSION = 1
+# name, struct format
+COLUMNS = [
+    ('strings_data', 'B'),
+    ('strings_ends', 'q'),
+    # document_id, count of regular transactions
+    ('document', 'q'),
+    ('property_names', 'i'),
+    ('property_values', 'i'),
+    ('group_names', 'i'),
+    ('group_types', 'i'),
+    ('account_names', 'i'),
+    ('account_currencies', 'i'),
+    ('account_types', 'i'),
+    ('account_groups', 'i'),
+    ('account_references', 'i'),
+    ('account_numbers', 'i'),
+    ('account_inactives', 'B'),
+    ('account_notes', 'i'),
+    ('txn_dates', 'i'),
+    ('txn_descriptions', 'i'),
+    ('txn_payees', 'i'),
+    ('txn_checknos', 'i'),
+    ('txn_notes', 'i'),
+    ('txn_mtimes', 'd'),
+    ('txn_split_ends', 'i'),
+    ('split_accounts', 'i'),
+    ('split_amounts', 'q'),
+    ('split_currencies', 'i'),
+    ('split_memos', 'i'),
+    ('split_references', 'i'),
+    ('split_reconciliation_dates', 'i'),
+    ('schedule_types', 'i'),
+    ('schedule_everys', 'i'),
+    ('schedule_stop_dates', 'i'),
+    ('schedule_refs', 'i'),
+    # changes and exceptions of all schedules
+    ('override_schedules', 'i'),
+    ('override_is_exception', 'B'),
+    ('override_dates', 'i'),
+    ('override_txns', 'i'),
+    ('budget_accounts', 'i'),
+    ('budget_targets', 'i'),
+    ('budget_types', 'i'),
+    ('budget_everys', 'i'),
+    ('budget_amounts', 'q'),
+    ('budget_currencies', 'i'),
+    ('budget_notes', 'i'),
+    ('budget_start_dates', 'i'),
+    ('budget_stop_dates', 'i'),
+]
+# magic, version, byte order (0: little, 1: big), column count
+HEADER = struct.Struct('<8sIBI')
+DIRECTORY_ITEM = struct.Struct('<QQ')
+
+class Loader(base.Loader):
+    FILE_OPEN_MODE = 'rb'
+
+    def _parse(self, infile):
+        try:
+            self._mmap = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError): # empty file
+            raise FileFormatError()
+        self._parse_buffer(self._mmap)
+
+    def _parse_buffer(self, buffer):
+        try:
+            magic, version, byteorder, column_count = HEADER.unpack_from(buffer)
+        except struct.error:
+            raise FileFormatError()
+        if magic != MAGIC or version != VERSION or column_count != len(COLUMNS):
+            raise FileFormatError()
+        if byteorder != (0 if sys.byteorder == 'little' else 1):
+            raise FileFormatError()
+        view = memoryview(buffer)
+        self.columns = {}
+        offset = HEADER.size
+        for name, fmt in COLUMNS:
+            start, length = DIRECTORY_ITEM.unpack_from(buffer, offset)
+            offset += DIRECTORY_ITEM.size
+            itemsize = struct.calcsize(fmt)
+            if start + length * itemsize > len(buffer):
+                raise FileFormatError()
+            self.columns[name] = view[start:start + length * itemsize].cast(fmt)
+
+    def parse_bytes(self, data):
+        """Same as :meth:`parse`, but with the contents of a file rather than its path."""
+        self._mmap = None
+        self._parse_buffer(data)
+
+    def load(self):
+        """Creates model instances directly from the columns read by parse().
+
+        Unlike other loaders, we don't go through the info/flush mechanism: the data comes from a
+        document we saved ourselves, so there's nothing to guess or to parse.
+        """
+        c = self.columns
+        strings_data = c['strings_data']
+        strings = []
+        start = 0
+        for end in c['strings_ends']:
+            strings.append(intern(str(strings_data[start:end], 'utf-8')))
+            start = end
+        strings = tuple(strings)
+
+        def getstr(index):
+            return strings[index] if index >= 0 else None
+
+        fromordinal = datetime.date.fromordinal
+
+        def getdate(ordinal):
+            return fromordinal(ordinal) if ordinal else None
+
+        code2currency = {}
+
+        def getcurrency(index):
+            code = strings[index]
+            try:
+                return code2currency[code]
+            except KeyError:
+                try:
+                    currency = Currency(code)
+                except ValueError:
+                    msg = tr(
+                        "Unsupported currency: {}. Aborting load. Did you disable a currency plugin?"
+                    ).format(code)
+                    raise FileFormatError(msg)
+                code2currency[code] = currency
+                return currency
+
+        # currency string index: (currency, divisor of shifted values)
+        index2currencyinfo = {}
+
+        def getamount(value, currency_index):
+            if currency_index < 0:
+                return 0
+            try:
+                currency, divisor = index2currencyinfo[currency_index]
+            except KeyError:
+                currency = getcurrency(currency_index)
+                divisor = 10 ** currency.exponent
+                index2currencyinfo[currency_index] = (currency, divisor)
+            return Amount(value / divisor, currency)
+
+        document_id, txn_count = c['document']
+        self.document_id = getstr(document_id)
+        for name, value in zip(c['property_names'], c['property_values']):
+            name = strings[name]
+            value = strings[value]
+            # Same conversion as in the native loader.
+            if name == 'default_currency':
+                value = Currency.by_code.get(value)
+            else:
+                value = tryint(value, default=None)
+            if name and value is not None:
+                self.properties[name] = value
+        for name, type in zip(c['group_names'], c['group_types']):
+            self.groups.append(Group(strings[name], strings[type]))
+        accounts = []
+        account_columns = zip(
+            c['account_names'], c['account_currencies'], c['account_types'], c['account_groups'],
+            c['account_references'], c['account_numbers'], c['account_inactives'], c['account_notes'],
+        )
+        for name, currency, type, group, reference, number, inactive, notes in account_columns:
+            account_type = strings[type]
+            if account_type not in AccountType.All:
+                account_type = AccountType.Asset
+            account = Account(strings[name], getcurrency(currency), account_type)
+            if group >= 0:
+                account.group = self.groups.find(strings[group], account_type)
+            account.reference = getstr(reference)
+            account.account_number = strings[number]
+            account.inactive = bool(inactive)
+            account.notes = strings[notes]
+            self.accounts.add(account)
+            accounts.append(account)
+
+        split_accounts = c['split_accounts']
+        split_amounts = c['split_amounts']
+        split_currencies = c['split_currencies']
+        split_memos = c['split_memos']
+        split_references = c['split_references']
+        split_reconciliation_dates = c['split_reconciliation_dates']
+        transactions = []
+        split_start = 0
+        txn_columns = zip(
+            c['txn_dates'], c['txn_descriptions'], c['txn_payees'], c['txn_checknos'], c['txn_notes'],
+            c['txn_mtimes'], c['txn_split_ends'],
+        )
+        for date, description, payee, checkno, notes, mtime, split_end in txn_columns:
+            txn = Transaction(fromordinal(date), strings[description], strings[payee], strings[checkno])
+            txn.notes = strings[notes]
+            txn.mtime = mtime
+            splits = txn.splits
+            for i in range(split_start, split_end):
+                account_index = split_accounts[i]
+                account = accounts[account_index] if account_index >= 0 else None
+                split = Split(txn, account, getamount(split_amounts[i], split_currencies[i]))
+                split.memo = strings[split_memos[i]]
+                split.reference = getstr(split_references[i])
+                split.reconciliation_date = getdate(split_reconciliation_dates[i])
+                splits.append(split)
+            split_start = split_end
+            transactions.append(txn)
+        # Same positions as the native loader: by date, in file order within a date.
+        regular_transactions = sorted(transactions[:txn_count], key=attrgetter('date'))
+        for date, date_transactions in groupby(regular_transactions, attrgetter('date')):
+            for position, txn in enumerate(date_transactions, start=1):
+                self.transactions.add(txn, position=position)
+
+        schedule_columns = zip(
+            c['schedule_types'], c['schedule_everys'], c['schedule_stop_dates'], c['schedule_refs'],
+        )
+        for type, every, stop_date, ref in schedule_columns:
+            recurrence = Recurrence(transactions[ref], strings[type], every)
+            recurrence.stop_date = getdate(stop_date)
+            self.schedules.append(recurrence)
+        override_columns = zip(
+            c['override_schedules'], c['override_is_exception'], c['override_dates'], c['override_txns'],
+        )
+        for schedule, is_exception, date, txn in override_columns:
+            recurrence = self.schedules[schedule]
+            date = fromordinal(date)
+            if txn >= 0:
+                txn = transactions[txn]
+                spawn = Spawn(recurrence, txn, date, txn.date)
+                if is_exception:
+                    recurrence.date2exception[date] = spawn
+                else:
+                    recurrence.date2globalchange[date] = spawn
+            else:
+                recurrence.delete_at(date)
+
+        budget_columns = zip(
+            c['budget_accounts'], c['budget_targets'], c['budget_types'], c['budget_everys'],
+            c['budget_amounts'], c['budget_currencies'], c['budget_notes'], c['budget_start_dates'],
+            c['budget_stop_dates'],
+        )
+        for account, target, type, every, amount, currency, notes, start_date, stop_date in budget_columns:
+            budget = Budget(
+                accounts[account], accounts[target] if target >= 0 else None,
+                getamount(amount, currency), fromordinal(start_date), repeat_type=strings[type]
+            )
+            budget.repeat_every = every
+            budget.notes = strings[notes]
+            budget.stop_date = getdate(stop_date)
+            self.budgets.append(budget)
+        self.columns = None
+        self._mmap = None
+        if self.transactions:
+            start_date = regular_transactions[0].date
+            Currency.get_rates_db().ensure_rates(start_date, list(code2currency))
+
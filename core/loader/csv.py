@@ -8,8 +8,8 @@
 
 import csv
 import logging
+from itertools import islice
 
-from hscommon.util import stripfalse
 from hscommon.trans import tr
 
 from ..exception import FileFormatError, FileLoadError
@@ -28,42 +28,96 @@ class CsvField:
     Reference = 'reference'
 
 MERGABLE_FIELDS = {CsvField.Description, CsvField.Payee}
+# Number of lines at the beginning of the file that we give to the dialect sniffer.
+SNIFF_LINE_COUNT = 1000
+# Number of lines we keep in memory (in ``lines``) for CSV options to show.
+PREVIEW_LINE_COUNT = 1000
+# Number of lines with which we guess the date format and check amounts before loading.
+GUESS_LINE_COUNT = 1000
 
 class Loader(base.Loader):
+    """Loads CSV files.
+
+    Files can be huge, so we never hold their whole content. We sniff the dialect on their first
+    lines and :attr:`lines` only holds the first :const:`PREVIEW_LINE_COUNT` lines. When loading,
+    lines are read from the file again and go straight to transaction infos. When the file has less
+    lines than that, :attr:`lines` is complete and we load from it instead.
+    """
     FILE_ENCODING = 'latin-1'
 
     def __init__(self, default_currency, default_date_format=None):
         base.Loader.__init__(self, default_currency, default_date_format)
         self.columns = []
         self.lines = []
+        #: Indexes of the lines not to load. Negative indexes are relative to :attr:`line_count`.
+        self.excluded_lines = set()
+        #: Number of lines in the file, which can be more than ``len(lines)``.
+        self.line_count = 0
         self.dialect = None # last used dialect
-        self.rawlines = [] # last prepared file
+        self._filename = None
+        self._encoding = None
+        self._colcount = 0
 
     # --- Private
     @staticmethod
-    def _merge_columns(columns, lines):
-        # For any columns that is there more than once, merge the data that goes with it
+    def _merge_columns(columns):
+        # For any columns that is there more than once, merge the data that goes with it. We remove
+        # merged columns from ``columns`` and return a function doing the same merge on a line.
+        merges = []
         for field in MERGABLE_FIELDS:
             indexes = [i for i, f in enumerate(columns) if f == field]
             if len(indexes) <= 1:
                 continue
-            for line_index, line in enumerate(lines):
+            merges.append(indexes)
+            for index_to_remove in reversed(indexes[1:]):
+                del columns[index_to_remove]
+
+        def merge_line(line):
+            for indexes in merges:
                 elems = [line[i] for i in indexes]
                 merged_data = ' '.join(elems)
-                new_line = line[:] # We don't want to touch original lines
-                new_line[indexes[0]] = merged_data
+                line = line[:] # We don't want to touch original lines
+                line[indexes[0]] = merged_data
                 for index_to_remove in reversed(indexes[1:]):
-                    del new_line[index_to_remove]
-                lines[line_index] = new_line
-            for index_to_remove in reversed(indexes[1:]):
-                del columns[index_to_remove]
+                    del line[index_to_remove]
+            return line
+
+        return merge_line
+
+    def _iter_rawlines(self, encoding=None):
+        kw = {'encoding': self.FILE_ENCODING, 'errors': 'ignore'}
+        with open(self._filename, self.FILE_OPEN_MODE, **kw) as infile:
+            for line in self._rawlines(infile, encoding):
+                yield line
+
+    def _rawlines(self, infile, encoding=None):
+        if encoding and encoding != self.FILE_ENCODING:
+            # We read using latin-1, so if we want to re-decode lines using another encoding, we
+            # have to re-encode them and the decode them using our encoding
+            redecode = lambda s: s.encode(self.FILE_ENCODING).decode(encoding, 'ignore')
+        else:
+            redecode = None
+        # Like content.split('\n'), we end with an empty line if the file ends with a newline.
+        ends_with_newline = True
+        for line in infile:
+            ends_with_newline = line.endswith('\n')
+            if ends_with_newline:
+                line = line[:-1]
+            line = line.replace('\0', '')
+            yield redecode(line) if redecode is not None else line
+        if ends_with_newline:
+            yield ''
+
+    def _iter_lines(self, encoding=None):
+        try:
+            reader = csv.reader(self._iter_rawlines(encoding), self.dialect)
+        except TypeError:
+            logging.warning("Invalid Dialect (strangely...). Delimiter: %r", self.dialect.delimiter)
+        return (line for line in reader if line)
 
     def _prepare(self, infile):
         # Comment lines can confuse the sniffer. We remove them
-        content = infile.read()
-        content = content.replace('\0', '')
-        lines = content.split('\n')
-        stripped_lines = [line.strip() for line in lines]
+        lines = list(islice(self._rawlines(infile), SNIFF_LINE_COUNT))
         stripped_lines = [line for line in lines if line and not line.startswith('#')]
         try:
             self.dialect = csv.Sniffer().sniff('\n'.join(stripped_lines))
@@ -75,7 +129,7 @@ class Loader(base.Loader):
             # delimiters per line has to be at least 2, but headers and/or footers can have less,
             # do to play on the safe side, we go with 1.5.
             DELIMITERS = set(';,\t|')
-            delim2count = {delim: content.count(delim) for delim in DELIMITERS}
+            delim2count = {delim: sum(line.count(delim) for line in lines) for delim in DELIMITERS}
             delim, count = max(delim2count.items(), key=lambda x: x[1])
             if count / len(lines) < 1.5:
                 raise FileFormatError()
@@ -83,43 +137,55 @@ class Loader(base.Loader):
             class ManualDialect(csv.excel):
                 delimiter = delim
             self.dialect = ManualDialect
-        self.rawlines = lines
 
     def _scan_lines(self, encoding=None):
-        rawlines = self.rawlines
-        if encoding and encoding != self.FILE_ENCODING:
-            # rawlines is a list of ustrings decoded using latin-1, so if we want to re-decode them
-            # using another encoding, we have to re-encode them and the decode them using our encoding
-            redecode = lambda s: s.encode(self.FILE_ENCODING).decode(encoding, 'ignore')
-            rawlines = (redecode(line) for line in rawlines)
-        try:
-            reader = csv.reader(iter(rawlines), self.dialect)
-        except TypeError:
-            logging.warning("Invalid Dialect (strangely...). Delimiter: %r", self.dialect.delimiter)
-        lines = stripfalse(reader)
+        # We go through the whole file to know how many lines and columns it has, but only keep
+        # the first lines.
+        self._encoding = encoding
+        lines = []
+        line_count = 0
+        maxlen = 0
+        for line in self._iter_lines(encoding):
+            if line_count < PREVIEW_LINE_COUNT:
+                lines.append(line)
+            line_count += 1
+            maxlen = max(maxlen, len(line))
         # complete smaller lines and strip whitespaces
-        maxlen = max(len(line) for line in lines)
         for line in (l for l in lines if len(l) < maxlen):
             line += [''] * (maxlen - len(line))
         self.lines = lines
+        self.line_count = line_count
+        self._colcount = maxlen
 
-    def _parse_date_format(self, lines, ci):
+    def _iter_lines_to_load(self, ci, merge_line):
+        if self.line_count <= PREVIEW_LINE_COUNT:
+            lines = self.lines
+        else:
+            lines = self._iter_lines(self._encoding)
+        excluded = self.excluded_lines
+        line_count = self.line_count
         date_index = ci[CsvField.Date]
-        lines_to_load = []
-        for line in lines:
-            line = line[:]
+        for index, line in enumerate(lines):
+            if index in excluded or index - line_count in excluded:
+                continue
+            if len(line) < self._colcount:
+                line = line + [''] * (self._colcount - len(line))
+            line = merge_line(line)
             cleaned_str_date = self.clean_date(line[date_index])
             if cleaned_str_date is None:
                 logging.warning('{0} is not a date. Ignoring line'.format(line[date_index]))
-            else:
-                line[date_index] = cleaned_str_date
-                lines_to_load.append(line)
-        del line
-        str_dates = [line[date_index] for line in lines_to_load]
+                continue
+            line = line[:]
+            line[date_index] = cleaned_str_date
+            yield line
+
+    def _parse_date_format(self, lines, ci):
+        date_index = ci[CsvField.Date]
+        str_dates = [line[date_index] for line in lines]
         date_format = self.guess_date_format(str_dates)
         if date_format is None:
             raise FileLoadError(tr("The Date column has been set on a column that doesn't contain dates."))
-        return date_format, lines_to_load
+        return date_format
 
     def _check_amount_values(self, lines, ci):
         for line in lines:
@@ -133,16 +199,36 @@ class Loader(base.Loader):
                 except ValueError:
                     raise FileLoadError(tr("The Amount column has been set on a column that doesn't contain amounts."))
 
+    def _load_line(self, line, ci):
+        # Raises ValueError, before having started a transaction, if the line can't be loaded.
+        values = []
+        for attr, index in ci.items():
+            value = line[index]
+            if attr == CsvField.Date:
+                value = self.parse_date_str(value, self.parsing_date_format)
+            elif attr == CsvField.Increase:
+                attr = CsvField.Amount
+            elif attr == CsvField.Decrease:
+                attr = CsvField.Amount
+                if value.strip() and not value.startswith('-'):
+                    value = '-' + value
+            if isinstance(value, str):
+                value = value.strip()
+            values.append((attr, value))
+        self.start_transaction()
+        for attr, value in values:
+            if value:
+                setattr(self.transaction_info, attr, value)
+
     # --- Override
     def _parse(self, infile):
         self._prepare(infile)
         self._scan_lines()
 
     def _load(self):
-        lines = self.lines[:]
-        colcount = len(lines[0]) if lines else 0
+        colcount = len(self.lines[0]) if self.lines else 0
         columns = self.columns[:colcount]
-        self._merge_columns(columns, lines)
+        merge_line = self._merge_columns(columns)
         ci = {}
         for index, field in enumerate(columns):
             if field is not None:
@@ -152,24 +238,24 @@ class Loader(base.Loader):
         if not (hasdate and hasamount):
             raise FileLoadError(tr("The Date and Amount columns must be set."))
         self.account_info.name = 'CSV Import'
-        self.parsing_date_format, lines_to_load = self._parse_date_format(lines, ci)
-        self._check_amount_values(lines_to_load, ci)
+        lines_to_load = self._iter_lines_to_load(ci, merge_line)
+        # We guess and check on the first lines. If following lines don't fit, we ignore them.
+        sample = list(islice(lines_to_load, GUESS_LINE_COUNT))
+        self.parsing_date_format = self._parse_date_format(sample, ci)
+        self._check_amount_values(sample, ci)
+        for line in sample:
+            self._load_line(line, ci)
         for line in lines_to_load:
-            self.start_transaction()
-            for attr, index in ci.items():
-                value = line[index]
-                if attr == CsvField.Date:
-                    value = self.parse_date_str(value, self.parsing_date_format)
-                elif attr == CsvField.Increase:
-                    attr = CsvField.Amount
-                elif attr == CsvField.Decrease:
-                    attr = CsvField.Amount
-                    if value.strip() and not value.startswith('-'):
-                        value = '-' + value
-                if isinstance(value, str):
-                    value = value.strip()
-                if value:
-                    setattr(self.transaction_info, attr, value)
+            try:
+                self._check_amount_values([line], ci)
+                self._load_line(line, ci)
+            except (ValueError, FileLoadError):
+                logging.warning('Invalid date or amount in {0}. Ignoring line'.format(line))
+
+    def parse(self, filename):
+        # We keep the filename to read lines again when loading
+        self._filename = filename
+        base.Loader.parse(self, filename)
 
     # --- Public
     def rescan(self, encoding=None):
@@ -20,15 +20,9 @@ class Loader(base.Loader):
     STRICT_CURRENCY = True
 
     def _parse(self, infile):
-        try:
-            root = ET.parse(infile).getroot()
-        except SyntaxError:
-            raise FileFormatError()
-        if root.tag != 'moneyguru-file':
-            raise FileFormatError()
-        self.root = root
-
-    def _load(self):
+        # We read the whole file here, but we stream it: root elements are turned into infos as
+        # soon as they're complete and then dropped, so that we never have to hold the whole
+        # element tree in memory.
         TODAY = datetime.now().date()
 
         def str2date(s, default=None):
@@ -74,10 +68,7 @@ class Loader(base.Loader):
                 info.splits.append(split_info)
             return info
 
-        root = self.root
-        self.document_id = root.attrib.get('document_id')
-        props_element = root.find('properties')
-        if props_element is not None:
+        def read_properties_element(props_element):
             for name, value in props_element.attrib.items():
                 # For now, all our prefs are ints, so we can simply assume tryint, but we'll
                 # eventually need something more sophisticated.
@@ -87,13 +78,15 @@ class Loader(base.Loader):
                     value = tryint(value, default=None)
                 if name and value is not None:
                     self.properties[name] = value
-        for group_element in root.iter('group'):
+
+        def read_group_element(group_element):
             self.start_group()
             attrib = group_element.attrib
             self.group_info.name = attrib.get('name')
             self.group_info.type = attrib.get('type')
             self.flush_group()
-        for account_element in root.iter('account'):
+
+        def read_account_element(account_element):
             self.start_account()
             attrib = account_element.attrib
             self.account_info.name = attrib.get('name')
@@ -107,12 +100,13 @@ class Loader(base.Loader):
             self.account_info.inactive = attrib.get('inactive') == 'y'
             self.account_info.notes = handle_newlines(attrib.get('notes', ''))
             self.flush_account()
-        elements = [e for e in root if e.tag == 'transaction'] # we only want transaction element *at the root*
-        for transaction_element in elements:
+
+        def read_root_transaction_element(transaction_element):
             self.start_transaction()
             read_transaction_element(transaction_element, self.transaction_info)
             self.flush_transaction()
-        for recurrence_element in root.iter('recurrence'):
+
+        def read_recurrence_element(recurrence_element):
             attrib = recurrence_element.attrib
             self.recurrence_info.repeat_type = attrib.get('type')
             self.recurrence_info.repeat_every = int(attrib.get('every', '1'))
@@ -135,7 +129,8 @@ class Loader(base.Loader):
                 except KeyError:
                     continue
             self.flush_recurrence()
-        for budget_element in root.iter('budget'):
+
+        def read_budget_element(budget_element):
             attrib = budget_element.attrib
             self.budget_info.account = attrib.get('account')
             self.budget_info.repeat_type = attrib.get('type')
@@ -147,3 +142,36 @@ class Loader(base.Loader):
             self.budget_info.stop_date = str2date(attrib.get('stop_date'))
             self.flush_budget()
 
+        tag2reader = {
+            'properties': read_properties_element,
+            'group': read_group_element,
+            'account': read_account_element,
+            'transaction': read_root_transaction_element,
+            'recurrence': read_recurrence_element,
+            'budget': read_budget_element,
+        }
+        events = ET.iterparse(infile, events=('start', 'end'))
+        try:
+            event, root = next(events)
+            if root.tag != 'moneyguru-file':
+                raise FileFormatError()
+            self.document_id = root.attrib.get('document_id')
+            # A depth of 1 means that we're directly under the root.
+            depth = 1
+            for event, element in events:
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue
+                reader = tag2reader.get(element.tag)
+                if reader is not None:
+                    reader(element)
+                del root[:]
+        except (SyntaxError, StopIteration):
+            raise FileFormatError()
+
+    def _load(self):
+        # Everything was read in _parse().
+        pass
@@ -0,0 +1,97 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+# Parsing and loading files for import in a pool of processes.
+#
+# Loaders are self-contained (they have their own accounts, transactions and oven), so loading a
+# file doesn't need anything from the document we import into. Each worker parses and loads one
+# file and sends the loaded instances back in our binary format (see core.loader.binary), which is
+# compact and fast to load back.
+
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from hscommon.jobprogress.job import nulljob
+from hscommon.trans import tr
+
+from ..exception import FileFormatError
+from ..model.currency import Currency, RatesDB
+from ..saver import binary as binary_saver
+from . import csv, qif, ofx, native, binary
+
+IMPORT_LOADERS = (native.Loader, ofx.Loader, qif.Loader, csv.Loader)
+
+def parse_for_import(filename, default_currency, default_date_format):
+    """Returns a loader having parsed ``filename``.
+
+    We determine the format of the file by successively trying to read it as a moneyGuru file, an
+    OFX, a QIF and finally a CSV. Raises ``FileFormatError`` if none of them fit.
+    """
+    for loaderclass in IMPORT_LOADERS:
+        try:
+            loader = loaderclass(default_currency, default_date_format=default_date_format)
+            loader.parse(filename)
+            return loader
+        except FileFormatError:
+            pass
+    raise FileFormatError(tr('%s is of an unknown format.') % filename)
+
+def _load_in_worker(filename, default_currency, default_date_format):
+    # Rates fetched in a worker would be lost anyway and we don't want to touch the rates DB of our
+    # parent process. The parent ensures rates when it loads the results back.
+    Currency.set_rates_db(RatesDB(':memory:', False))
+    loader = parse_for_import(filename, default_currency, default_date_format)
+    if isinstance(loader, csv.Loader):
+        # CSV files need the user to tell us about their columns before we can load them.
+        return None
+    loader.load()
+    data = binary_saver.dumps(
+        loader.document_id, loader.properties, loader.accounts, loader.groups,
+        loader.transactions, loader.schedules, loader.budgets
+    )
+    return data, loader.parsing_date_format
+
+def _unpack(data, parsing_date_format, default_currency):
+    loader = binary.Loader(default_currency)
+    loader.parse_bytes(data)
+    loader.load()
+    loader.oven.cook(datetime.date.min, until_date=None)
+    loader.parsing_date_format = parsing_date_format
+    return loader
+
+def load_for_import(filenames, default_currency, default_date_format, j=nulljob, max_workers=None):
+    """Parses and loads ``filenames`` in parallel and yields ``(filename, loader, error)`` tuples.
+
+    Tuples are yielded as soon as their file is loaded, so not necessarily in ``filenames`` order.
+    Yielded loaders are loaded and cooked, as if :meth:`.Loader.load` had been called on them.
+    CSV files can't be loaded without the user configuring their columns first, so they are yielded
+    with a ``None`` loader. Files that can't be loaded are yielded with a ``None`` loader and the
+    ``FileFormatError`` they raised, and we keep loading the other ones. We report progress to
+    ``j`` after each file.
+    """
+    j.start_job(len(filenames), tr("Loading files"))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        future2filename = {
+            executor.submit(_load_in_worker, filename, default_currency, default_date_format): filename
+            for filename in filenames
+        }
+        try:
+            for future in as_completed(future2filename):
+                filename = future2filename[future]
+                loader = None
+                error = None
+                try:
+                    result = future.result()
+                    if result is not None:
+                        data, parsing_date_format = result
+                        loader = _unpack(data, parsing_date_format, default_currency)
+                except FileFormatError as e:
+                    error = e
+                j.add_progress(desc=filename)
+                yield filename, loader, error
+        finally:
+            for future in future2filename:
+                future.cancel()
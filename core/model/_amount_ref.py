@@ -12,9 +12,23 @@
 # Its docstrings are also used for the developer documentation.
 
 import operator
+import re
+from itertools import groupby
 
 from .currency import Currency
 
+# grouping separator. A thousand sep character that has digit before and after *if* the right part
+# has 3 digits. \xa0 is a non-breaking space. We sometimes end up with those in space-separated
+# environments.
+re_grouping_sep = re.compile(r"(?<=\d)[.\s\xA0,'](?=\d{3})")
+# A dot or comma followed by digits followed by the end of the string.
+# currencies with 2 decimal places
+re_decimal_sep_2 = re.compile(r"[,.](?=\d{1,2}$)")
+# currencies with 3 or more decimal places
+re_decimal_sep_x = re.compile(r"[,.](?=\d{1,10}$)")
+# A valid amount, once it has been pre-processed
+re_amount = re.compile(r"\d+\.\d+|\.\d+|\d+")
+
 def cmp_wrap(op):
     def wrapper(self, other):
         if isinstance(other, Amount):
@@ -170,3 +184,58 @@ class Amount:
         "*readonly*. ``float``. numerical value of the amount."""
         return self._value
 
+
+def parse_amount_single(string, exponent, auto_decimal_place, parens_for_negatives=True):
+    # Parse a string which contains a single amount (not an expression) and return a float
+    # Now, we have a string that might have thousand separators and might or might not have
+    # a decimal separator, which might be either "," or ".". We'll first find our decimal sep
+    # and replace it with a placeholder char, find all thousand seps, replace them with nothing.
+    if exponent >= 3:
+        string = re_decimal_sep_x.sub('|', string)
+    elif exponent == 2:
+        string = re_decimal_sep_2.sub('|', string)
+    else:
+        pass # No decimal sep
+    string = re_grouping_sep.sub('', string)
+    string = string.replace('|', '.')
+    if auto_decimal_place and string.isdigit():
+        if exponent:
+            string = string.rjust(exponent, '0')
+            string = string[:-exponent] + '.' + string[-exponent:]
+    try:
+        value = float(string)
+    except ValueError:
+        # There might be some crap around the amount. Remove it and try again.
+        m = re_amount.search(string)
+        if m is None:
+            raise ValueError("'{}' is not an amount".format(string))
+        value = float(string[m.start():m.end()])
+        # Handle negative amounts either starting with a minus sign or surrounded
+        # by parenthasis, which is used frequently to denote a negative in finance.
+        # e.g. -12.30 == (12.30), if we're allowing parens to be used for negative
+        # values.
+        is_negative = '-' in string[:m.start()]
+        if not is_negative and parens_for_negatives:
+            is_negative = '(' in string[:m.start()] and ')' in string[m.end():]
+        if is_negative:
+            value = -value
+    return value
+
+def format_number(value, exponent, decimal_sep, grouping_sep):
+    """Returns ``value`` (a positive ``float``) formatted with ``exponent`` decimals.
+
+    Used by :func:`.format_amount`, which takes care of signs and currencies.
+    """
+    number = '%.*f' % (exponent, value)
+    if decimal_sep != '.':
+        number = number.replace('.', decimal_sep)
+    if grouping_sep:
+        # Yup, this code is complicated, but grouping digits *is* complicated.
+        splitted = number.split(decimal_sep)
+        left = splitted[0]
+        groups = []
+        for _, pair_group in groupby(enumerate(reversed(left)), lambda pair: pair[0] // 3):
+            groups.append(''.join(reversed([pair[1] for pair in pair_group])))
+        splitted[0] = grouping_sep.join(reversed(groups))
+        number = decimal_sep.join(splitted)
+    return number
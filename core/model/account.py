@@ -158,13 +158,117 @@ class AccountList(list):
     ``default_currency`` is the currency that we want new accounts (created in :meth:`find`) to
     have.
 
+    To avoid going through all accounts in :meth:`find` and :meth:`find_reference`, we index
+    accounts by normalized name, by account number and by reference. Those attributes can be
+    changed directly, so when changing them on an account that is in the list, call
+    :meth:`clear_cache` afterwards. :meth:`set_account_name` does it by itself.
+
     Subclasses ``list``.
     """
     def __init__(self, default_currency):
         list.__init__(self)
         self.default_currency = default_currency
         self.auto_created = set()
+        self._indexes = None
+
+    # --- Private
+    def _compute_indexes(self):
+        # An account's order is what allows us to return the first matching account like a linear
+        # search would. We keep the keys under which each account is indexed so that it can be
+        # removed or re-indexed.
+        self._indexes = {
+            'name': {},
+            'number': {},
+            'reference': {},
+        }
+        self._account2keys = {}
+        self._account2order = {}
+        self._next_order = 0
+        self._max_number_len = 0
+        for account in self:
+            self._index(account)
+
+    def _ensure_indexes(self):
+        if self._indexes is None:
+            self._compute_indexes()
 
+    def _first(self, accounts):
+        if not accounts:
+            return None
+        elif len(accounts) == 1:
+            return accounts[0]
+        else:
+            return min(accounts, key=self._account2order.__getitem__)
+
+    def _index(self, account):
+        if account in self._account2keys:
+            self._unindex(account)
+        if account not in self._account2order:
+            self._account2order[account] = self._next_order
+            self._next_order += 1
+        keys = [('name', account.name.lower().strip())]
+        if account.account_number:
+            keys.append(('number', account.account_number))
+            self._max_number_len = max(self._max_number_len, len(account.account_number))
+        if account.reference is not None:
+            keys.append(('reference', account.reference))
+        for index_name, key in keys:
+            self._indexes[index_name].setdefault(key, []).append(account)
+        self._account2keys[account] = keys
+
+    def _unindex(self, account):
+        keys = self._account2keys.pop(account, None)
+        if keys is None:
+            return
+        for index_name, key in keys:
+            index = self._indexes[index_name]
+            accounts = index[key]
+            accounts.remove(account)
+            if not accounts:
+                del index[key]
+
+    # --- Override
+    # The order in which accounts are in the list is part of our indexes, so when the list is
+    # changed in any other way than through add() and remove(), our indexes have to be rebuilt.
+    def __delitem__(self, key):
+        list.__delitem__(self, key)
+        self.clear_cache()
+
+    def __iadd__(self, other):
+        result = list.__iadd__(self, other)
+        self.clear_cache()
+        return result
+
+    def __setitem__(self, key, value):
+        list.__setitem__(self, key, value)
+        self.clear_cache()
+
+    def append(self, account):
+        list.append(self, account)
+        self.clear_cache()
+
+    def extend(self, accounts):
+        list.extend(self, accounts)
+        self.clear_cache()
+
+    def insert(self, index, account):
+        list.insert(self, index, account)
+        self.clear_cache()
+
+    def pop(self, *args):
+        result = list.pop(self, *args)
+        self.clear_cache()
+        return result
+
+    def reverse(self):
+        list.reverse(self)
+        self.clear_cache()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self.clear_cache()
+
+    # --- Public
     def add(self, account):
         """Adds ``account`` to the list.
 
@@ -172,11 +276,30 @@ class AccountList(list):
         """
         if self.find_reference(account.reference) is None:
             list.append(self, account)
+            if self._indexes is not None:
+                self._index(account)
 
     def clear(self):
         """Removes all elements from the list."""
         del self[:]
 
+    def clear_cache(self, changed=None):
+        """Clears our indexes.
+
+        Call this when the name, number or reference of accounts in the list have been changed
+        directly. If you know which accounts have changed, pass them as ``changed``. Only those will
+        be re-indexed instead of having our indexes rebuilt when they're next needed.
+        """
+        if self._indexes is None:
+            return
+        if changed is None:
+            self._indexes = None
+        else:
+            for account in changed:
+                if account in self._account2keys:
+                    self._unindex(account)
+                    self._index(account)
+
     def filter(self, group=NOT_GIVEN, type=NOT_GIVEN):
         """Returns all accounts of the given ``type`` and/or ``group``.
 
@@ -193,15 +316,21 @@ class AccountList(list):
     def find(self, name, auto_create_type=None):
         """Returns the first account matching with ``name`` (case insensitive)
 
+        An account also matches if ``name`` starts with its :attr:`Account.account_number`.
+
         If ``auto_create_type`` is not ``None`` and no account is found, create an account of type
         ``auto_create_type`` and return it.
         """
+        self._ensure_indexes()
         normalized = name.lower().strip()
-        for account in self:
-            if account.name.lower().strip() == normalized:
-                return account
-            elif account.account_number and normalized.startswith(account.account_number):
-                return account
+        candidates = list(self._indexes['name'].get(normalized, ()))
+        number_index = self._indexes['number']
+        if number_index:
+            for length in range(1, min(len(normalized), self._max_number_len) + 1):
+                candidates += number_index.get(normalized[:length], ())
+        account = self._first(candidates)
+        if account is not None:
+            return account
         if auto_create_type:
             account = Account(name.strip(), self.default_currency, type=auto_create_type)
             self.add(account)
@@ -212,9 +341,8 @@ class AccountList(list):
         """Returns the account with ``reference`` or ``None`` if it isn't there."""
         if reference is None:
             return None
-        for account in self:
-            if account.reference == reference:
-                return account
+        self._ensure_indexes()
+        return self._first(self._indexes['reference'].get(reference))
 
     def has_multiple_currencies(self):
         """Returns whether there's at least one account with a different currency.
@@ -235,6 +363,9 @@ class AccountList(list):
         """Removes ``account`` from the list."""
         list.remove(self, account)
         self.auto_created.discard(account)
+        if self._indexes is not None:
+            self._unindex(account)
+            self._account2order.pop(account, None)
 
     def set_account_name(self, account, new_name):
         """Rename ``account`` to ``new_name``.
@@ -247,6 +378,7 @@ class AccountList(list):
         if (other is not None) and (other is not account):
             raise DuplicateAccountNameError()
         account.name = new_name.strip()
+        self.clear_cache(changed=[account])
 
 
 class GroupList(list):
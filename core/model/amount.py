@@ -8,17 +8,17 @@
 
 import os
 import re
-from itertools import groupby
+from collections import defaultdict
 
 from .currency import Currency
 
 try:
     if os.environ.get('USE_PY_AMOUNT'):
         raise ImportError()
-    from ._amount import Amount
+    from ._amount import Amount, parse_amount_single, format_number
 except ImportError:
     print("Using amount_ref")
-    from ._amount_ref import Amount
+    from ._amount_ref import Amount, parse_amount_single, format_number
 
 class UnsupportedCurrencyError(ValueError):
     """We're trying to parse an amount specifying an unsupported currency."""
@@ -30,17 +30,6 @@ re_arithmetic_operators = re.compile(r"[+\-*/()]")
 re_not_arithmetic_operators = re.compile(r"[^+\-*/()]+")
 # 3 letters (capturing)
 re_currency = re.compile(r'([a-zA-Z]{3}\s*$)|(^\s*[a-zA-Z]{3})')
-# grouping separator. A thousand sep character that has digit before and after *if* the right part
-# has 3 digits. \xa0 is a non-breaking space. We sometimes end up with those in space-separated
-# environments.
-re_grouping_sep = re.compile(r"(?<=\d)[.\s\xA0,'](?=\d{3})")
-# A dot or comma followed by digits followed by the end of the string.
-# currencies with 2 decimal places
-re_decimal_sep_2 = re.compile(r"[,.](?=\d{1,2}$)")
-# currencies with 3 or more decimal places
-re_decimal_sep_x = re.compile(r"[,.](?=\d{1,10}$)")
-# A valid amount, once it has been pre-processed
-re_amount = re.compile(r"\d+\.\d+|\.\d+|\d+")
 
 def format_amount(
         amount, default_currency=None, blank_zero=False, zero_currency=None, decimal_sep='.',
@@ -74,7 +63,6 @@ def format_amount(
     """
     if amount is None:
         return ''
-    number = '0.00'
     currency = None
     negative = False
     if not amount:
@@ -82,28 +70,27 @@ def format_amount(
             return ''
         elif zero_currency is not None and zero_currency != default_currency:
             currency = zero_currency.code
+        number = format_number(0., 2, decimal_sep, grouping_sep)
     else:
         negative = amount < 0
-        number = '%.*f' % (amount.currency.exponent, float(abs(amount)))
+        number = format_number(
+            float(abs(amount)), amount.currency.exponent, decimal_sep, grouping_sep
+        )
         if amount.currency != default_currency:
             currency = amount.currency.code
-    if decimal_sep != '.':
-        number = number.replace('.', decimal_sep)
-    if grouping_sep:
-        # Yup, this code is complicated, but grouping digits *is* complicated.
-        splitted = number.split(decimal_sep)
-        left = splitted[0]
-        groups = []
-        for _, pair_group in groupby(enumerate(reversed(left)), lambda pair: pair[0] // 3):
-            groups.append(''.join(reversed([pair[1] for pair in pair_group])))
-        splitted[0] = grouping_sep.join(reversed(groups))
-        number = decimal_sep.join(splitted)
     if negative:
         number = '-' + number
     if currency is not None:
         number = '%s %s' % (currency, number)
     return number
 
+def format_amounts(amounts, default_currency=None, **options):
+    """Batch version of :func:`format_amount`.
+
+    Returns a list of formatted ``amounts``. ``options`` are the same as in :func:`format_amount`.
+    """
+    return [format_amount(amount, default_currency, **options) for amount in amounts]
+
 def parse_amount_expression(string, exponent):
     # Parse an expression. Before we can do that, we need to replace all amounts with their parsed
     # and then reformatted counterparts.
@@ -129,42 +116,6 @@ def parse_amount_expression(string, exponent):
     result = re_not_arithmetic_operators.sub(repl, string)
     return result
 
-def parse_amount_single(string, exponent, auto_decimal_place, parens_for_negatives=True):
-    # Parse a string which contains a single amount (not an expression) and return a float
-    # Now, we have a string that might have thousand separators and might or might not have
-    # a decimal separator, which might be either "," or ".". We'll first find our decimal sep
-    # and replace it with a placeholder char, find all thousand seps, replace them with nothing.
-    if exponent >= 3:
-        string = re_decimal_sep_x.sub('|', string)
-    elif exponent == 2:
-        string = re_decimal_sep_2.sub('|', string)
-    else:
-        pass # No decimal sep
-    string = re_grouping_sep.sub('', string)
-    string = string.replace('|', '.')
-    if auto_decimal_place and string.isdigit():
-        if exponent:
-            string = string.rjust(exponent, '0')
-            string = string[:-exponent] + '.' + string[-exponent:]
-    try:
-        value = float(string)
-    except ValueError:
-        # There might be some crap around the amount. Remove it and try again.
-        m = re_amount.search(string)
-        if m is None:
-            raise ValueError("'{}' is not an amount".format(string))
-        value = float(string[m.start():m.end()])
-        # Handle negative amounts either starting with a minus sign or surrounded
-        # by parenthasis, which is used frequently to denote a negative in finance.
-        # e.g. -12.30 == (12.30), if we're allowing parens to be used for negative
-        # values.
-        is_negative = '-' in string[:m.start()]
-        if not is_negative and parens_for_negatives:
-            is_negative = '(' in string[:m.start()] and ')' in string[m.end():]
-        if is_negative:
-            value = -value
-    return value
-
 def parse_amount(
         string, default_currency=None, with_expression=True, auto_decimal_place=False,
         strict_currency=False):
@@ -227,6 +178,24 @@ def parse_amount(
     else:
         raise ValueError('No currency given')
 
+def parse_amounts(strings, default_currency=None, **options):
+    """Batch version of :func:`parse_amount`.
+
+    Returns a list of amounts parsed from ``strings``. ``options`` are the same as in
+    :func:`parse_amount`. Imported files often have the same amount many times, so we only parse
+    each distinct string once.
+    """
+    string2amount = {}
+    result = []
+    for string in strings:
+        try:
+            amount = string2amount[string]
+        except KeyError:
+            amount = parse_amount(string, default_currency, **options)
+            string2amount[string] = amount
+        result.append(amount)
+    return result
+
 def convert_amount(amount, target_currency, date):
     """Returns ``amount`` converted to ``target_currency`` using ``date`` exchange rates.
 
@@ -244,6 +213,28 @@ def convert_amount(amount, target_currency, date):
     exchange_rate = currency.value_in(target_currency, date)
     return Amount(amount.value * exchange_rate, target_currency)
 
+def convert_amounts(amounts, target_currency, dates):
+    """Batch version of :func:`convert_amount`.
+
+    Returns a list of ``amounts`` converted to ``target_currency``, each with the exchange rate of
+    its corresponding date in ``dates``. Rates are fetched in one :meth:`.Currency.values_in` call
+    per source currency.
+
+    :param amounts: list of :class:`Amount`
+    :param target_currency: :class:`.Currency`
+    :param dates: list of ``datetime.date``, same length as ``amounts``.
+    """
+    result = list(amounts)
+    currency2indexes = defaultdict(list)
+    for index, amount in enumerate(amounts):
+        if amount and amount.currency != target_currency:
+            currency2indexes[amount.currency].append(index)
+    for currency, indexes in currency2indexes.items():
+        exchange_rates = currency.values_in(target_currency, [dates[i] for i in indexes])
+        for index, exchange_rate in zip(indexes, exchange_rates):
+            result[index] = Amount(amounts[index].value * exchange_rate, target_currency)
+    return result
+
 def prorate_amount(amount, spread_over_range, wanted_range):
     """Returns the prorated part of ``amount`` spread over ``spread_over_range`` for the ``wanted_range``.
 
@@ -6,10 +6,9 @@
 # which should be included with this package. The terms are also available at 
 # http://www.gnu.org/licenses/gpl-3.0.html
 
+from bisect import bisect_left, bisect_right
 from datetime import date
 
-from hscommon.util import extract
-
 from .amount import prorate_amount
 from .date import DateRange, ONE_DAY
 from .recurrence import Recurrence, Spawn, DateCounter, RepeatType
@@ -20,6 +19,7 @@ class BudgetSpawn(Spawn):
 
     The only difference with a normal spawn is that its ``is_budget`` attribute is true.
     """
+    __slots__ = []
     is_budget = True
 
 class Budget(Recurrence):
@@ -75,7 +75,8 @@ class Budget(Recurrence):
         Works pretty much like :meth:`core.model.recurrence.Recurrence.get_spawns`, except for the
         extra arguments.
 
-        :param transactions: Transactions that can affect our budget spawns' final amount.
+        :param transactions: Transactions that affect :attr:`account` and can thus affect our
+                             budget spawns' final amount, sorted by date.
         :type transactions: list of :class:`.Transaction`
         :param consumedtxns: Transactions that have already been "consumed" by a budget spawn in
                              this current round of spawning (one a budget "ate" a transaction, we
@@ -84,17 +85,18 @@ class Budget(Recurrence):
                              set and pass it around for each call.
         :type consumedtxns: set of :class:`.Transaction`
         """
-        spawns = Recurrence.get_spawns(self, end)
         # No spawn in the past
-        spawns = [spawn for spawn in spawns if spawn.date > date.today()]
+        spawns = Recurrence.get_spawns(self, end, start=date.today() + ONE_DAY)
         account = self.account
         budget_amount = self.amount if account.is_debit_account() else -self.amount
-        relevant_transactions = set(t for t in transactions if account in t.affected_accounts())
-        relevant_transactions -= consumedtxns
+        # Because `transactions` is sorted, the transactions affecting a spawn are a slice of it
+        # which we find by bisecting. Spawn periods don't overlap, so we go through each
+        # transaction only once.
+        dates = [t.date for t in transactions]
         for spawn in spawns:
-            affects_spawn = lambda t: spawn.recurrence_date <= t.date <= spawn.date
-            wheat, shaft = extract(affects_spawn, relevant_transactions)
-            relevant_transactions = shaft
+            start = bisect_left(dates, spawn.recurrence_date)
+            stop = bisect_right(dates, spawn.date, lo=start)
+            wheat = [t for t in transactions[start:stop] if t not in consumedtxns]
             txns_amount = sum(t.amount_for_account(account, budget_amount.currency) for t in wheat)
             if abs(txns_amount) < abs(budget_amount):
                 spawn_amount = budget_amount - txns_amount
@@ -103,7 +105,7 @@ class Budget(Recurrence):
                     spawn.set_splits([Split(spawn, account, spawn_amount), Split(spawn, self.target, -spawn_amount)])
             else:
                 spawn.set_splits([])
-            consumedtxns |= set(wheat)
+            consumedtxns.update(wheat)
         self._previous_spawns = spawns
         return spawns
     
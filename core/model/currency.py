@@ -11,6 +11,8 @@ easily figure out their exchange value.
 """
 
 import os
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import datetime, date, timedelta
 import logging
 import sqlite3 as sqlite
@@ -140,6 +142,29 @@ class Currency:
         else:
             return self.get_rates_db().get_rate(date, self.code, currency.code)
 
+    def rate_change_dates(self, currency, date_start, date_end):
+        """Returns the sorted dates in ``date_start``-``date_end`` at which :meth:`value_in` might
+        return something different than for the previous date.
+        """
+        result = set(self.get_rates_db().get_rate_change_dates(date_start, date_end, self.code, currency.code))
+        limits = [self.start_date]
+        if self.stop_date is not None:
+            limits.append(self.stop_date + timedelta(1))
+        result.update(d for d in limits if d is not None and date_start <= d <= date_end)
+        return sorted(result)
+
+    def values_in(self, currency, dates):
+        """Batch version of :meth:`value_in`. Returns a list of values, one for each of ``dates``.
+        """
+        result = self.get_rates_db().get_rates(dates, self.code, currency.code)
+        if self.start_date is not None or self.stop_date is not None:
+            for index, d in enumerate(dates):
+                if self.start_date is not None and d < self.start_date:
+                    result[index] = self.start_rate
+                elif self.stop_date is not None and d > self.stop_date:
+                    result[index] = self.latest_rate
+        return result
+
     def set_CAD_value(self, value, date):
         """Sets the currency's value in CAD on the given date."""
         self.get_rates_db().set_CAD_value(date, self.code, value)
@@ -159,14 +184,22 @@ CAD = Currency.register('CAD', 'Canadian dollar', latest_rate=1)
 def date2str(date):
     return '%d%02d%02d' % (date.year, date.month, date.day)
 
+def str2date(s):
+    return date(int(s[:4]), int(s[4:6]), int(s[6:8]))
+
 class RatesDB:
     """Stores exchange rates for currencies.
 
     The currencies are identified with ISO 4217 code (USD, CAD, EUR, etc.).
     The rates are represented as float and represent the value of the currency in CAD.
+
+    Rates lookups are answered from memory. The first time a currency is looked up, all its rates
+    are loaded in two sorted arrays (date ordinals and CAD values). Lookups are then bisections in
+    those arrays. Writes are merged in these arrays rather than invalidating them.
     """
     def __init__(self, db_or_path=':memory:', async=True):
-        self._cache = {} # {(date, currency): CAD value
+        self._cache = {} # {currency: (array of date ordinals, array of CAD values)}
+        self._generation = 0
         self.db_or_path = db_or_path
         if isinstance(db_or_path, str):
             self.con = sqlite.connect(str(db_or_path))
@@ -178,7 +211,7 @@ class RatesDB:
         self._fetched_values = Queue()
         self._fetched_ranges = {} # a currency --> (start, end) map
 
-    def _execute(self, *args, **kwargs):
+    def _execute_with_recovery(self, method_name, *args, **kwargs):
         def create_tables():
             # date is stored as a TEXT YYYYMMDD
             sql = "create table rates(date TEXT, currency TEXT, rate REAL NOT NULL)"
@@ -187,7 +220,7 @@ class RatesDB:
             self.con.execute(sql)
 
         try:
-            return self.con.execute(*args, **kwargs)
+            return getattr(self.con, method_name)(*args, **kwargs)
         except sqlite.OperationalError: # new db, or other problems
             try:
                 create_tables()
@@ -204,20 +237,72 @@ class RatesDB:
             else:
                 self.con = sqlite.connect(':memory:')
             create_tables()
-        return self.con.execute(*args, **kwargs) # try again
+        return getattr(self.con, method_name)(*args, **kwargs) # try again
+
+    def _execute(self, *args, **kwargs):
+        return self._execute_with_recovery('execute', *args, **kwargs)
+
+    def _executemany(self, *args, **kwargs):
+        return self._execute_with_recovery('executemany', *args, **kwargs)
 
-    def _seek_value_in_CAD(self, str_date, currency_code):
+    def _get_rates_arrays(self, currency_code):
+        try:
+            return self._cache[currency_code]
+        except KeyError:
+            sql = "select date, rate from rates where currency = ? order by date"
+            cur = self._execute(sql, [currency_code])
+            ordinals = array('l')
+            values = array('d')
+            for str_date, rate in cur:
+                ordinals.append(str2date(str_date).toordinal())
+                values.append(rate)
+            result = (ordinals, values)
+            self._cache[currency_code] = result
+            return result
+
+    def _merge_rates(self, currency_code, date_and_values):
+        # Merges newly written rates in our in-memory arrays, if they're loaded.
+        if currency_code not in self._cache:
+            return
+        ordinals, values = self._cache[currency_code]
+        if len(date_and_values) == 1:
+            [(date, value)] = date_and_values
+            ordinal = date.toordinal()
+            index = bisect_left(ordinals, ordinal)
+            if index < len(ordinals) and ordinals[index] == ordinal:
+                values[index] = value
+            else:
+                ordinals.insert(index, ordinal)
+                values.insert(index, value)
+        else:
+            ordinal2value = dict(zip(ordinals, values))
+            ordinal2value.update((date.toordinal(), value) for date, value in date_and_values)
+            merged = sorted(ordinal2value.items())
+            ordinals = array('l', (ordinal for ordinal, _ in merged))
+            values = array('d', (value for _, value in merged))
+            self._cache[currency_code] = (ordinals, values)
+
+    def _value_in_CAD(self, date, currency_code):
+        # We use the rate of the nearest previous date or, if there's none, the nearest next date.
         if currency_code == 'CAD':
             return 1
+        ordinals, values = self._get_rates_arrays(currency_code)
+        if not ordinals:
+            return Currency(currency_code).latest_rate
+        index = bisect_right(ordinals, date.toordinal()) - 1
+        return values[max(index, 0)]
 
-        def seek(date_op, desc):
-            sql = "select rate from rates where date %s ? and currency = ? order by date %s limit 1" % (date_op, desc)
-            cur = self._execute(sql, [str_date, currency_code])
-            row = cur.fetchone()
-            if row:
-                return row[0]
-
-        return seek('<=', 'desc') or seek('>=', '') or Currency(currency_code).latest_rate
+    def _values_in_CAD(self, dates, currency_code):
+        if currency_code == 'CAD':
+            return [1] * len(dates)
+        ordinals, values = self._get_rates_arrays(currency_code)
+        if not ordinals:
+            return [Currency(currency_code).latest_rate] * len(dates)
+        result = []
+        for d in dates:
+            index = bisect_right(ordinals, d.toordinal()) - 1
+            result.append(values[max(index, 0)])
+        return result
 
     def _ensure_filled(self, date_start, date_end, currency_code):
         """Make sure that the cache contains *something* for each of the dates in the range.
@@ -230,25 +315,29 @@ class RatesDB:
         # provider gives it to us.
         if date_end >= date.today():
             date_end = date.today() - timedelta(1)
-        sql = "select rate from rates where date = ? and currency = ?"
-        for curdate in iterdaterange(date_start, date_end):
-            cur = self._execute(sql, [date2str(curdate), currency_code])
-            if cur.fetchone() is None:
-                nearby_rate = self._seek_value_in_CAD(date2str(curdate), currency_code)
-                self.set_CAD_value(curdate, currency_code, nearby_rate)
-                logging.debug("Filled currency void for %s at %s (value: %2.2f)", currency_code, curdate, nearby_rate)
+        sql = "select date from rates where currency = ? and date >= ? and date <= ?"
+        cur = self._execute(sql, [currency_code, date2str(date_start), date2str(date_end)])
+        existing = {row[0] for row in cur}
+        # Because we fill our voids with the nearest previous rate, _value_in_CAD() gives us the
+        # same result as if we had filled the voids one at a time.
+        to_fill = [
+            (curdate, self._value_in_CAD(curdate, currency_code))
+            for curdate in iterdaterange(date_start, date_end)
+            if date2str(curdate) not in existing
+        ]
+        if to_fill:
+            self.set_CAD_values(currency_code, to_fill)
+            logging.debug("Filled %d currency voids for %s", len(to_fill), currency_code)
 
     def _save_fetched_rates(self):
         while True:
             try:
                 rates, currency, fetch_start, fetch_end = self._fetched_values.get_nowait()
                 logging.debug("Saving %d rates for the currency %s", len(rates), currency)
-                for rate_date, rate in rates:
-                    if not rate:
-                        logging.debug("Empty rate for %s. Skipping", rate_date)
-                        continue
-                    logging.debug("Saving rate %2.2f for %s", rate, rate_date)
-                    self.set_CAD_value(rate_date, currency, rate)
+                valid_rates = [(rate_date, rate) for rate_date, rate in rates if rate]
+                if len(valid_rates) < len(rates):
+                    logging.debug("Skipped %d empty rates", len(rates) - len(valid_rates))
+                self.set_CAD_values(currency, valid_rates)
                 self._ensure_filled(fetch_start, fetch_end, currency)
                 logging.debug("Finished saving rates for currency %s", currency)
             except Empty:
@@ -256,6 +345,17 @@ class RatesDB:
 
     def clear_cache(self):
         self._cache = {}
+        self._generation += 1
+
+    @property
+    def generation(self):
+        """Number that changes whenever rates in the DB change.
+
+        Rates that were fetched but not saved yet are saved first, so that they count as a change.
+        """
+        if not self._fetched_values.empty():
+            self._save_fetched_rates()
+        return self._generation
 
     def date_range(self, currency_code):
         """Returns (start, end) of the cached rates for currency.
@@ -284,35 +384,56 @@ class RatesDB:
         if not self._fetched_values.empty():
             self._save_fetched_rates()
         # This method is a bottleneck and has been optimized for speed.
-        value1 = None
-        value2 = None
-        if currency1_code == 'CAD':
-            value1 = 1
-        else:
-            value1 = self._cache.get((date, currency1_code))
-        if currency2_code == 'CAD':
-            value2 = 1
-        else:
-            value2 = self._cache.get((date, currency2_code))
-        if value1 is None or value2 is None:
-            str_date = date2str(date)
-            if value1 is None:
-                value1 = self._seek_value_in_CAD(str_date, currency1_code)
-                self._cache[(date, currency1_code)] = value1
-            if value2 is None:
-                value2 = self._seek_value_in_CAD(str_date, currency2_code)
-                self._cache[(date, currency2_code)] = value2
+        value1 = self._value_in_CAD(date, currency1_code)
+        value2 = self._value_in_CAD(date, currency2_code)
         return value1 / value2
 
+    def get_rate_change_dates(self, date_start, date_end, currency1_code, currency2_code):
+        """Returns the sorted dates in ``date_start``-``date_end`` at which :meth:`get_rate` might
+        return something different than for the previous date.
+        """
+        if not self._fetched_values.empty():
+            self._save_fetched_rates()
+        start = date_start.toordinal()
+        end = date_end.toordinal()
+        result = set()
+        for currency_code in (currency1_code, currency2_code):
+            if currency_code == 'CAD':
+                continue
+            ordinals, _ = self._get_rates_arrays(currency_code)
+            # The first rate is also used for dates preceding it, so it's not a change.
+            start_index = max(bisect_left(ordinals, start), 1)
+            end_index = bisect_right(ordinals, end)
+            result.update(ordinals[start_index:end_index])
+        return [date.fromordinal(ordinal) for ordinal in sorted(result)]
+
+    def get_rates(self, dates, currency1_code, currency2_code):
+        """Batch version of :meth:`get_rate`. Returns a list of rates, one for each of ``dates``.
+        """
+        if not self._fetched_values.empty():
+            self._save_fetched_rates()
+        values1 = self._values_in_CAD(dates, currency1_code)
+        values2 = self._values_in_CAD(dates, currency2_code)
+        return [value1 / value2 for value1, value2 in zip(values1, values2)]
+
     def set_CAD_value(self, date, currency_code, value):
         """Sets the daily value in CAD for currency at date"""
-        # we must clear the whole cache because there might be other dates affected by this change
-        # (dates when the currency server has no rates).
-        self.clear_cache()
-        str_date = date2str(date)
+        self.set_CAD_values(currency_code, [(date, value)])
+
+    def set_CAD_values(self, currency_code, date_and_values):
+        """Sets daily values in CAD for currency in bulk.
+
+        ``date_and_values`` is a list of ``(date, value)`` tuples. All values are written in a
+        single transaction.
+        """
+        if not date_and_values:
+            return
         sql = "replace into rates(date, currency, rate) values(?, ?, ?)"
-        self._execute(sql, [str_date, currency_code, value])
+        rows = [(date2str(date), currency_code, value) for date, value in date_and_values]
+        self._executemany(sql, rows)
         self.con.commit()
+        self._merge_rates(currency_code, date_and_values)
+        self._generation += 1
 
     def register_rate_provider(self, rate_provider):
         """Adds `rate_provider` to the list of providers supported by this DB.
@@ -11,7 +11,6 @@ import datetime
 from collections import defaultdict, Sequence
 from itertools import takewhile
 
-from hscommon.util import flatten
 from .amount import convert_amount, same_currency
 
 class Entry:
@@ -26,7 +25,11 @@ class Entry:
     All initialization arguments are directly assigned to their relevant attributes in the entry.
     Most entries are created by the :class:`.Oven`, which does the necessary calculations to compute
     running total information that the entry needs on init.
+
+    Entries are re-created for every split of every account on each cook, so we use ``__slots__``.
     """
+    __slots__ = ['split', 'amount', 'balance', 'reconciled_balance', 'balance_with_budget', 'index']
+
     def __init__(self, split, amount, balance, reconciled_balance, balance_with_budget):
         #: The :class:`.Split` our entry wraps.
         self.split = split
@@ -167,9 +170,13 @@ class EntryList(Sequence):
         self._entries = []
         self._date2entries = defaultdict(list)
         self._sorted_entry_dates = []
-        # the key for this dict is (date_range, currency)
-        self._daterange2cashflow = {}
+        # currency -> list of cumulative cash flows. The Nth element is the sum of all (converted)
+        # non-budget entry amounts at dates preceding _sorted_entry_dates[N]. Computed lazily.
+        self._currency2cashflowsums = {}
         self._last_reconciled = None
+        #: ``int``. Incremented whenever entries are added or removed. This allows things computed
+        #: from our entries to be cached until the next time our account is cooked.
+        self.generation = 0
 
     def __getitem__(self, key):
         return self._entries.__getitem__(key)
@@ -189,12 +196,24 @@ class EntryList(Sequence):
         else:
             return 0
 
+    def _cash_flow_sums(self, currency):
+        sums = self._currency2cashflowsums.setdefault(currency, [0])
+        dates = self._sorted_entry_dates
+        for date in dates[len(sums)-1:]:
+            entries = self._date2entries[date]
+            entries = (e for e in entries if not getattr(e.transaction, 'is_budget', False))
+            amounts = (convert_amount(e.amount, currency, e.date) for e in entries)
+            sums.append(sums[-1] + sum(amounts))
+        return sums
+
     def _cash_flow(self, date_range, currency):
-        cache = self._date2entries
-        entries = flatten(cache[date] for date in date_range if date in cache)
-        entries = (e for e in entries if not getattr(e.transaction, 'is_budget', False))
-        amounts = (convert_amount(e.amount, currency, e.date) for e in entries)
-        return sum(amounts)
+        dates = self._sorted_entry_dates
+        start_index = bisect.bisect_left(dates, date_range.start)
+        end_index = bisect.bisect_right(dates, date_range.end)
+        if start_index >= end_index:
+            return 0
+        sums = self._cash_flow_sums(currency)
+        return sums[end_index] - sums[start_index]
 
     # --- Public
     def add_entry(self, entry):
@@ -205,10 +224,15 @@ class EntryList(Sequence):
         """
         entry.index = len(self)
         self._entries.append(entry)
+        self.generation += 1
         date = entry.date
         self._date2entries[date].append(entry)
         if not self._sorted_entry_dates or self._sorted_entry_dates[-1] < date:
             self._sorted_entry_dates.append(date)
+        # The cumulative sum *after* our date is no longer valid.
+        index = len(self._sorted_entry_dates)
+        for sums in self._currency2cashflowsums.values():
+            del sums[index:]
         if (self._last_reconciled is None) or (entry.reconciliation_key >= self._last_reconciled.reconciliation_key):
             self._last_reconciled = entry
 
@@ -243,14 +267,34 @@ class EntryList(Sequence):
         :param currency: :class:`.Currency`
         """
         currency = currency or self.account.currency
-        cache_key = (date_range, currency)
-        if cache_key not in self._daterange2cashflow:
-            cash_flow = self._cash_flow(date_range, currency)
-            self._daterange2cashflow[cache_key] = cash_flow
-        return self._daterange2cashflow[cache_key]
+        return self._cash_flow(date_range, currency)
+
+    def cash_flows(self, date_ranges, currency=None):
+        """Batch version of :meth:`cash_flow`. Returns a list of cash flows, one per date range.
+
+        ``date_ranges`` have to be sorted and not to overlap, which allows us to go through our
+        entries only once.
+
+        :param date_ranges: list of :class:`.DateRange`
+        :param currency: :class:`.Currency`
+        """
+        currency = currency or self.account.currency
+        dates = self._sorted_entry_dates
+        if not dates:
+            return [0] * len(date_ranges)
+        sums = self._cash_flow_sums(currency)
+        result = []
+        index = 0
+        for date_range in date_ranges:
+            start_index = bisect.bisect_left(dates, date_range.start, index)
+            end_index = bisect.bisect_right(dates, date_range.end, start_index)
+            result.append(sums[end_index] - sums[start_index] if start_index < end_index else 0)
+            index = end_index
+        return result
 
     def clear(self, from_date):
         """Remove all entries from ``from_date``."""
+        self.generation += 1
         if from_date is None:
             self._entries = []
         else:
@@ -259,17 +303,34 @@ class EntryList(Sequence):
             index = bisect.bisect_left(self._sorted_entry_dates, from_date)
             for date in self._sorted_entry_dates[index:]:
                 del self._date2entries[date]
-            for date_range, currency in list(self._daterange2cashflow.keys()):
-                if date_range.end >= from_date:
-                    del self._daterange2cashflow[(date_range, currency)]
+            for sums in self._currency2cashflowsums.values():
+                del sums[index+1:]
             del self._sorted_entry_dates[index:]
             self._last_reconciled = max(self._entries, key=lambda e: e.reconciliation_key)
         else:
             self._date2entries = defaultdict(list)
-            self._daterange2cashflow = {}
+            self._currency2cashflowsums = {}
             self._sorted_entry_dates = []
             self._last_reconciled = None
 
+    def entries_in_range(self, date_range):
+        """Returns the entries, in order, occurring in ``date_range``."""
+        dates = self._sorted_entry_dates
+        start_index = bisect.bisect_left(dates, date_range.start)
+        end_index = bisect.bisect_right(dates, date_range.end)
+        if start_index >= end_index:
+            return []
+        first = self._date2entries[dates[start_index]][0].index
+        last = self._date2entries[dates[end_index-1]][-1].index
+        return self._entries[first:last+1]
+
+    def entry_dates(self, date_range):
+        """Returns the sorted dates, in ``date_range``, at which we have entries."""
+        dates = self._sorted_entry_dates
+        start_index = bisect.bisect_left(dates, date_range.start)
+        end_index = bisect.bisect_right(dates, date_range.end)
+        return dates[start_index:end_index]
+
     def last_entry(self, date=None):
         """Return the last entry with a date that isn't after ``date``.
 
@@ -303,3 +364,7 @@ class EntryList(Sequence):
         cash_flow = self.cash_flow(date_range, currency)
         return self.account.normalize_amount(cash_flow)
 
+    def normal_cash_flows(self, date_ranges, currency=None):
+        """Returns :meth:`normalized <.Account.normalize_amount>` :meth:`cash_flows`."""
+        cash_flows = self.cash_flows(date_ranges, currency)
+        return [self.account.normalize_amount(cash_flow) for cash_flow in cash_flows]
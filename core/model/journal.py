@@ -0,0 +1,326 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+import datetime
+import json
+import logging
+from operator import attrgetter
+
+from .account import Account, Group
+from .amount import format_amount, parse_amount
+from .budget import Budget
+from .currency import Currency
+from .recurrence import Recurrence, Spawn
+from .transaction import Transaction, Split
+
+JOURNAL_VERSION = 1
+
+def _date2ordinal(date):
+    return date.toordinal() if date is not None else None
+
+def _ordinal2date(ordinal):
+    return datetime.date.fromordinal(ordinal) if ordinal is not None else None
+
+def _snapshot_order(transactions):
+    # Our snapshots are native files and the native loader sorts transactions by date (keeping file
+    # order for transactions of the same date), so this is the order in which transactions end up
+    # after we load a snapshot.
+    return sorted(transactions, key=attrgetter('date'))
+
+class Journal:
+    """Appends changes made to a document to a file that complements a full snapshot of it.
+
+    This allows autosaves to cost something proportional to the number of changes made since the
+    last autosave instead of something proportional to the size of the document.
+
+    Transactions are the only thing that can be numerous in a document, so they're the only thing
+    for which we record changes. Everything else (accounts, groups, schedules, budgets and
+    properties) is fully written in each record.
+
+    To be able to tell which transaction (or account, because transactions refer to them) is
+    affected by a record, we give them journal ids (``jid``). When we :meth:`start` a journal, those
+    ids follow the order in which the snapshot's loader will load its instances. That's what allows
+    :meth:`replay` to find back instances after the snapshot has been loaded.
+
+    Like the :class:`.Undoer`, we hold references to a document's collections rather than to the
+    document itself.
+    """
+    def __init__(self, accounts, groups, transactions, schedules, budgets, properties):
+        self._accounts = accounts
+        self._groups = groups
+        self._transactions = transactions
+        self._schedules = schedules
+        self._budgets = budgets
+        self._properties = properties
+        self.reset()
+
+    # --- Private
+    def _assign_jids(self):
+        self._account2jid = {}
+        self._txn2jid = {}
+        self._next_jid = 0
+        for account in self._accounts:
+            self._account_jid(account)
+        for txn in _snapshot_order(self._transactions):
+            self._txn_jid(txn)
+
+    def _account_jid(self, account):
+        if account is None:
+            return None
+        try:
+            return self._account2jid[account]
+        except KeyError:
+            self._next_jid += 1
+            self._account2jid[account] = self._next_jid
+            return self._next_jid
+
+    def _txn_jid(self, txn):
+        try:
+            return self._txn2jid[txn]
+        except KeyError:
+            self._next_jid += 1
+            self._txn2jid[txn] = self._next_jid
+            return self._next_jid
+
+    def _account_state(self, account):
+        return [
+            self._account_jid(account), account.name, account.currency.code, account.type,
+            account.group.name if account.group else None, account.reference,
+            account.account_number, account.inactive, account.notes,
+        ]
+
+    def _txn_state(self, txn):
+        splits = [
+            [
+                self._account_jid(split.account), format_amount(split.amount), split.memo,
+                split.reference, _date2ordinal(split.reconciliation_date)
+            ]
+            for split in txn.splits
+        ]
+        return [
+            _date2ordinal(txn.date), txn.description, txn.payee, txn.checkno, txn.notes,
+            txn.position, txn.mtime, splits,
+        ]
+
+    def _schedule_state(self, schedule):
+        return [
+            schedule.repeat_type, schedule.repeat_every, _date2ordinal(schedule.stop_date),
+            self._txn_state(schedule.ref),
+            [[_date2ordinal(date), self._txn_state(txn)] for date, txn in schedule.date2globalchange.items()],
+            [
+                [_date2ordinal(date), self._txn_state(txn) if txn is not None else None]
+                for date, txn in schedule.date2exception.items()
+            ],
+        ]
+
+    def _budget_state(self, budget):
+        return [
+            self._account_jid(budget.account), self._account_jid(budget.target), budget.repeat_type,
+            budget.repeat_every, format_amount(budget.amount), budget.notes,
+            _date2ordinal(budget.start_date), _date2ordinal(budget.stop_date),
+        ]
+
+    def _small_state(self):
+        properties = dict(self._properties)
+        properties['default_currency'] = properties['default_currency'].code
+        return {
+            'properties': properties,
+            'groups': [[g.name, g.type] for g in self._groups],
+            'accounts': [self._account_state(a) for a in self._accounts],
+            'schedules': [self._schedule_state(s) for s in self._schedules if s.is_alive],
+            'budgets': [self._budget_state(b) for b in self._budgets],
+        }
+
+    def _apply(self, record, jid2account, jid2txn):
+        def parse(amount, currency):
+            return parse_amount(amount, currency, with_expression=False, strict_currency=True)
+
+        def make_txn(state, txn=None):
+            date, description, payee, checkno, notes, position, mtime, splits = state
+            if txn is None:
+                txn = Transaction(_ordinal2date(date))
+            else:
+                txn.date = _ordinal2date(date)
+            txn.description = description
+            txn.payee = payee
+            txn.checkno = checkno
+            txn.notes = notes
+            txn.position = position
+            txn.mtime = mtime
+            txn.splits = []
+            for account_jid, amount, memo, reference, reconciliation_date in splits:
+                account = jid2account.get(account_jid)
+                currency = account.currency if account is not None else self._accounts.default_currency
+                split = Split(txn, account, parse(amount, currency))
+                split.memo = memo
+                split.reference = reference
+                split.reconciliation_date = _ordinal2date(reconciliation_date)
+                txn.splits.append(split)
+            return txn
+
+        properties = record['properties']
+        properties['default_currency'] = Currency(properties['default_currency'])
+        self._properties.update(properties)
+        self._accounts.default_currency = self._properties['default_currency']
+        del self._groups[:]
+        for name, type in record['groups']:
+            self._groups.append(Group(name, type))
+        # We change accounts in place because untouched transactions refer to them.
+        seen = set()
+        for jid, name, currency, type, group, reference, number, inactive, notes in record['accounts']:
+            account = jid2account.get(jid)
+            if account is None:
+                account = Account(name, Currency(currency), type)
+                jid2account[jid] = account
+                self._accounts.add(account)
+            account.name = name
+            account.currency = Currency(currency)
+            account.type = type
+            account.group = self._groups.find(group, type) if group is not None else None
+            account.reference = reference
+            account.account_number = number
+            account.inactive = inactive
+            account.notes = notes
+            seen.add(jid)
+        self._accounts.clear_cache()
+        for jid in set(jid2account) - seen:
+            account = jid2account.pop(jid)
+            if account in self._accounts:
+                self._accounts.remove(account)
+        for jid, state in record['transactions']:
+            txn = jid2txn.get(jid)
+            if state is None:
+                if txn is not None:
+                    self._transactions.remove(txn)
+                    del jid2txn[jid]
+            elif txn is None:
+                jid2txn[jid] = txn = make_txn(state)
+                self._transactions.add(txn, keep_position=True)
+            else:
+                make_txn(state, txn)
+        self._transactions.clear_cache()
+        del self._schedules[:]
+        for type, every, stop_date, ref, changes, exceptions in record['schedules']:
+            recurrence = Recurrence(make_txn(ref), type, every)
+            recurrence.stop_date = _ordinal2date(stop_date)
+            for date, state in exceptions:
+                date = _ordinal2date(date)
+                if state is not None:
+                    exception = make_txn(state)
+                    recurrence.date2exception[date] = Spawn(recurrence, exception, date, exception.date)
+                else:
+                    recurrence.delete_at(date)
+            for date, state in changes:
+                date = _ordinal2date(date)
+                change = make_txn(state)
+                recurrence.date2globalchange[date] = Spawn(recurrence, change, date, change.date)
+            self._schedules.append(recurrence)
+        del self._budgets[:]
+        budget_states = record['budgets']
+        for account, target, type, every, amount, notes, start_date, stop_date in budget_states:
+            account = jid2account[account]
+            budget = Budget(
+                account, jid2account.get(target), parse(amount, account.currency),
+                _ordinal2date(start_date), repeat_type=type
+            )
+            budget.repeat_every = every
+            budget.notes = notes
+            budget.stop_date = _ordinal2date(stop_date)
+            self._budgets.append(budget)
+
+    # --- Public
+    def append(self, touched_transactions):
+        """Appends a record of the changes to our journal.
+
+        ``touched_transactions`` are transactions that might have changed since the last record
+        (from :meth:`.Undoer.pop_touched_transactions`). Those that aren't in the document anymore
+        are recorded as deleted.
+
+        Returns whether something was written. If nothing changed, we don't write anything.
+        """
+        assert self.path is not None
+        txn_states = []
+        if touched_transactions:
+            present = set(self._transactions)
+            for txn in touched_transactions:
+                if txn in present:
+                    txn_states.append([self._txn_jid(txn), self._txn_state(txn)])
+                elif txn in self._txn2jid:
+                    txn_states.append([self._txn2jid.pop(txn), None])
+        small_state = self._small_state()
+        if not txn_states and small_state == self._last_small_state:
+            return False
+        self._last_small_state = small_state
+        record = dict(small_state, transactions=txn_states)
+        with open(self.path, 'at', encoding='utf-8') as fp:
+            fp.write(json.dumps(record) + '\n')
+        self.record_count += 1
+        return True
+
+    def reset(self):
+        """Stops journaling until the next :meth:`start`.
+
+        Call this whenever the document changes in ways that aren't recorded in the undoer (load,
+        clear, etc.).
+        """
+        self.path = None
+        self.record_count = 0
+        self._account2jid = {}
+        self._txn2jid = {}
+        self._last_small_state = None
+
+    def start(self, path):
+        """Starts a new journal at ``path`` for a snapshot of the document that was just saved."""
+        self.path = path
+        self.record_count = 0
+        self._assign_jids()
+        self._last_small_state = self._small_state()
+        header = {
+            'version': JOURNAL_VERSION,
+            'account_count': len(self._accounts),
+            'transaction_count': len(self._transactions),
+        }
+        with open(path, 'wt', encoding='utf-8') as fp:
+            fp.write(json.dumps(header) + '\n')
+
+    def replay(self, path):
+        """Replays the journal at ``path`` onto a document that has just loaded its snapshot.
+
+        Returns the number of records that were replayed. A record that was only partially written
+        (because we crashed during an autosave, for example) ends the replay.
+        """
+        try:
+            with open(path, 'rt', encoding='utf-8') as fp:
+                lines = fp.readlines()
+        except UnicodeDecodeError:
+            logging.warning("Journal %s isn't a moneyGuru journal", path)
+            return 0
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            header = None
+        if not isinstance(header, dict):
+            logging.warning("Invalid journal header in %s", path)
+            return 0
+        expected = (JOURNAL_VERSION, len(self._accounts), len(self._transactions))
+        found = (header.get('version'), header.get('account_count'), header.get('transaction_count'))
+        if found != expected:
+            logging.warning("Journal %s doesn't match its snapshot", path)
+            return 0
+        self._assign_jids()
+        jid2account = {jid: account for account, jid in self._account2jid.items()}
+        jid2txn = {jid: txn for txn, jid in self._txn2jid.items()}
+        count = 0
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logging.warning("Incomplete journal record in %s", path)
+                break
+            self._apply(record, jid2account, jid2txn)
+            count += 1
+        self.reset()
+        return count
@@ -6,17 +6,57 @@
 # which should be included with this package. The terms are also available at
 # http://www.gnu.org/licenses/gpl-3.0.html
 
+from array import array
 from collections import defaultdict
 from datetime import date
-from itertools import dropwhile
 from operator import attrgetter
 
 from hscommon.util import flatten
 
-from .amount import convert_amount
+from .account import AccountType
+from .amount import convert_amounts
 from .entry import Entry
 from .budget import BudgetSpawn
 
+class TransactionFlag:
+    """Bits of the classification mask computed for each cooked transaction.
+
+    See :attr:`Oven.transaction_flags`.
+
+    * ``Unassigned``: at least one split has no account.
+    * ``Income``: at least one split is in an income account.
+    * ``Expense``: at least one split is in an expense account.
+    * ``Transfer``: at least two splits are in balance sheet accounts.
+    * ``Reconciled``: at least one split is reconciled.
+    """
+    Unassigned = 1 << 0
+    Income = 1 << 1
+    Expense = 1 << 2
+    Transfer = 1 << 3
+    Reconciled = 1 << 4
+
+def transaction_flags(txn):
+    """Returns the :class:`TransactionFlag` mask of ``txn``."""
+    result = 0
+    balance_sheet_count = 0
+    for split in txn.splits:
+        account = split.account
+        if account is None:
+            result |= TransactionFlag.Unassigned
+        else:
+            account_type = account.type
+            if account_type == AccountType.Income:
+                result |= TransactionFlag.Income
+            elif account_type == AccountType.Expense:
+                result |= TransactionFlag.Expense
+            elif account_type in (AccountType.Asset, AccountType.Liability):
+                balance_sheet_count += 1
+        if split.reconciliation_date is not None:
+            result |= TransactionFlag.Reconciled
+    if balance_sheet_count >= 2:
+        result |= TransactionFlag.Transfer
+    return result
+
 class Oven:
     """Computes raw data from transactions, schedules, budgets.
 
@@ -37,25 +77,50 @@ class Oven:
         #: List of cooked transactions, containing :class:`.Transaction` instances mixed with
         #: schedule and budget :class:`.Spawn` instances (in date/position order).
         self.transactions = []
+        #: Array of :class:`TransactionFlag` masks, aligned with :attr:`transactions`. This allows
+        #: transaction filters to select transactions without going through their splits.
+        self.transaction_flags = array('B')
 
     def _budget_spawns(self, until_date, schedule_spawns):
-        if not self._budgets:
+        budgets = [b for b in self._budgets if b.amount]
+        if not budgets:
             return []
         result = []
-        ref_date = min(b.start_date for b in self._budgets)
-        relevant_txns = list(dropwhile(lambda t: t.date < ref_date, self._transactions)) + schedule_spawns
+        ref_date = min(b.start_date for b in budgets)
+        budget_accounts = {b.account for b in budgets}
+        # We group relevant transactions by budget account, in date order, in a single pass. Budgets
+        # then only have to look at the transactions of their own account.
+        account2txns = defaultdict(list)
+        for txns in (self._transactions, schedule_spawns):
+            for txn in txns:
+                if txn.date < ref_date:
+                    continue
+                for account in txn.affected_accounts() & budget_accounts:
+                    account2txns[account].append(txn)
+        if schedule_spawns:
+            # self._transactions is sorted, but spawns aren't.
+            for txns in account2txns.values():
+                txns.sort(key=attrgetter('date'))
         # It's possible to have 2 budgets overlapping in date range and having the same account
         # When it happens, we need to keep track of which budget "consume" which txns
         account2consumedtxns = defaultdict(set)
-        for budget in self._budgets:
-            if not budget.amount:
-                continue
+        for budget in budgets:
             consumedtxns = account2consumedtxns[budget.account]
+            relevant_txns = account2txns[budget.account]
             spawns = budget.get_spawns(until_date, relevant_txns, consumedtxns)
             spawns = [spawn for spawn in spawns if not spawn.is_null]
             result += spawns
         return result
 
+    def _expand_affected_accounts(self, accounts):
+        # Budget spawns have their splits re-created when the transactions of their account change,
+        # which means that their target account has to be re-cooked as well.
+        result = set(accounts)
+        for budget in self._budgets:
+            if budget.account in result and budget.target is not None:
+                result.add(budget.target)
+        return result
+
     def _cook_reconciliation_balances(self, splits, start_balance):
         balance = start_balance
         result = {} # split: reconciliation balance
@@ -78,9 +143,10 @@ class Oven:
         balance = entries.balance()
         balance_with_budget = entries.balance_with_budget()
         split2reconciledbal = self._cook_reconciliation_balances(splits, entries.balance_of_reconciled())
-        for split in splits:
-            amount = split.amount
-            converted_amount = convert_amount(amount, account.currency, split.transaction.date)
+        amounts = [split.amount for split in splits]
+        dates = [split.transaction.date for split in splits]
+        converted_amounts = convert_amounts(amounts, account.currency, dates)
+        for split, amount, converted_amount in zip(splits, amounts, converted_amounts):
             balance_with_budget += converted_amount
             if not isinstance(split.transaction, BudgetSpawn):
                 balance += converted_amount
@@ -98,7 +164,7 @@ class Oven:
         if until_date > self._cooked_until:
             self.cook(self._cooked_until, until_date)
 
-    def cook(self, from_date=None, until_date=None):
+    def cook(self, from_date=None, until_date=None, affected_accounts=None):
         """Cooks raw data into :attr:`transactions`.
 
         :param from_date: when set, saves calculation time by re-using existing cooked transactions.
@@ -107,31 +173,62 @@ class Oven:
                            cooking. If we don't, we might end up in an infinite loop. If not set,
                            will be the date of the transaction with the highest date.
         :type until_date: ``datetime.date``
+        :param affected_accounts: when set, only the entries of these accounts are re-cooked. The
+                                  entries of all other accounts are kept as-is. It's up to the
+                                  caller to make sure that these other accounts are really
+                                  unaffected by the changes that led to this cook. Affected accounts
+                                  are cooked up to where we cooked last time if it's further than
+                                  ``until_date``. We fall back to cooking all accounts when we have
+                                  to cook further than last time (new spawns could affect any
+                                  account).
+        :type affected_accounts: set of :class:`.Account`
         """
         # Determine from/until dates
         if from_date is None:
             from_date = date.min
+        self._transactions.sort(key=attrgetter('date', 'position')) # needed in case until_date is None
+        if until_date is None:
+            until_date = self._transactions[-1].date if self._transactions else from_date
+        if affected_accounts is not None:
+            if from_date == date.min or until_date > self._cooked_until:
+                affected_accounts = None
+            else:
+                # Unaffected accounts keep their entries up to where we cooked last time, so we
+                # cook affected accounts up to there too.
+                until_date = self._cooked_until
+                affected_accounts = self._expand_affected_accounts(affected_accounts)
+        if affected_accounts is None:
+            to_clear = self._accounts
         else:
+            to_clear = [a for a in self._accounts if a in affected_accounts]
+        if from_date > date.min:
             # it's possible that we have to reduce from_date a bit. If a split from before as a
             # reconciled date >= from_date, we have to set from_date to that split's normal date
             # We reverse the transactions to correctly detect chained overlappings in date/recdate
             splits = flatten(t.splits for t in reversed(self.transactions)) # splits from *cooked* txns
+            if affected_accounts is not None:
+                splits = (s for s in splits if s.account in affected_accounts)
             for split in splits:
                 rdate = split.reconciliation_date
                 if rdate is not None and rdate >= from_date:
                     from_date = min(from_date, split.transaction.date)
-        self._transactions.sort(key=attrgetter('date', 'position')) # needed in case until_date is None
-        if until_date is None:
-            until_date = self._transactions[-1].date if self._transactions else from_date
         # Clear old cooked data
-        for account in self._accounts:
+        for account in to_clear:
             account.entries.clear(from_date)
         if from_date == date.min:
             self.transactions = []
+            self.transaction_flags = array('B')
         else:
-            self.transactions = [t for t in self.transactions if t.date < from_date]
+            kept = [(t, f) for t, f in zip(self.transactions, self.transaction_flags) if t.date < from_date]
+            self.transactions = [t for t, f in kept]
+            self.transaction_flags = array('B', (f for t, f in kept))
         # Cook
-        spawns = flatten(recurrence.get_spawns(until_date) for recurrence in self._scheduled)
+        # We only need spawns that we're about to cook, except for budgets, which need schedule
+        # spawns from the start of the earliest budget.
+        spawn_start = from_date
+        if self._budgets:
+            spawn_start = min([spawn_start] + [b.start_date for b in self._budgets])
+        spawns = flatten(recurrence.get_spawns(until_date, start=spawn_start) for recurrence in self._scheduled)
         spawns += self._budget_spawns(until_date, spawns)
         # To ensure that our sort order stay correct and consistent, we assign position values
         # to our spawns. To ensure that there's no overlap, we start our position counter at
@@ -150,7 +247,8 @@ class Oven:
             if account is not None:
                 account2splits[account].append(split)
         for account, splits in account2splits.items():
-            self._cook_splits(account, splits)
+            if affected_accounts is None or account in affected_accounts:
+                self._cook_splits(account, splits)
         self.transactions += tocook
+        self.transaction_flags.extend(map(transaction_flags, tocook))
         self._cooked_until = until_date
-
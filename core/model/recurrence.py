@@ -8,6 +8,7 @@
 
 import copy
 import datetime
+from bisect import bisect_left, bisect_right
 from calendar import monthrange
 from itertools import chain
 
@@ -116,6 +117,8 @@ class Spawn(Transaction):
 
     Subclasses :class:`.Transaction`.
     """
+    __slots__ = ['recurrence_date', 'ref', 'recurrence']
+
     def __init__(self, recurrence, ref, recurrence_date, date=None):
         date = date or recurrence_date
         Transaction.__init__(self, date, ref.description, ref.payee, ref.checkno)
@@ -135,6 +138,68 @@ class Spawn(Transaction):
         self.balance()
 
 
+class SpawnHorizon:
+    """Spawns of a :class:`Recurrence`, walked up to a certain date.
+
+    Walking through the dates of a recurrence always starts at its start date, so without this, the
+    cost of :meth:`Recurrence.get_spawns` would grow with the age of the recurrence. We keep
+    where we stopped walking and only walk further when we're asked for spawns we don't have yet.
+
+    A horizon is only valid for the recurrence state it was created with (see :meth:`is_valid`).
+    """
+    def __init__(self, recurrence):
+        self.start_date = recurrence.start_date
+        self.repeat_type = recurrence.repeat_type
+        self.repeat_every = recurrence.repeat_every
+        self.stop_date = recurrence.stop_date
+        self.ref = recurrence.ref
+        self.date2exception = dict(recurrence.date2exception)
+        self.date2globalchange = dict(recurrence.date2globalchange)
+        self.date2instances = recurrence.date2instances
+        end = nonone(self.stop_date, datetime.date.max)
+        self._date_counter = DateCounter(self.start_date, self.repeat_type, self.repeat_every, end)
+        self._next_date = next(self._date_counter, None)
+        self._current_ref = self.ref
+        self._global_date_delta = datetime.timedelta(days=0)
+        #: Recurrence dates of :attr:`spawns`.
+        self.dates = []
+        #: Spawns walked so far, in recurrence date order.
+        self.spawns = []
+        #: Largest difference between a spawn's date and its recurrence date.
+        self.max_date_delta = datetime.timedelta(days=0)
+
+    def extend(self, recurrence, end):
+        """Walks through the dates of ``recurrence`` until ``end``."""
+        while self._next_date is not None and self._next_date <= end:
+            current_date = self._next_date
+            if current_date in self.date2globalchange:
+                self._current_ref = self.date2globalchange[current_date]
+                self._global_date_delta = self._current_ref.date - current_date
+            if current_date in self.date2exception:
+                spawn = self.date2exception[current_date]
+            else:
+                if current_date not in self.date2instances:
+                    spawn = recurrence._create_spawn(self._current_ref, current_date)
+                    if self._global_date_delta:
+                        # Only muck with spawn.date if we have a delta. otherwise we're breaking
+                        # budgets.
+                        spawn.date = current_date + self._global_date_delta
+                    self.date2instances[current_date] = spawn
+                spawn = self.date2instances[current_date]
+            if spawn is not None:
+                self.dates.append(current_date)
+                self.spawns.append(spawn)
+                self.max_date_delta = max(self.max_date_delta, spawn.date - current_date)
+            self._next_date = next(self._date_counter, None)
+
+    def is_valid(self, recurrence):
+        """Returns whether ``recurrence`` is still in the state we were created with."""
+        if self.date2instances is not recurrence.date2instances or self.ref is not recurrence.ref:
+            return False
+        attrs = ['start_date', 'repeat_type', 'repeat_every', 'stop_date', 'date2exception', 'date2globalchange']
+        return all(getattr(self, attr) == getattr(recurrence, attr) for attr in attrs)
+
+
 class Recurrence:
     """A recurring transaction (called "Schedule" in the app).
 
@@ -188,6 +253,7 @@ class Recurrence:
         self.date2globalchange = {}
         #: ``recurrent_date -> transaction`` mapping of spawns. Used as a cache. Frequently purged.
         self.date2instances = {}
+        self._horizon = None
         self.rtype2desc = {
             RepeatType.Daily: tr('Daily'),
             RepeatType.Weekly: tr('Weekly'),
@@ -282,7 +348,7 @@ class Recurrence:
         self.date2exception[date] = None
         self._update_ref()
 
-    def get_spawns(self, end):
+    def get_spawns(self, end, start=None):
         """Returns the list of transactions spawned by our recurrence.
 
         We start at :attr:`start_date` and end at ``end``. We have to specify an end to our spawning
@@ -296,7 +362,12 @@ class Recurrence:
         complicated. If the global date delta is negative enough, we can end up with a spawn that
         doesn't go far enough, so we must adjust our max date by this delta.
 
+        Spawns are kept in a :class:`SpawnHorizon` so that subsequent calls only have to spawn
+        what's beyond the last ``end`` we were called with.
+
         :param datetime.date end: When to stop spawning.
+        :param datetime.date start: If set, only spawns with a date higher or equal to it are
+                                    returned.
         :rtype: list of :class:`Spawn`
         """
         if self.date2exception:
@@ -307,28 +378,18 @@ class Recurrence:
                 end += -min_date_delta
         end = min(end, nonone(self.stop_date, datetime.date.max))
 
-        date_counter = DateCounter(self.start_date, self.repeat_type, self.repeat_every, end)
-        result = []
-        global_date_delta = datetime.timedelta(days=0)
-        current_ref = self.ref
-        for current_date in date_counter:
-            if current_date in self.date2globalchange:
-                current_ref = self.date2globalchange[current_date]
-                global_date_delta = current_ref.date - current_date
-            if current_date in self.date2exception:
-                exception = self.date2exception[current_date]
-                if exception is not None:
-                    result.append(exception)
-            else:
-                if current_date not in self.date2instances:
-                    spawn = self._create_spawn(current_ref, current_date)
-                    if global_date_delta:
-                        # Only muck with spawn.date if we have a delta. otherwise we're breaking
-                        # budgets.
-                        spawn.date = current_date + global_date_delta
-                    self.date2instances[current_date] = spawn
-                result.append(self.date2instances[current_date])
-        return result
+        horizon = self._horizon
+        if horizon is None or not horizon.is_valid(self):
+            horizon = self._horizon = SpawnHorizon(self)
+        horizon.extend(self, end)
+        stop = bisect_right(horizon.dates, end)
+        if start is None:
+            return horizon.spawns[:stop]
+        try:
+            first = bisect_left(horizon.dates, start - horizon.max_date_delta, hi=stop)
+        except OverflowError: # start is too close to date.min
+            first = 0
+        return [spawn for spawn in horizon.spawns[first:stop] if spawn.date >= start]
 
     def reassign_account(self, account, reassign_to=None):
         """Reassigns accounts for :attr:`ref` and all exceptions.
@@ -347,6 +408,7 @@ class Recurrence:
         result.date2exception = copy.copy(self.date2exception)
         result.date2globalchange = copy.copy(self.date2globalchange)
         result.date2instances = {}
+        result._horizon = None
         result.ref = self.ref.replicate()
         return result
 
@@ -358,6 +420,7 @@ class Recurrence:
     def reset_spawn_cache(self):
         """Empties :attr:`date2instances`."""
         self.date2instances = {}
+        self._horizon = None
 
     def stop_at(self, spawn):
         """Stop further spawning at ``spawn`` (sets :attr:`stop_date`)."""
@@ -10,6 +10,7 @@ import time
 from collections import defaultdict
 from copy import copy
 import datetime
+from sys import intern
 
 from hscommon.util import allsame, first, nonone, stripfalse
 
@@ -29,14 +30,19 @@ class Transaction:
     transaction, except for ``account`` and ``amount`` (there is no such attributes). If specified,
     we initialize what would otherwise be an empty split list with two splits: One adding ``amount``
     to ``account``, and the other adding ``-amount`` to ``None`` (an unassigned split).
+
+    There can be a lot of transactions in a document, so we use ``__slots__`` and we intern
+    descriptions and payees, which are often repeated.
     """
+    __slots__ = ['date', 'description', 'payee', 'checkno', 'notes', 'splits', 'position', 'mtime']
+
     def __init__(self, date, description=None, payee=None, checkno=None, account=None, amount=None):
         #: Date at which the transation occurs.
         self.date = date
         #: Description of the transaction.
-        self.description = nonone(description, '')
+        self.description = intern(nonone(description, ''))
         #: Person or entity related to the transaction.
-        self.payee = nonone(payee, '')
+        self.payee = intern(nonone(payee, ''))
         #: Check number related to the transaction.
         self.checkno = nonone(checkno, '')
         #: Freeform note about the transaction.
@@ -249,9 +255,9 @@ class Transaction:
                     split.reconciliation_date = None
             self.date = date
         if description is not NOEDIT:
-            self.description = description
+            self.description = intern(description)
         if payee is not NOEDIT:
-            self.payee = payee
+            self.payee = intern(payee)
         if checkno is not NOEDIT:
             self.checkno = checkno
         if notes is not NOEDIT:
@@ -387,7 +393,8 @@ class Transaction:
             if len(splits) < len(self.splits):
                 del self.splits[len(splits):]
             for split, newsplit in zip(self.splits, splits):
-                split.__dict__.update(newsplit.__dict__)
+                for attr in Split.__slots__:
+                    setattr(split, attr, getattr(newsplit, attr))
                 split.transaction = self
             for split in splits[len(self.splits):]:
                 split.transaction = self
@@ -480,6 +487,8 @@ class Transaction:
 
 class Split:
     """Assignment of money to an :class:`.Account` within a :class:`Transaction`."""
+    __slots__ = ['transaction', '_account', 'memo', '_amount', 'reconciliation_date', 'reference']
+
     def __init__(self, transaction, account, amount):
         #: Transaction within which our split lives.
         self.transaction = transaction
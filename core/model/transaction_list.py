@@ -4,8 +4,101 @@
 # which should be included with this package. The terms are also available at
 # http://www.gnu.org/licenses/gpl-3.0.html
 
+from collections import defaultdict
 from operator import itemgetter
 
+class SearchIndex:
+    """Index of the searchable values of transactions.
+
+    This is what allows :meth:`TransactionList.filter_matching` to avoid calling
+    :meth:`.Transaction.matches` on every transaction. Values are indexed in their lowercase form and
+    we keep, for each transaction, the keys under which it's indexed so that it can be removed or
+    re-indexed.
+
+    Descriptions, payees and memos are matched by substring, so we still have to go through all
+    *distinct* values for those, but there are usually much less of them than there are
+    transactions. Accounts are indexed by instance rather than by name so that renaming an account
+    doesn't require re-indexing.
+    """
+    FIELDS = ['description', 'payee', 'checkno', 'memo', 'account', 'amount']
+
+    def __init__(self, transactions=()):
+        self._field2index = {field: defaultdict(set) for field in self.FIELDS}
+        self._txn2keys = {}
+        for txn in transactions:
+            self.add(txn)
+
+    def __contains__(self, txn):
+        return txn in self._txn2keys
+
+    # --- Private
+    def _lookup_substring(self, field, query_value):
+        result = set()
+        for value, txns in self._field2index[field].items():
+            if query_value in value:
+                result |= txns
+        return result
+
+    # --- Public
+    def add(self, txn):
+        keys = [
+            ('description', txn.description.lower()),
+            ('payee', txn.payee.lower()),
+            ('checkno', txn.checkno.lower()),
+        ]
+        for split in txn.splits:
+            keys.append(('memo', split.memo.lower()))
+            if split.account is not None:
+                keys.append(('account', split.account))
+            keys.append(('amount', abs(split.amount.value) if split.amount else 0))
+        for field, key in keys:
+            self._field2index[field][key].add(txn)
+        self._txn2keys[txn] = keys
+
+    def remove(self, txn):
+        keys = self._txn2keys.pop(txn, None)
+        if keys is None:
+            return
+        for field, key in keys:
+            index = self._field2index[field]
+            txns = index[key]
+            txns.discard(txn)
+            if not txns:
+                del index[key]
+
+    def reindex(self, txn):
+        if txn in self._txn2keys:
+            self.remove(txn)
+            self.add(txn)
+
+    def search(self, query):
+        """Returns the set of indexed transactions matching ``query``.
+
+        Matching is the same as in :meth:`.Transaction.matches`.
+        """
+        result = set()
+        for field in ['description', 'payee', 'memo']:
+            query_value = query.get(field)
+            if query_value is not None:
+                result |= self._lookup_substring(field, query_value)
+        query_checkno = query.get('checkno')
+        if query_checkno is not None:
+            result |= self._field2index['checkno'].get(query_checkno, set())
+        query_amount = query.get('amount')
+        if query_amount is not None:
+            query_value = query_amount.value if query_amount else 0
+            result |= self._field2index['amount'].get(query_value, set())
+        query_account = query.get('account')
+        query_group = query.get('group')
+        if query_account is not None or query_group is not None:
+            for account, txns in self._field2index['account'].items():
+                if query_account is not None and account.name.lower() in query_account:
+                    result |= txns
+                elif query_group is not None and account.group and account.group.name.lower() in query_group:
+                    result |= txns
+        return result
+
+
 class TransactionList(list):
     """Manages the :class:`.Transaction` instances of a document.
 
@@ -14,18 +107,31 @@ class TransactionList(list):
     :attr:`.Document.transactions`.
 
     Subclasses ``list``.
+
+    We keep an index of our transactions by date (along with the highest position for each date) so
+    that adding and moving transactions doesn't require going through the whole list. Transaction
+    dates can be changed directly, so it's indexed under the date a transaction had when it was last
+    indexed. Like the search index, changed transactions are re-indexed in :meth:`clear_cache`.
     """
     def __init__(self, *args, **kwargs):
         list.__init__(self, *args, **kwargs)
         self._descriptions = None
         self._payees = None
         self._account_names = None
+        self._search_index = None
+        self._date2transactions = None
+        self._date2maxpos = None
+        self._txn2date = None
 
     # --- Overrides
     def remove(self, transaction):
         """Removes ``transaction`` from the list."""
         list.remove(self, transaction)
-        self.clear_cache()
+        if self._search_index is not None:
+            self._search_index.remove(transaction)
+        if self._date2transactions is not None:
+            self._unindex_date(transaction)
+        self.clear_cache(changed=[])
 
     # --- Private
     def _compute_completion_list(self, data_and_mtime):
@@ -50,6 +156,13 @@ class TransactionList(list):
 
         self._account_names = self._compute_completion_list(data_and_mtime_gen())
 
+    def _compute_date_index(self):
+        self._date2transactions = defaultdict(set)
+        self._date2maxpos = {}
+        self._txn2date = {}
+        for txn in self:
+            self._index_date(txn)
+
     def _compute_descriptions(self):
         data_and_mtime = ((t.description, t.mtime) for t in self)
         self._descriptions = self._compute_completion_list(data_and_mtime)
@@ -58,6 +171,38 @@ class TransactionList(list):
         data_and_mtime = ((t.payee, t.mtime) for t in self)
         self._payees = self._compute_completion_list(data_and_mtime)
 
+    def _ensure_date_index(self):
+        if self._date2transactions is None:
+            self._compute_date_index()
+
+    def _index_date(self, txn):
+        date = txn.date
+        self._date2transactions[date].add(txn)
+        self._txn2date[txn] = date
+        maxpos = self._date2maxpos.get(date)
+        if maxpos is None or txn.position > maxpos:
+            self._date2maxpos[date] = txn.position
+
+    def _reindex_date(self, txn):
+        if self._date2transactions is not None and txn in self._txn2date:
+            self._unindex_date(txn)
+            self._index_date(txn)
+
+    def _unindex_date(self, txn):
+        date = self._txn2date.pop(txn, None)
+        if date is None:
+            return
+        txns = self._date2transactions[date]
+        txns.discard(txn)
+        if txns:
+            self._update_maxpos(date)
+        else:
+            del self._date2transactions[date]
+            del self._date2maxpos[date]
+
+    def _update_maxpos(self, date):
+        self._date2maxpos[date] = max(t.position for t in self._date2transactions[date])
+
     # --- Public
     def add(self, transaction, keep_position=False, position=None):
         """Adds ``transaction`` to self
@@ -68,26 +213,56 @@ class TransactionList(list):
         if position is not None:
             transaction.position = position
         elif not keep_position:
-            transactions = self.transactions_at_date(transaction.date)
-            if transactions:
-                transaction.position = max(t.position for t in transactions) + 1
+            self._ensure_date_index()
+            maxpos = self._date2maxpos.get(transaction.date)
+            if maxpos is not None:
+                transaction.position = maxpos + 1
         self.append(transaction)
-        self.clear_cache()
+        if self._search_index is not None:
+            self._search_index.add(transaction)
+        if self._date2transactions is not None:
+            self._index_date(transaction)
+        self.clear_cache(changed=[])
 
     def clear(self):
         """Clears the list of all transactions."""
         del self[:]
         self.clear_cache()
 
-    def clear_cache(self):
+    def clear_cache(self, changed=None):
         """Clears cached data.
 
-        For now cache date is auto-completion data (payee, transaction, account). Call this when
-        a transaction has been changed.
+        For now cache date is auto-completion data (payee, transaction, account), our search index
+        and our date index. Call this when a transaction has been changed.
+
+        If you know which transactions have changed, pass them as ``changed``. Only those will be
+        re-indexed instead of having our indexes rebuilt when they're next needed.
         """
         self._descriptions = None
         self._payees = None
         self._account_names = None
+        if changed is None:
+            self._search_index = None
+            self._date2transactions = None
+            self._date2maxpos = None
+            self._txn2date = None
+        else:
+            for transaction in changed:
+                if self._search_index is not None:
+                    self._search_index.reindex(transaction)
+                self._reindex_date(transaction)
+
+    def filter_matching(self, transactions, query):
+        """Returns transactions in ``transactions`` matching ``query``, in the same order.
+
+        ``query`` is the same as in :meth:`.Transaction.matches`. Transactions from self are looked
+        up in our search index. Others (schedule spawns, for example) are matched directly.
+        """
+        if self._search_index is None:
+            self._search_index = SearchIndex(self)
+        index = self._search_index
+        found = index.search(query)
+        return [t for t in transactions if t in found or (t not in index and t.matches(query))]
 
     def reassign_account(self, account, reassign_to=None):
         """Calls :meth:`.Transaction.reassign_account` on all transactions.
@@ -111,6 +286,8 @@ class TransactionList(list):
             return
         if to_transaction is not None and to_transaction.date != from_transaction.date:
             to_transaction = None
+        # We're often called right after a date change, before clear_cache().
+        self._reindex_date(from_transaction)
         transactions = self.transactions_at_date(from_transaction.date)
         transactions.remove(from_transaction)
         if not transactions:
@@ -123,6 +300,7 @@ class TransactionList(list):
         for transaction in transactions:
             if transaction.position >= target_position:
                 transaction.position += 1
+        self._update_maxpos(from_transaction.date)
 
     def move_last(self, transaction):
         """Equivalent to :meth:`move_before` with ``to_transaction`` to ``None``."""
@@ -130,7 +308,8 @@ class TransactionList(list):
 
     def transactions_at_date(self, target_date):
         """Returns a set of all transactions occurring on ``target_date``."""
-        return set(t for t in self if t.date == target_date)
+        self._ensure_date_index()
+        return set(self._date2transactions.get(target_date, ()))
 
     # --- Properties
     @property
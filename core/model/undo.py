@@ -135,6 +135,8 @@ class Undoer:
         self._budgets = budgets
         self._index = -1
         self._save_point = None
+        # Actions recorded, undone or redone since the last pop_touched_transactions() call.
+        self._touched_actions = []
 
     # --- Private
     def _add_auto_created_accounts(self, transaction):
@@ -159,6 +161,7 @@ class Undoer:
     def _do_changes(self, action):
         for account, old in action.changed_accounts:
             swapvalues(account, old, ACCOUNT_SWAP_ATTRS)
+        self._accounts.clear_cache(changed=[account for account, old in action.changed_accounts])
         for group, old in action.changed_groups:
             swapvalues(group, old, GROUP_SWAP_ATTRS)
         for txn, old in action.changed_transactions:
@@ -167,6 +170,8 @@ class Undoer:
             for split in txn.splits:
                 split.transaction = txn
             self._add_auto_created_accounts(txn)
+        # Swapping changes dates and positions behind our transaction list's back.
+        self._transactions.clear_cache(changed=[txn for txn, old in action.changed_transactions])
         for split, old in action.changed_splits:
             swapvalues(split, old, SPLIT_SWAP_ATTRS)
         for schedule, old in action.changed_schedules:
@@ -223,6 +228,21 @@ class Undoer:
         if self.can_undo():
             return self._actions[self._index].description
 
+    def pop_touched_transactions(self):
+        """Returns the set of transactions touched since the last call to this method.
+
+        Transactions are "touched" when they're added, changed or deleted by an action that is
+        recorded, undone or redone. Transactions spawned by schedules are not included.
+        """
+        result = set()
+        for action in self._touched_actions:
+            result |= action.added_transactions
+            result |= action.deleted_transactions
+            result |= {txn for txn, old in action.changed_transactions}
+            result |= {split.transaction for split, old in action.changed_splits}
+        self._touched_actions = []
+        return {txn for txn in result if not isinstance(txn, Spawn)}
+
     def redo_description(self):
         """Textual description of the action to be redone next."""
         if self.can_redo():
@@ -251,6 +271,7 @@ class Undoer:
             self._actions = self._actions[:self._index + 1]
         self._actions.append(action)
         self._index = -1
+        self._touched_actions.append(action)
 
     def undo(self):
         """Undo the next action to be undone.
@@ -273,6 +294,7 @@ class Undoer:
         )
         self._do_changes(action)
         self._index -= 1
+        self._touched_actions.append(action)
 
     def redo(self):
         """Redo the next action to be redone.
@@ -294,6 +316,7 @@ class Undoer:
         )
         self._do_changes(action)
         self._index += 1
+        self._touched_actions.append(action)
 
     # --- Properties
     @property
@@ -507,7 +507,369 @@ static PyType_Spec Amount_Type_Spec = {
     Amount_Slots,
 };
 
+/* Module functions. See _amount_ref.py for their reference implementations. */
+
+static int
+char_has_property(Py_UCS4 c, const char *method)
+{
+    /* Calls ``method`` (a str method such as "isdecimal") on c. Returns -1 on error. */
+    PyObject *s, *r;
+    int result;
+
+    s = PyUnicode_FromOrdinal(c);
+    if (s == NULL) {
+        return -1;
+    }
+    r = PyObject_CallMethod(s, (char *)method, NULL);
+    Py_DECREF(s);
+    if (r == NULL) {
+        return -1;
+    }
+    result = PyObject_IsTrue(r);
+    Py_DECREF(r);
+    return result;
+}
+
+static int
+is_decimal(Py_UCS4 c)
+{
+    /* Same as re's \d. Returns -1 on error. */
+    if (c < 128) {
+        return c >= '0' && c <= '9';
+    }
+    return char_has_property(c, "isdecimal");
+}
+
+static int
+is_digit(Py_UCS4 c)
+{
+    /* Same as str.isdigit() for a single char. Returns -1 on error. */
+    if (c < 128) {
+        return c >= '0' && c <= '9';
+    }
+    return char_has_property(c, "isdigit");
+}
+
+static int
+is_grouping_sep(Py_UCS4 c)
+{
+    /* Same as re's [.\s\xA0,']. Returns -1 on error. */
+    if (c == '.' || c == ',' || c == '\'' || c == 0xa0) {
+        return 1;
+    }
+    if (c < 128) {
+        return c == ' ' || (c >= '\t' && c <= '\r') || (c >= 0x1c && c <= 0x1f);
+    }
+    return char_has_property(c, "isspace");
+}
+
+static int
+decimals_between(Py_UCS4 *s, Py_ssize_t start, Py_ssize_t end)
+{
+    /* Returns whether all chars between start and end are decimals, or -1 on error. */
+    Py_ssize_t i;
+    int r;
+
+    for (i = start; i < end; i++) {
+        r = is_decimal(s[i]);
+        if (r != 1) {
+            return r;
+        }
+    }
+    return 1;
+}
+
+/* The limited API doesn't give us access to the chars of a str. We go through UTF-32 in native
+   byte order instead. */
+
+static int
+native_utf32_byteorder(void)
+{
+    int one = 1;
+    return *(char *)&one ? -1 : 1;
+}
+
+static PyObject *
+unicode_to_ucs4(PyObject *string)
+{
+    /* Returns a bytes object containing the chars of ``string`` as an array of Py_UCS4. */
+    return PyUnicode_AsEncodedString(
+        string, native_utf32_byteorder() == -1 ? "utf-32-le" : "utf-32-be", "surrogatepass");
+}
+
+static PyObject *
+ucs4_to_unicode(Py_UCS4 *s, Py_ssize_t len)
+{
+    int byteorder = native_utf32_byteorder();
+    return PyUnicode_DecodeUTF32((char *)s, len * sizeof(Py_UCS4), "surrogatepass", &byteorder);
+}
+
+static PyObject *
+parse_number(Py_UCS4 *s, Py_ssize_t len, Py_UCS4 *buf, int exponent, int auto_decimal_place,
+    int parens_for_negatives)
+{
+    /* Does the work of parse_amount_single(), s being the string we parse (which we modify) and
+       buf a buffer of at least len + exponent + 1 chars. */
+    Py_ssize_t i, j, k, n, start, end, limit, padding;
+    PyObject *string, *tmp, *result;
+    double value;
+    int r, is_negative, has_open_paren;
+
+    /* Our decimal sep, if any, is the last "," or "." with 1 to ``limit`` digits after it. We
+       replace it with a placeholder char that can't be a grouping sep. */
+    limit = exponent >= 3 ? 10 : (exponent == 2 ? 2 : 0);
+    if (limit) {
+        for (k = len - 1; k >= 0 && s[k] != ',' && s[k] != '.'; k--);
+        if (k >= 0 && len - k - 1 >= 1 && len - k - 1 <= limit) {
+            r = decimals_between(s, k + 1, len);
+            if (r == -1) {
+                return NULL;
+            }
+            if (r) {
+                s[k] = '|';
+            }
+        }
+    }
+    /* Grouping seps have a digit before them and 3 digits after them. We remove them. */
+    n = 0;
+    for (i = 0; i < len; i++) {
+        if (i > 0 && i + 3 < len) {
+            r = is_grouping_sep(s[i]);
+            if (r == 1) {
+                r = decimals_between(s, i - 1, i);
+            }
+            if (r == 1) {
+                r = decimals_between(s, i + 1, i + 4);
+            }
+            if (r == -1) {
+                return NULL;
+            }
+            if (r) {
+                continue;
+            }
+        }
+        buf[n++] = s[i] == '|' ? '.' : s[i];
+    }
+    if (auto_decimal_place && exponent > 0 && n > 0) {
+        r = 1;
+        for (i = 0; i < n && r == 1; i++) {
+            r = is_digit(buf[i]);
+        }
+        if (r == -1) {
+            return NULL;
+        }
+        if (r) {
+            padding = exponent > n ? exponent - n : 0;
+            for (i = n - 1; i >= 0; i--) {
+                buf[i + padding] = buf[i];
+            }
+            for (i = 0; i < padding; i++) {
+                buf[i] = '0';
+            }
+            n += padding;
+            for (i = n; i > n - exponent; i--) {
+                buf[i] = buf[i - 1];
+            }
+            buf[n - exponent] = '.';
+            n++;
+        }
+    }
+    string = ucs4_to_unicode(buf, n);
+    if (string == NULL) {
+        return NULL;
+    }
+    result = PyFloat_FromString(string);
+    if (result != NULL || !PyErr_ExceptionMatches(PyExc_ValueError)) {
+        Py_DECREF(string);
+        return result;
+    }
+    PyErr_Clear();
+    /* There might be some crap around the amount. Find the first thing looking like a number,
+       which is what "\d+\.\d+|\.\d+|\d+" would match. */
+    start = -1;
+    end = -1;
+    for (i = 0; i < n && start == -1; i++) {
+        r = is_decimal(buf[i]);
+        if (r == 0 && buf[i] == '.' && i + 1 < n) {
+            r = is_decimal(buf[i + 1]);
+        }
+        if (r == -1) {
+            Py_DECREF(string);
+            return NULL;
+        }
+        if (!r) {
+            continue;
+        }
+        start = i;
+        j = buf[i] == '.' ? i + 1 : i;
+        for (; j < n && (r = is_decimal(buf[j])) == 1; j++);
+        if (r != -1 && buf[i] != '.' && j + 1 < n && buf[j] == '.') {
+            r = is_decimal(buf[j + 1]);
+            if (r == 1) {
+                for (j = j + 1; j < n && (r = is_decimal(buf[j])) == 1; j++);
+            }
+        }
+        if (r == -1) {
+            Py_DECREF(string);
+            return NULL;
+        }
+        end = j;
+    }
+    if (start == -1) {
+        PyErr_Format(PyExc_ValueError, "'%U' is not an amount", string);
+        Py_DECREF(string);
+        return NULL;
+    }
+    Py_DECREF(string);
+    tmp = ucs4_to_unicode(buf + start, end - start);
+    if (tmp == NULL) {
+        return NULL;
+    }
+    result = PyFloat_FromString(tmp);
+    Py_DECREF(tmp);
+    if (result == NULL) {
+        return NULL;
+    }
+    /* Handle negative amounts either starting with a minus sign or surrounded by parenthesis,
+       which is used frequently to denote a negative in finance. */
+    is_negative = 0;
+    has_open_paren = 0;
+    for (i = 0; i < start; i++) {
+        if (buf[i] == '-') {
+            is_negative = 1;
+        }
+        else if (buf[i] == '(') {
+            has_open_paren = 1;
+        }
+    }
+    if (!is_negative && parens_for_negatives && has_open_paren) {
+        for (i = end; i < n; i++) {
+            if (buf[i] == ')') {
+                is_negative = 1;
+                break;
+            }
+        }
+    }
+    if (is_negative) {
+        value = PyFloat_AsDouble(result);
+        Py_DECREF(result);
+        result = PyFloat_FromDouble(-value);
+    }
+    return result;
+}
+
+static PyObject *
+amount_parse_amount_single(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *string, *chars, *result;
+    Py_UCS4 *s, *buf;
+    Py_ssize_t len;
+    int exponent, auto_decimal_place;
+    int parens_for_negatives = 1;
+
+    static char *kwlist[] = {"string", "exponent", "auto_decimal_place", "parens_for_negatives", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "Uip|p", kwlist, &string, &exponent,
+            &auto_decimal_place, &parens_for_negatives)) {
+        return NULL;
+    }
+    if (exponent < 0) {
+        exponent = 0;
+    }
+    chars = unicode_to_ucs4(string);
+    if (chars == NULL) {
+        return NULL;
+    }
+    len = PyBytes_Size(chars) / sizeof(Py_UCS4);
+    /* parse_number() modifies the string it parses, so we need our own copy. */
+    s = PyMem_Malloc((len * 2 + exponent + 1) * sizeof(Py_UCS4));
+    if (s == NULL) {
+        Py_DECREF(chars);
+        return PyErr_NoMemory();
+    }
+    memcpy(s, PyBytes_AsString(chars), len * sizeof(Py_UCS4));
+    Py_DECREF(chars);
+    buf = s + len;
+    result = parse_number(s, len, buf, exponent, auto_decimal_place, parens_for_negatives);
+    PyMem_Free(s);
+    return result;
+}
+
+static PyObject *
+amount_format_number(PyObject *self, PyObject *args)
+{
+    PyObject *decimal_sep, *grouping_sep, *number, *tmp, *parts, *left, *groups, *group;
+    Py_ssize_t len, start, end;
+    double value;
+    int exponent;
+    char *formatted;
+
+    if (!PyArg_ParseTuple(args, "diUU", &value, &exponent, &decimal_sep, &grouping_sep)) {
+        return NULL;
+    }
+    formatted = PyOS_double_to_string(value, 'f', exponent, 0, NULL);
+    if (formatted == NULL) {
+        return NULL;
+    }
+    number = PyUnicode_FromString(formatted);
+    PyMem_Free(formatted);
+    if (number == NULL) {
+        return NULL;
+    }
+    if (PyUnicode_CompareWithASCIIString(decimal_sep, ".") != 0) {
+        tmp = PyUnicode_FromString(".");
+        if (tmp == NULL) {
+            Py_DECREF(number);
+            return NULL;
+        }
+        parts = PyUnicode_Replace(number, tmp, decimal_sep, -1);
+        Py_DECREF(tmp);
+        Py_DECREF(number);
+        if (parts == NULL) {
+            return NULL;
+        }
+        number = parts;
+    }
+    if (PyObject_Length(grouping_sep) == 0) {
+        return number;
+    }
+    parts = PyUnicode_Split(number, decimal_sep, -1);
+    Py_DECREF(number);
+    if (parts == NULL) {
+        return NULL;
+    }
+    /* Groups of 3 chars, starting from the right */
+    left = PyList_GetItem(parts, 0);
+    len = PyObject_Length(left);
+    groups = PyList_New(0);
+    if (groups == NULL) {
+        Py_DECREF(parts);
+        return NULL;
+    }
+    for (start = 0, end = len % 3 ? len % 3 : 3; start < len; start = end, end += 3) {
+        group = PySequence_GetSlice(left, start, end);
+        if (group == NULL || PyList_Append(groups, group) == -1) {
+            Py_XDECREF(group);
+            Py_DECREF(groups);
+            Py_DECREF(parts);
+            return NULL;
+        }
+        Py_DECREF(group);
+    }
+    tmp = PyUnicode_Join(grouping_sep, groups);
+    Py_DECREF(groups);
+    if (tmp == NULL || PyList_SetItem(parts, 0, tmp) == -1) {
+        Py_DECREF(parts);
+        return NULL;
+    }
+    number = PyUnicode_Join(decimal_sep, parts);
+    Py_DECREF(parts);
+    return number;
+}
+
 static PyMethodDef module_methods[] = {
+    {"parse_amount_single", (PyCFunction)amount_parse_amount_single, METH_VARARGS | METH_KEYWORDS, ""},
+    {"format_number", (PyCFunction)amount_format_number, METH_VARARGS, ""},
     {NULL}  /* Sentinel */
 };
 
@@ -9,7 +9,8 @@ from hscommon.gui.column import Column # noqa
 
 from .api import ( # noqa
     Plugin, ViewPlugin, ReadOnlyTableRow, ReadOnlyTable, ReadOnlyTableView, ReadOnlyTablePlugin,
-    CurrencyProviderPlugin, ImportActionPlugin, ImportBindPlugin, EntryMatch
+    CurrencyProviderPlugin, ImportActionPlugin, ImportBindPlugin, EntryMatch,
+    ImportEntryIndex
 )
 
 def get_plugins_from_mod(mod):
@@ -21,7 +21,7 @@ the list of classes you can subclass:
 from datetime import date
 
 
-from collections import namedtuple
+from collections import namedtuple, defaultdict
 
 from hscommon.notify import Broadcaster
 from ..model.currency import Currency, CurrencyNotSupportedException
@@ -310,6 +310,34 @@ class ImportActionPlugin(Plugin, Broadcaster):
 EntryMatch = namedtuple('EntryMatch', 'existing imported will_import weight')
 
 
+class ImportEntryIndex:
+    """Lookups on imported entries, built once and shared by all :class:`ImportBindPlugin`.
+
+    Entries compare by their split, which stays the same when the import document is re-cooked,
+    so :meth:`find` lets us get the current version of an entry we held on to.
+    """
+    def __init__(self, entries):
+        #: The list of imported entries we index, in their original order.
+        self.entries = entries
+        self._entry2entry = {entry: entry for entry in entries}
+        #: ``reference -> entry`` for entries having a reference. The last one wins on duplicates.
+        self.by_reference = {entry.reference: entry for entry in entries if entry.reference}
+        #: ``date -> [entries]``
+        self.by_date = defaultdict(list)
+        for entry in entries:
+            self.by_date[entry.date].append(entry)
+
+    def __contains__(self, entry):
+        return entry in self._entry2entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, entry):
+        """Returns our entry that is equal to ``entry``, or ``None`` if there's none."""
+        return self._entry2entry.get(entry)
+
+
 class ImportBindPlugin(Plugin):
     TYPE_NAME = "Import Bind"
 
@@ -317,3 +345,14 @@ class ImportBindPlugin(Plugin):
         # Returns a list of EntryMatch objects.
         return []
 
+    def match_indexed_entries(
+            self, target_account, document, import_document, existing_entries, import_index):
+        """Bulk version of :meth:`match_entries` receiving an :class:`ImportEntryIndex`.
+
+        This is what the import window calls. Override it to use the prebuilt lookups of
+        ``import_index`` rather than building your own. By default, we call :meth:`match_entries`.
+        """
+        return self.match_entries(
+            target_account, document, import_document, existing_entries, import_index.entries
+        )
+
@@ -4,7 +4,7 @@
 # which should be included with this package. The terms are also available at
 # http://www.gnu.org/licenses/gpl-3.0.html
 
-from core.plugin import ImportBindPlugin, EntryMatch
+from core.plugin import ImportBindPlugin, EntryMatch, ImportEntryIndex
 
 class ReferenceBind(ImportBindPlugin):
     NAME = "Reference Import Bind"
@@ -16,11 +16,16 @@ class ReferenceBind(ImportBindPlugin):
                       import_document,
                       existing_entries,
                       imported_entries):
+        return self.match_indexed_entries(
+            target_account, document, import_document, existing_entries,
+            ImportEntryIndex(imported_entries)
+        )
+
+    def match_indexed_entries(
+            self, target_account, document, import_document, existing_entries, import_index):
         matches = []
-        import_reference2entry = {}
+        import_reference2entry = dict(import_index.by_reference)
         will_import = True
-        for import_entry in (e for e in imported_entries if e.reference):
-            import_reference2entry[import_entry.reference] = import_entry
 
         for existing_entry in existing_entries:
             if existing_entry.reference in import_reference2entry:
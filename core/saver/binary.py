@@ -0,0 +1,175 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+import io
+import os
+import os.path as op
+import sys
+from array import array
+
+from hscommon.util import ensure_folder
+
+from ..loader.binary import MAGIC, VERSION, COLUMNS, HEADER, DIRECTORY_ITEM
+from ..model.amount import Amount
+
+def _build_columns(document_id, properties, accounts, groups, transactions, schedules, budgets):
+    # Struct formats in COLUMNS are also valid array typecodes.
+    columns = {name: array(fmt) for name, fmt in COLUMNS}
+    strings = []
+    string2index = {}
+
+    def intern(s):
+        if s is None:
+            return -1
+        try:
+            return string2index[s]
+        except KeyError:
+            result = len(strings)
+            strings.append(s)
+            string2index[s] = result
+            return result
+
+    def date2ordinal(date):
+        return date.toordinal() if date is not None else 0
+
+    account2index = {}
+
+    def add_account(account):
+        account2index[account] = len(account2index)
+        columns['account_names'].append(intern(account.name))
+        columns['account_currencies'].append(intern(account.currency.code))
+        columns['account_types'].append(intern(account.type))
+        columns['account_groups'].append(intern(account.group.name) if account.group else -1)
+        columns['account_references'].append(intern(account.reference))
+        columns['account_numbers'].append(intern(account.account_number))
+        columns['account_inactives'].append(1 if account.inactive else 0)
+        columns['account_notes'].append(intern(account.notes))
+
+    def account_index(account):
+        if account is None:
+            return -1
+        if account not in account2index:
+            # The account isn't part of `accounts`. Save it anyway so that we don't lose it.
+            add_account(account)
+        return account2index[account]
+
+    def add_amount(amount_column, currency_column, amount):
+        if isinstance(amount, Amount):
+            currency = amount.currency
+            amount_column.append(int(round(amount.value * 10 ** currency.exponent)))
+            currency_column.append(intern(currency.code))
+        else:
+            amount_column.append(0)
+            currency_column.append(-1)
+
+    txn_count = 0
+
+    def add_transaction(txn):
+        nonlocal txn_count
+        columns['txn_dates'].append(txn.date.toordinal())
+        columns['txn_descriptions'].append(intern(txn.description))
+        columns['txn_payees'].append(intern(txn.payee))
+        columns['txn_checknos'].append(intern(txn.checkno))
+        columns['txn_notes'].append(intern(txn.notes))
+        columns['txn_mtimes'].append(txn.mtime)
+        for split in txn.splits:
+            columns['split_accounts'].append(account_index(split.account))
+            add_amount(columns['split_amounts'], columns['split_currencies'], split.amount)
+            columns['split_memos'].append(intern(split.memo))
+            columns['split_references'].append(intern(split.reference))
+            columns['split_reconciliation_dates'].append(date2ordinal(split.reconciliation_date))
+        columns['txn_split_ends'].append(len(columns['split_accounts']))
+        txn_count += 1
+        return txn_count - 1
+
+    for name, value in properties.items():
+        if name == 'default_currency':
+            value = value.code
+        else:
+            value = str(value)
+        columns['property_names'].append(intern(name))
+        columns['property_values'].append(intern(value))
+    for group in groups:
+        columns['group_names'].append(intern(group.name))
+        columns['group_types'].append(intern(group.type))
+    for account in accounts:
+        add_account(account)
+    for txn in transactions:
+        add_transaction(txn)
+    columns['document'].extend([intern(document_id), txn_count])
+    scheduled = [s for s in schedules if s.is_alive]
+    for schedule_index, recurrence in enumerate(scheduled):
+        columns['schedule_types'].append(intern(recurrence.repeat_type))
+        columns['schedule_everys'].append(recurrence.repeat_every)
+        columns['schedule_stop_dates'].append(date2ordinal(recurrence.stop_date))
+        columns['schedule_refs'].append(add_transaction(recurrence.ref))
+        overrides = [(False, recurrence.date2globalchange), (True, recurrence.date2exception)]
+        for is_exception, date2txn in overrides:
+            for date, txn in date2txn.items():
+                columns['override_schedules'].append(schedule_index)
+                columns['override_is_exception'].append(1 if is_exception else 0)
+                columns['override_dates'].append(date.toordinal())
+                columns['override_txns'].append(add_transaction(txn) if txn is not None else -1)
+    for budget in budgets:
+        columns['budget_accounts'].append(account_index(budget.account))
+        columns['budget_targets'].append(account_index(budget.target))
+        columns['budget_types'].append(intern(budget.repeat_type))
+        columns['budget_everys'].append(budget.repeat_every)
+        add_amount(columns['budget_amounts'], columns['budget_currencies'], budget.amount)
+        columns['budget_notes'].append(intern(budget.notes))
+        columns['budget_start_dates'].append(budget.start_date.toordinal())
+        columns['budget_stop_dates'].append(date2ordinal(budget.stop_date))
+    strings_data = columns['strings_data']
+    strings_ends = columns['strings_ends']
+    for s in strings:
+        strings_data.frombytes(s.encode('utf-8'))
+        strings_ends.append(len(strings_data))
+    return columns
+
+def _write_columns(fp, columns):
+    byteorder = 0 if sys.byteorder == 'little' else 1
+    fp.write(HEADER.pack(MAGIC, VERSION, byteorder, len(COLUMNS)))
+    # Columns are aligned on 8 bytes so that they can be cast without copying.
+    offset = HEADER.size + DIRECTORY_ITEM.size * len(COLUMNS)
+    offsets = []
+    for name, fmt in COLUMNS:
+        offset += -offset % 8
+        offsets.append(offset)
+        column = columns[name]
+        offset += len(column) * column.itemsize
+    for (name, fmt), offset in zip(COLUMNS, offsets):
+        fp.write(DIRECTORY_ITEM.pack(offset, len(columns[name])))
+    for (name, fmt), offset in zip(COLUMNS, offsets):
+        fp.write(b'\0' * (offset - fp.tell()))
+        columns[name].tofile(fp)
+
+def dumps(document_id, properties, accounts, groups, transactions, schedules, budgets):
+    """Returns the bytes that :func:`save` would write.
+
+    This is how we ship loaded documents between processes (see :mod:`core.loader.parallel`).
+    """
+    columns = _build_columns(
+        document_id, properties, accounts, groups, transactions, schedules, budgets
+    )
+    fp = io.BytesIO()
+    _write_columns(fp, columns)
+    return fp.getvalue()
+
+def save(filename, document_id, properties, accounts, groups, transactions, schedules, budgets):
+    """Saves a document in the binary format described in :mod:`core.loader.binary`."""
+    columns = _build_columns(
+        document_id, properties, accounts, groups, transactions, schedules, budgets
+    )
+    ensure_folder(op.dirname(filename))
+    tmp_filename = filename + '.tmp'
+    try:
+        with open(tmp_filename, 'wb') as fp:
+            _write_columns(fp, columns)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if op.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
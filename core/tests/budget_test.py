@@ -212,6 +212,25 @@ def test_spawn_has_correct_date(app):
     # first txn is the entry on 01/07
     eq_(app.ttable[1].date, '31/12/2009')
 
+# --- Monthly budget with txns around a period boundary
+def app_monthly_budget_with_txns_around_period_boundary(monkeypatch):
+    monkeypatch.patch_today(2008, 1, 27)
+    app = TestApp()
+    app.drsel.select_year_range()
+    app.add_account('income', account_type=AccountType.Income)
+    app.add_txn(date='31/01/2008', from_='income', amount='10')
+    app.add_txn(date='01/02/2008', from_='income', amount='30')
+    app.add_budget('income', None, '100')
+    return app
+
+@with_app(app_monthly_budget_with_txns_around_period_boundary)
+def test_txns_only_affect_the_spawn_of_their_period(app):
+    app.show_tview()
+    spawns = {row.date: row.amount for row in app.ttable.rows if row.description == ''}
+    eq_(spawns['31/01/2008'], '90.00')
+    eq_(spawns['29/02/2008'], '70.00')
+    eq_(spawns['31/03/2008'], '100.00')
+
 # --- Scheduled txn and budget
 def app_scheduled_txn_and_budget(monkeypatch):
     monkeypatch.patch_today(2009, 9, 10)
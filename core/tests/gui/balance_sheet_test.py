@@ -507,6 +507,32 @@ def test_budget(app, monkeypatch):
     eq_(app.bsheet.assets[1].budgeted, '550.00') # 150 + 300
     eq_(app.bsheet.assets.budgeted, '370.00')
 
+@with_app(app_accounts_and_entries)
+def test_budget_follows_budget_account_entries(app, monkeypatch):
+    # Budgeted amounts of targets depend on the entries of the budget's account, even when the
+    # target isn't touched by the change.
+    monkeypatch.patch_today(2008, 1, 15)
+    app.add_budget('expense', 'Account 1', '100') # + 80
+    app.show_nwview()
+    eq_(app.bsheet.assets[0].budgeted, '-80.00')
+    app.show_account('Account 2')
+    app.add_entry('14/01/2008', 'Entry 5', transfer='expense', decrease='30.00')
+    app.show_nwview()
+    eq_(app.bsheet.assets[0].budgeted, '-50.00')
+
+@with_app(app_accounts_and_entries)
+def test_only_recooked_account_nodes_are_recomputed(app, monkeypatch):
+    computed = []
+    compute_account_node = app.bsheet._compute_account_node
+    def mock_compute_account_node(node):
+        computed.append(node.account.name)
+        compute_account_node(node)
+    monkeypatch.setattr(app.bsheet, '_compute_account_node', mock_compute_account_node)
+    app.add_txn('14/01/2008', 'Entry 5', from_='Account 2', to='expense', amount='30')
+    app.show_nwview()
+    eq_(computed, ['Account 2'])
+    eq_(app.bsheet.assets[1].end, '50.00')
+
 @with_app(app_accounts_and_entries)
 def test_budget_multiple_currencies(app, monkeypatch):
     # budgeted amounts must be correctly converted to the target account's currency
@@ -651,6 +677,14 @@ def test_delete_transaction(app):
     app.show_nwview()
     eq_(app.bsheet.assets.end, 'CAD 217.00')
 
+@with_app(app_multiple_currencies)
+def test_rate_change_updates_untouched_accounts(app):
+    # Changing a rate affects the converted amounts of accounts that weren't recooked.
+    USD.set_CAD_value(1.0, date(2008, 1, 31))
+    app.add_txn('2/1/2008', 'CAD entry', to='CAD account', amount='10.00')
+    app.show_nwview()
+    eq_(app.bsheet.net_worth.end, 'CAD 260.00')
+
 @with_app(app_multiple_currencies)
 def test_exclude_group(app):
     # Excluding a group excludes all sub-accounts and removes the total node
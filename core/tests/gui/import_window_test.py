@@ -114,6 +114,18 @@ class ValueImportBind(ImportBindPlugin):
 
         return matches
 
+class IndexedValueImportBind(ImportBindPlugin):
+    """Binds entries having the same date and amount using the prebuilt import index."""
+    NAME = "Indexed Value Import Bind"
+
+    def match_indexed_entries(self, target_account, document, import_document, existing_entries, import_index):
+        matches = []
+        for existing_entry in existing_entries:
+            for import_entry in import_index.by_date.get(existing_entry.date, []):
+                if import_entry.amount == existing_entry.amount:
+                    matches.append(EntryMatch(existing_entry, import_entry, True, 0.9))
+        return matches
+
 # --- No setup
 
 @with_app(TestApp)
@@ -155,6 +167,66 @@ def test_fuzzy_matching_plugin(app):
         eq_(row.amount, amount)
         eq_(row.amount_import, amount_import)
 
+@with_app(TestApp)
+def test_indexed_matching_plugin_then_unbind(app):
+    # Plugins can match entries through the import index the pane builds for them, and unbinding
+    # one of their matches works as with any other match.
+    app.set_plugins([IndexedValueImportBind])
+    TXNS = [
+        {'date': '22/06/2015', 'description': 'foo', 'amount': '1'},
+        {'date': '23/06/2015', 'description': 'bar', 'amount': '2'},
+    ]
+    app.fake_import('foo', TXNS, account_reference='foo')
+    app.iwin.import_selected_pane()
+    TXNS = [
+        {'date': '22/06/2015', 'description': 'foo', 'amount': '1'},
+        {'date': '23/06/2015', 'description': 'baz', 'amount': '3'},
+    ]
+    app.fake_import('foo', TXNS, account_reference='foo')
+    eq_([(row.amount, row.amount_import) for row in app.itable], [
+        ('1.00', '1.00'), ('2.00', ''), ('', '3.00'),
+    ])
+    app.itable.unbind(0)
+    eq_([(row.amount, row.amount_import) for row in app.itable], [
+        ('1.00', ''), ('', '1.00'), ('2.00', ''), ('', '3.00'),
+    ])
+
+@with_app(TestApp)
+def test_parse_files_for_import(app):
+    # Files are loaded in parallel and each of them get their panes, like when they're imported one
+    # by one. CSV files are left to go through the CSV options window.
+    csv_filename = testdata.filepath('csv', 'simple.csv')
+    filenames = [testdata.filepath('qif', 'checkbook.qif'), testdata.filepath('ofx', 'desjardins.ofx')]
+    eq_(app.mw.parse_files_for_import(filenames + [csv_filename]), ([csv_filename], []))
+    expected = TestApp()
+    for filename in filenames:
+        expected.mw.parse_file_for_import(filename)
+    eq_(
+        sorted((pane.name, pane.count) for pane in app.iwin.panes),
+        sorted((pane.name, pane.count) for pane in expected.iwin.panes)
+    )
+    index = [pane.name for pane in app.iwin.panes].index('Account 1')
+    app.iwin.selected_pane_index = index
+    expected.iwin.selected_pane_index = 0
+    eq_(
+        [(row.date_import, row.description_import, row.amount_import) for row in app.itable],
+        [(row.date_import, row.description_import, row.amount_import) for row in expected.itable]
+    )
+
+@with_app(TestApp)
+def test_parse_files_for_import_with_errors(app, tmpdir):
+    # A file that can't be imported doesn't prevent the others from being imported. Its error is
+    # returned along with its filename.
+    empty_filename = str(tmpdir.join('empty.moneyguru'))
+    with open(empty_filename, 'wt') as fp:
+        fp.write('<moneyguru-file />')
+    bad_currency_filename = testdata.filepath('moneyguru', 'unsupported_currency.moneyguru')
+    csv_filename = testdata.filepath('csv', 'simple.csv')
+    filenames = [empty_filename, bad_currency_filename, testdata.filepath('qif', 'checkbook.qif'), csv_filename]
+    csv_filenames, errors = app.mw.parse_files_for_import(filenames)
+    eq_(csv_filenames, [csv_filename])
+    eq_(sorted(filename for filename, error in errors), sorted([empty_filename, bad_currency_filename]))
+    eq_(len(app.iwin.panes), 2) # checkbook.qif's accounts
 
 # ---
 def app_import_checkbook_qif():
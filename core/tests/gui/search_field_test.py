@@ -224,6 +224,41 @@ def test_modify_transaction_out_of_filter(app):
     eq_(app.ttable.row_count, 1)
     eq_(app.ttable.selected_indexes, [0])
 
+@with_app(app_three_txns_filtered)
+def test_modify_transaction_into_filter(app):
+    # When changing a txn so that it matches the filter, it shows up.
+    app.sfield.text = ''
+    app.ttable.select([0])
+    app.ttable[0].description = 'bar'
+    app.ttable.save_edits()
+    app.sfield.text = 'bar'
+    eq_(app.ttable.row_count, 3)
+
+@with_app(app_three_txns_filtered)
+def test_undo_transaction_change_in_filter(app):
+    # Undoing a change to a txn is reflected in search results.
+    row = app.ttable.selected_row
+    row.description = 'baz'
+    app.ttable.save_edits()
+    app.doc.undo()
+    eq_(app.ttable.row_count, 2)
+    app.sfield.text = 'baz'
+    eq_(app.ttable.row_count, 0)
+
+@with_app(app_two_transactions)
+def test_query_account_after_rename(app):
+    # Renaming an account is reflected in account searches.
+    app.sfield.text = 'account:income'
+    eq_(app.ttable.row_count, 1)
+    app.show_pview()
+    app.istatement.selected = app.istatement.income[0]
+    app.istatement.selected.name = 'Salary'
+    app.istatement.save_edits()
+    app.show_tview()
+    app.sfield.text = 'account:salary'
+    eq_(app.ttable.row_count, 1)
+    eq_(app.ttable[0].description, 'a Deposit')
+
 # --- Grouped and ungrouped txns
 def app_grouped_and_ungrouped_txns():
     app = TestApp()
@@ -6,12 +6,16 @@
 
 from datetime import date
 
+from pytest import raises
 from hscommon.testutil import eq_
 
 from ..document import ScheduleScope
-from ..model.account import AccountType
-from ..model.currency import Currency, CAD
+from ..model.account import Account, AccountType, Group
+from ..model.amount import Amount
+from ..model.currency import Currency, CAD, USD
 from ..model.date import MonthRange
+from ..model.transaction import Transaction, Split
+from ..saver import native as native_saver
 from .base import compare_apps, TestApp, with_app, testdata
 
 
@@ -36,6 +40,69 @@ def test_saved_file_starts_with_xml_header(tmpdir):
     contents = fp.read()
     assert contents.startswith('<?xml version="1.0" encoding="utf-8"?>\n')
 
+def test_save_load_special_characters(tmpdir):
+    # Characters that have to be escaped in XML attributes survive a save/load roundtrip.
+    app = TestApp()
+    app.add_txn(description='<foo> & "bar"\tbaz', payee="it's")
+    filepath = str(tmpdir.join('foo.xml'))
+    app.doc.save_to_xml(filepath)
+    app.doc.load_from_xml(filepath)
+    eq_(app.ttable[0].description, '<foo> & "bar"\tbaz')
+    eq_(app.ttable[0].payee, "it's")
+
+def test_saved_file_contents(tmpdir):
+    # We write native files ourselves, but we keep producing what etree produced: attributes are
+    # sorted and escaped the same way.
+    group = Group('grp', AccountType.Asset)
+    checking = Account('checking & <co>', USD, AccountType.Asset)
+    checking.group = group
+    expense = Account('expense', USD, AccountType.Expense)
+    txn = Transaction(date(2008, 1, 1), '"foo"\tbar', "it's", '12')
+    txn.notes = 'multi\nline'
+    txn.mtime = 42
+    txn.splits = [Split(txn, checking, Amount(-42, USD)), Split(txn, expense, Amount(42, USD))]
+    properties = {'first_weekday': 0, 'default_currency': USD}
+    filepath = str(tmpdir.join('foo.xml'))
+    native_saver.save(filepath, 'docid', properties, [checking, expense], [group], [txn], [], [])
+    with open(filepath, 'rt', encoding='utf-8') as fp:
+        contents = fp.read()
+    expected = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<moneyguru-file document_id="docid">'
+        '<properties default_currency="USD" first_weekday="0" />'
+        '<group name="grp" type="asset" />'
+        '<account currency="USD" group="grp" name="checking &amp; &lt;co&gt;" type="asset" />'
+        '<account currency="USD" name="expense" type="expense" />'
+        '<transaction checkno="12" date="2008-01-01" description="&quot;foo&quot;&#09;bar" mtime="42" '
+        'notes="multi\\nline" payee="it\'s">'
+        '<split account="checking &amp; &lt;co&gt;" amount="USD -42.00" />'
+        '<split account="expense" amount="USD 42.00" />'
+        '</transaction>'
+        '</moneyguru-file>'
+    )
+    eq_(contents, expected)
+
+def test_failed_save_keeps_previous_file(tmpdir, monkeypatch):
+    # When something goes wrong in the middle of a save, the previously saved file is left intact
+    # and we don't leave a temporary file behind.
+    app = TestApp()
+    app.add_txn(description='foo', amount='42')
+    filepath = str(tmpdir.join('foo.xml'))
+    app.doc.save_to_xml(filepath)
+    app.add_txn(description='bar', amount='12')
+
+    def crash(*args, **kwargs):
+        raise ValueError()
+
+    monkeypatch.setattr(native_saver, 'format_amount', crash)
+    with raises(ValueError):
+        app.doc.save_to_xml(filepath)
+    eq_(tmpdir.listdir(), [tmpdir.join('foo.xml')])
+    monkeypatch.undo()
+    app.doc.load_from_xml(filepath)
+    eq_(app.ttable.row_count, 1)
+    eq_(app.ttable[0].description, 'foo')
+
 # ---
 class TestLoadFile:
     # Loads 'simple.moneyguru', a file with 2 accounts and 2 entries in each. Select the first entry.
@@ -482,6 +549,42 @@ def test_save_load(tmpdir, monkeypatch):
     app = app_account_and_group()
     check(app)
 
+def test_save_load_binary(tmpdir, monkeypatch):
+    # The binary format keeps everything the XML format keeps.
+    def check(app):
+        filepath = str(tmpdir.join('foo.mgbin'))
+        app.doc.save_to_binary(filepath)
+        app.doc.close()
+        newapp = TestApp()
+        newapp.doc.load_from_binary(filepath)
+        newapp.doc.date_range = app.doc.date_range
+        newapp.doc._cook()
+        compare_apps(app.doc, newapp.doc)
+
+    appfuncs = [
+        app_account_with_budget, app_transaction_with_payee_and_checkno,
+        app_entry_with_blank_description, app_account_in_group, app_transaction_with_memos,
+        app_one_account_and_one_group, app_one_account_in_one_group, app_budget_with_all_fields_set,
+        app_account_with_apanel_attrs, app_one_schedule_and_one_normal_txn, app_account_and_group,
+    ]
+    for appfunc in appfuncs:
+        check(appfunc())
+    check(app_schedule_with_global_change(monkeypatch))
+    check(app_schedule_with_local_deletion(monkeypatch))
+
+def test_save_load_binary_from_xml(tmpdir):
+    # Loading an XML document and converting it to binary doesn't lose anything.
+    for filename in ['simple', 'multi_currency', 'account_in_group', 'with_references1']:
+        app = TestApp()
+        app.doc.load_from_xml(testdata.filepath('moneyguru', filename + '.moneyguru'))
+        filepath = str(tmpdir.join('foo.mgbin'))
+        app.doc.save_to_binary(filepath)
+        newapp = TestApp()
+        newapp.doc.load_from_binary(filepath)
+        newapp.doc.date_range = app.doc.date_range
+        newapp.doc._cook()
+        compare_apps(app.doc, newapp.doc)
+
 def test_save_load_qif(tmpdir):
     def check(app):
         filepath = str(tmpdir.join('foo.qif'))
@@ -0,0 +1,58 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from pytest import raises
+from hscommon.testutil import eq_
+
+from ..base import testdata
+from ...exception import FileFormatError
+from ...loader import binary
+from ...model.account import Account, AccountType
+from ...model.amount import Amount
+from ...model.currency import USD
+from ...model.transaction import Transaction, Split
+from ...saver import binary as binary_saver
+
+
+def pytest_funcarg__loader(request):
+    return binary.Loader(USD)
+
+def test_parse_empty_file(loader, tmpdir):
+    filepath = tmpdir.join('foo.mgbin')
+    filepath.write_binary(b'')
+    with raises(FileFormatError):
+        loader.parse(str(filepath))
+
+def test_parse_xml_file(loader):
+    with raises(FileFormatError):
+        loader.parse(testdata.filepath('moneyguru', 'simple.moneyguru'))
+
+def test_parse_truncated_file(loader, tmpdir):
+    # A file with a valid header but with columns going past the end of the file.
+    filepath = tmpdir.join('foo.mgbin')
+    header = binary.HEADER.pack(binary.MAGIC, binary.VERSION, 0, len(binary.COLUMNS))
+    directory = binary.DIRECTORY_ITEM.pack(0, 1000) * len(binary.COLUMNS)
+    filepath.write_binary(header + directory)
+    with raises(FileFormatError):
+        loader.parse(str(filepath))
+
+def test_load_unsorted_transactions(loader, tmpdir):
+    # We don't trust the writer to have sorted transactions by date. Positions are attributed like
+    # in the native loader: by date, then by file order.
+    account = Account('foo', USD, AccountType.Asset)
+    txns = []
+    for day, description in [(3, 'a'), (1, 'b'), (3, 'c'), (1, 'd')]:
+        txn = Transaction(date(2016, 1, day), description)
+        txn.splits.append(Split(txn, account, Amount(day, USD)))
+        txns.append(txn)
+    filepath = str(tmpdir.join('foo.mgbin'))
+    binary_saver.save(filepath, 'docid', {}, [account], [], txns, [], [])
+    loader.parse(filepath)
+    loader.load()
+    loaded = [(t.description, t.position) for t in loader.transactions]
+    eq_(loaded, [('b', 1), ('d', 2), ('a', 1), ('c', 2)])
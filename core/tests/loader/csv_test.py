@@ -12,6 +12,7 @@ from pytest import raises
 from hscommon.testutil import eq_
 
 from ...exception import FileFormatError
+from ...loader import csv as csv_loader
 from ...loader.csv import Loader, CsvField
 from ...model.amount import Amount
 from ...model.currency import USD, EUR
@@ -97,3 +98,29 @@ def test_quoted_sep():
     loader = Loader(USD)
     loader.parse(testdata.filepath('csv/quoted_sep.csv'))
     eq_(len(loader.lines), 4)
+
+def test_lines_beyond_preview(tmpdir, monkeypatch):
+    # Only the first lines are kept in memory. Lines after them are read from the file again when
+    # loading, with the same exclusions, merges and padding as the other lines.
+    monkeypatch.setattr(csv_loader, 'PREVIEW_LINE_COUNT', 3)
+    monkeypatch.setattr(csv_loader, 'GUESS_LINE_COUNT', 2)
+    filepath = tmpdir.join('foo.csv')
+    filepath.write('\n'.join([
+        'date;desc;payee;amount',
+        '13/02/2010;foo;a;1',
+        '14/02/2010;bar;b;2',
+        '15/02/2010;baz;c;3',
+        '16/02/2010;qux;d;4;extra',
+        '17/02/2010;bad;e;notanamount',
+        'total;;;10',
+    ]))
+    loader = Loader(USD)
+    loader.parse(str(filepath))
+    eq_(len(loader.lines), 3)
+    eq_(loader.line_count, 7)
+    eq_(len(loader.lines[0]), 5)
+    loader.columns = [CsvField.Date, CsvField.Description, CsvField.Description, CsvField.Amount]
+    loader.excluded_lines = {0, -1}
+    loader.load()
+    eq_([t.description for t in loader.transactions], ['foo a', 'bar b', 'baz c', 'qux d'])
+    eq_(loader.transactions[-1].date, date(2010, 2, 16))
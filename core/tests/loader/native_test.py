@@ -54,6 +54,27 @@ def test_wrong_mtime(loader):
     loader._parse(BytesIO(content))
     loader.load() # no crash
 
+def test_truncated_file(loader):
+    # A file that is only broken after its root element is still refused by parse().
+    content = b'<moneyguru-file><account name="foo" /><transaction date="2008-01-01"'
+    with raises(FileFormatError):
+        loader._parse(BytesIO(content))
+
+def test_only_root_transactions_are_loaded(loader):
+    # Transactions nested in a recurrence aren't loaded as regular transactions.
+    content = b"""<moneyguru-file>
+    <account name="foo" />
+    <transaction date="2008-01-01"><split account="foo" amount="1.00 USD" /></transaction>
+    <recurrence type="1" every="1">
+        <transaction date="2008-01-02"><split account="foo" amount="2.00 USD" /></transaction>
+    </recurrence>
+    </moneyguru-file>"""
+    loader._parse(BytesIO(content))
+    loader.load()
+    eq_(len(loader.transaction_infos), 1)
+    eq_(len(loader.recurrence_infos), 1)
+    eq_(loader.recurrence_infos[0].transaction_info.date, date(2008, 1, 2))
+
 def test_account_and_entry_values(loader):
     # Make sure loaded values are correct.
     PLN = Currency.register('PLN', 'PLN')
@@ -8,12 +8,14 @@
 
 import sys
 import os
+import os.path as op
 from datetime import date
 
 from pytest import raises
 from hscommon.testutil import eq_
 
-from .base import ApplicationGUI, TestApp, with_app, testdata
+from .base import ApplicationGUI, TestApp, with_app, testdata, compare_apps
+from .. import document
 from ..app import Application
 from ..document import Document, AUTOSAVE_BUFFER_COUNT
 from ..exception import FileFormatError
@@ -174,20 +176,113 @@ def app_one_empty_account_range_on_october_2007(monkeypatch):
     return app
 
 @with_app(app_one_empty_account_range_on_october_2007)
-def test_autosave(app, tmpdir):
+def test_autosave(app, tmpdir, monkeypatch):
     # Testing the interval between autosaves would require some complicated mocking. We're just
     # going to cheat here and call 'must_autosave' directly.
     cache_path = str(tmpdir)
     app.app.cache_path = cache_path
     app.doc.must_autosave()
-    eq_(len(os.listdir(cache_path)), 1)
+    # A snapshot and its journal
+    eq_(len(os.listdir(cache_path)), 2)
     app.check_gui_calls_partial(app.etable_gui, not_expected=['stop_edition'])
     assert app.doc.is_dirty
-    # test that the autosave file rotation works
+    # test that the autosave file rotation works. Without journaling, each autosave writes a new
+    # snapshot.
+    monkeypatch.setattr(document, 'JOURNAL_COMPACT_THRESHOLD', 0)
     for i in range(AUTOSAVE_BUFFER_COUNT):
         app.doc.must_autosave()
-    # The extra autosave file has been deleted
-    eq_(len(os.listdir(cache_path)), AUTOSAVE_BUFFER_COUNT)
+    # The extra autosave file (and its journal) has been deleted
+    eq_(len(os.listdir(cache_path)), AUTOSAVE_BUFFER_COUNT * 2)
+
+@with_app(app_one_empty_account_range_on_october_2007)
+def test_autosave_appends_to_journal(app, tmpdir):
+    # Once we have a snapshot, autosaves only append changes to its journal, and only when there
+    # are changes.
+    cache_path = str(tmpdir)
+    app.app.cache_path = cache_path
+    app.doc.must_autosave()
+    [journal_name] = [name for name in os.listdir(cache_path) if name.endswith('.journal')]
+    journal_path = op.join(cache_path, journal_name)
+    app.add_entry('1/10/2007', 'foo', increase='42')
+    app.doc.must_autosave()
+    eq_(len(os.listdir(cache_path)), 2)
+    eq_(len(open(journal_path).readlines()), 2)
+    app.doc.must_autosave()
+    eq_(len(open(journal_path).readlines()), 2)
+
+@with_app(app_one_empty_account_range_on_october_2007)
+def test_autosave_compacts_journal(app, tmpdir, monkeypatch):
+    # After JOURNAL_COMPACT_THRESHOLD records, the next autosave writes a new snapshot.
+    monkeypatch.setattr(document, 'JOURNAL_COMPACT_THRESHOLD', 2)
+    cache_path = str(tmpdir)
+    app.app.cache_path = cache_path
+    app.doc.must_autosave()
+    for i in range(3):
+        app.add_entry('1/10/2007', 'foo', increase='42')
+        app.doc.must_autosave()
+    eq_(len(os.listdir(cache_path)), 4)
+
+@with_app(app_one_empty_account_range_on_october_2007)
+def test_load_autosave(app, tmpdir):
+    # Opening an autosave snapshot replays its journal on top of it.
+    cache_path = str(tmpdir)
+    app.app.cache_path = cache_path
+    app.add_entry('1/10/2007', 'first', transfer='Salary', increase='42')
+    app.add_entry('2/10/2007', 'second', transfer='Groceries', decrease='12')
+    app.doc.must_autosave()
+    [snapshot_name] = [name for name in os.listdir(cache_path) if name.endswith('.moneyguru')]
+    app.add_entry('3/10/2007', 'third', transfer='Salary', increase='100')
+    app.doc.must_autosave()
+    app.etable.select([0])
+    app.etable[0].description = 'changed'
+    app.etable.save_edits()
+    app.etable.select([1])
+    app.etable.delete()
+    app.add_account('Savings')
+    app.doc.must_autosave()
+    app.doc.undo() # The account addition
+    app.add_budget('Salary', None, '100')
+    app.doc.must_autosave()
+    newapp = TestApp()
+    newapp.app.cache_path = cache_path
+    newapp.doc.load_from_xml(op.join(cache_path, snapshot_name))
+    assert newapp.doc.is_dirty()
+    newapp.doc.date_range = app.doc.date_range
+    newapp.doc._cook()
+    compare_apps(app.doc, newapp.doc)
+
+@with_app(app_one_empty_account_range_on_october_2007)
+def test_journal_of_regular_document_is_ignored(app, tmpdir):
+    # Only our autosave snapshots have journals. A ".journal" file next to a regular document
+    # (ledger files often use that extension) has nothing to do with us.
+    app.add_entry('1/10/2007', 'foo', increase='42')
+    filepath = str(tmpdir.join('books.moneyguru'))
+    app.doc.save_to_xml(filepath)
+    with open(str(tmpdir.join('books.journal')), 'wb') as fp:
+        fp.write('[1,2]\n2007/10/01 caf\xe9\n'.encode('latin-1'))
+    newapp = TestApp()
+    newapp.doc.load_from_xml(filepath)
+    assert not newapp.doc.is_dirty()
+    eq_(newapp.doc.transactions[0].description, 'foo')
+
+@with_app(app_one_empty_account_range_on_october_2007)
+def test_invalid_autosave_journal_is_ignored(app, tmpdir):
+    # A journal that we can't decode or that doesn't have a proper header is treated as no journal.
+    cache_path = str(tmpdir)
+    app.app.cache_path = cache_path
+    app.add_entry('1/10/2007', 'foo', increase='42')
+    app.doc.must_autosave()
+    [snapshot_name] = [name for name in os.listdir(cache_path) if name.endswith('.moneyguru')]
+    snapshot_path = op.join(cache_path, snapshot_name)
+    journal_path = op.splitext(snapshot_path)[0] + '.journal'
+    for contents in [b'caf\xe9\n', b'[1,2]\n']:
+        with open(journal_path, 'wb') as fp:
+            fp.write(contents)
+        newapp = TestApp()
+        newapp.app.cache_path = cache_path
+        newapp.doc.load_from_xml(snapshot_path)
+        assert not newapp.doc.is_dirty()
+        eq_(newapp.doc.transactions[0].description, 'foo')
 
 @with_app(app_one_empty_account_range_on_october_2007)
 def test_balance_recursion_limit(app):
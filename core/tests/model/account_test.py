@@ -8,10 +8,10 @@ from datetime import date
 
 from hscommon.testutil import eq_
 
-from ...model.account import Account, Group, AccountList, AccountType
+from ...model.account import Account, Group, AccountList, AccountType, sort_accounts
 from ...model.amount import Amount
 from ...model.currency import USD, CAD
-from ...model.date import MonthRange
+from ...model.date import MonthRange, DateRange
 from ...model.oven import Oven
 from ...model.transaction import Transaction
 from ...model.transaction_list import TransactionList
@@ -53,6 +53,65 @@ class TestGroupComparison:
         assert zoo1 != zoo3
 
 
+class TestAccountListFind:
+    def setup_method(self, method):
+        self.accounts = AccountList(USD)
+        self.checking = Account('Checking', USD, AccountType.Asset)
+        self.checking.account_number = '1000'
+        self.savings = Account('Savings', USD, AccountType.Asset)
+        self.savings.reference = 'ref'
+        for account in [self.checking, self.savings]:
+            self.accounts.add(account)
+
+    def test_find_name_and_number(self):
+        # Names are matched case insensitively, ignoring surrounding spaces. Names starting with an
+        # account number match too.
+        assert self.accounts.find(' savings ') is self.savings
+        assert self.accounts.find('1000') is self.checking
+        assert self.accounts.find('1000 - foo') is self.checking
+        assert self.accounts.find('100') is None
+
+    def test_first_match_wins(self):
+        # When more than one account match, the first one in the list is returned.
+        self.savings.account_number = '1'
+        self.accounts.clear_cache(changed=[self.savings])
+        assert self.accounts.find('1000') is self.checking
+        assert self.accounts.find('1999') is self.savings
+        self.checking.name = '1'
+        self.accounts.clear_cache(changed=[self.checking])
+        assert self.accounts.find('1') is self.checking
+
+    def test_first_match_wins_after_reordering(self):
+        # The first match is the first one in the list as it is now, even after the list was
+        # reordered in place.
+        b = Account('b', USD, AccountType.Asset)
+        b.account_number = '12'
+        a = Account('a', USD, AccountType.Asset)
+        a.account_number = '1'
+        accounts = AccountList(USD)
+        accounts.add(b)
+        accounts.add(a)
+        assert accounts.find('123 foo') is b
+        sort_accounts(accounts)
+        assert accounts.find('123 foo') is a
+        accounts.reverse()
+        assert accounts.find('123 foo') is b
+
+    def test_set_account_name(self):
+        self.accounts.set_account_name(self.savings, 'Foo')
+        assert self.accounts.find('foo') is self.savings
+        assert self.accounts.find('savings') is None
+
+    def test_find_reference(self):
+        assert self.accounts.find_reference('ref') is self.savings
+        other = Account('Other', USD, AccountType.Asset)
+        other.reference = 'ref'
+        self.accounts.add(other)
+        assert other not in self.accounts
+        self.accounts.remove(self.savings)
+        assert self.accounts.find_reference('ref') is None
+
+
 class TestOneAccount:
     def setup_method(self, method):
         USD.set_CAD_value(1.1, date(2007, 12, 31))
@@ -69,8 +128,9 @@ class TestOneAccount:
             Transaction(date(2008, 1, 3), account=self.account, amount=Amount(70, CAD)),
             Transaction(date(2008, 1, 31), account=self.account, amount=Amount(2, USD)),
         ])
-        oven = Oven(accounts, transactions, [], [])
-        oven.cook(date.min, date.max)
+        self.transactions = transactions
+        self.oven = Oven(accounts, transactions, [], [])
+        self.oven.cook(date.min, date.max)
 
     def test_balance(self):
         eq_(self.account.entries.balance(date(2007, 12, 31)), Amount(20, USD))
@@ -86,3 +146,28 @@ class TestOneAccount:
         # Each entry is converted using the entry's day rate.
         eq_(self.account.entries.cash_flow(range, CAD), Amount(201.40, CAD))
 
+
+    def test_cash_flow_overlapping_ranges(self):
+        # Ranges don't have to match entry dates exactly.
+        eq_(self.account.entries.cash_flow(DateRange(date(2007, 12, 1), date(2008, 1, 1))), Amount(120, USD))
+        eq_(self.account.entries.cash_flow(DateRange(date(2008, 1, 2), date(2008, 1, 30))), Amount(150, USD))
+        eq_(self.account.entries.cash_flow(DateRange(date(2008, 1, 4), date(2008, 1, 30))), 0)
+
+    def test_cash_flows(self):
+        # The batch version gives the same results as separate cash_flow() calls.
+        ranges = [
+            DateRange(date(2007, 12, 1), date(2008, 1, 1)),
+            DateRange(date(2008, 1, 2), date(2008, 1, 2)),
+            DateRange(date(2008, 1, 4), date(2008, 1, 30)),
+            DateRange(date(2008, 1, 31), date(2008, 2, 28)),
+        ]
+        expected = [self.account.entries.cash_flow(r, CAD) for r in ranges]
+        eq_(self.account.entries.cash_flows(ranges, CAD), expected)
+
+    def test_cash_flow_after_recook(self):
+        # Cash flow sums computed before a cook don't stay around after it.
+        range = MonthRange(date(2008, 1, 1))
+        self.account.entries.cash_flow(range)
+        self.transactions.add(Transaction(date(2008, 1, 2), account=self.account, amount=Amount(8, USD)))
+        self.oven.cook(date(2008, 1, 2), date.max)
+        eq_(self.account.entries.cash_flow(range), Amount(260, USD))
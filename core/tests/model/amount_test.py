@@ -10,7 +10,9 @@ from pytest import raises
 from hscommon.testutil import eq_
 
 from ...model.currency import Currency, CAD, EUR, USD
-from ...model.amount import format_amount, parse_amount, Amount, UnsupportedCurrencyError
+from ...model.amount import (
+    format_amount, format_amounts, parse_amount, parse_amounts, Amount, UnsupportedCurrencyError
+)
 
 
 # --- Amount
@@ -396,3 +398,20 @@ def test_format_zero():
     eq_(format_amount(Amount(0, USD), default_currency=CAD), '0.00')
     eq_(format_amount(0, default_currency=CAD, zero_currency=EUR), 'EUR 0.00')
     eq_(format_amount(0, default_currency=EUR, zero_currency=EUR), '0.00')
+
+def test_format_amounts():
+    # Batch formatting gives the same results as formatting amounts one by one.
+    amounts = [Amount(1234.5, USD), 0, None, Amount(-12, CAD), Amount(1234.5, USD)]
+    expected = [format_amount(a, CAD, grouping_sep=' ') for a in amounts]
+    eq_(format_amounts(amounts, CAD, grouping_sep=' '), expected)
+
+def test_parse_amounts():
+    # Batch parsing gives the same results as parsing strings one by one.
+    strings = ['12.34', '1 234,56', 'usd 42', '12.34', '']
+    expected = [parse_amount(s, CAD) for s in strings]
+    eq_(parse_amounts(strings, CAD), expected)
+
+def test_parse_amounts_invalid():
+    # Like parse_amount, an invalid string raises ValueError.
+    with raises(ValueError):
+        parse_amounts(['12', 'foobar'], USD)
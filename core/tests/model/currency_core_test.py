@@ -75,6 +75,14 @@ def test_corrupt_db(tmpdir):
     db = RatesDB(dbpath)
     eq_(db.get_rate(date(2008, 4, 20), 'USD', 'CAD'), 42)
 
+def test_set_values_on_missing_table():
+    # Bulk writes recover from a missing rates table like other queries do.
+    con = sqlite.connect(':memory:')
+    db = RatesDB(con)
+    con.execute("drop table rates")
+    db.set_CAD_values('USD', [(date(2008, 4, 20), 42), (date(2008, 4, 21), 43)])
+    eq_(db.get_rate(date(2008, 4, 21), 'USD', 'CAD'), 43)
+
 # --- Daily rate
 def setup_daily_rate():
     USD.set_CAD_value(1/0.996115, date(2008, 4, 20))
@@ -148,6 +156,24 @@ def test_seek_rate_before():
     setup_two_daily_rate()
     eq_(USD.value_in(CAD, date(2008, 4, 19)), 1/0.996115)
 
+# --- Bulk rates
+def test_set_CAD_values():
+    # Setting values in bulk is the same as setting them one at a time, even after a get.
+    db = RatesDB()
+    db.set_CAD_value(date(2008, 4, 20), 'USD', 1.5)
+    eq_(db.get_rate(date(2008, 4, 22), 'USD', 'CAD'), 1.5) # arrays are loaded
+    db.set_CAD_values('USD', [(date(2008, 4, 25), 1.3), (date(2008, 4, 21), 1.4), (date(2008, 4, 20), 1.6)])
+    eq_(db.get_rate(date(2008, 4, 20), 'USD', 'CAD'), 1.6)
+    eq_(db.get_rate(date(2008, 4, 22), 'USD', 'CAD'), 1.4)
+    eq_(db.get_rate(date(2008, 4, 26), 'USD', 'CAD'), 1.3)
+    eq_(db.date_range('USD'), (date(2008, 4, 20), date(2008, 4, 25)))
+
+def test_set_CAD_values_doesnt_touch_other_currencies():
+    db = RatesDB()
+    db.set_CAD_value(date(2008, 4, 20), 'EUR', 1.5)
+    db.set_CAD_values('USD', [(date(2008, 4, 20), 1.3), (date(2008, 4, 21), 1.4)])
+    eq_(db.get_rate(date(2008, 4, 21), 'EUR', 'USD'), 1.5 / 1.4)
+
 # --- Rates of multiple currencies
 def setup_rates_of_multiple_currencies():
     USD.set_CAD_value(1/0.996115, date(2008, 4, 20))
@@ -12,7 +12,7 @@ import time
 from pytest import raises
 from hscommon.testutil import jointhreads, eq_
 
-from ...model.amount import convert_amount
+from ...model.amount import convert_amount, convert_amounts
 from ...model.amount import Amount
 from ...model.currency import Currency, USD, CAD, RateProviderUnavailable, RatesDB
 from ...plugin import yahoo_currency_provider, boc_currency_provider
@@ -65,6 +65,43 @@ def test_seek_rate():
     eq_(convert_amount(amount, CAD, date(2008, 5, 21)), expected)
     eq_(convert_amount(amount, CAD, date(2008, 5, 19)), expected)
 
+def test_get_rates():
+    # get_rates() returns the same rates as individual get_rate() calls.
+    db, log = set_ratedb_for_tests()
+    USD.set_CAD_value(0.98, date(2008, 5, 20))
+    USD.set_CAD_value(0.96, date(2008, 5, 22))
+    dates = [date(2008, 5, 19), date(2008, 5, 21), date(2008, 5, 22), date(2008, 5, 30)]
+    eq_(db.get_rates(dates, 'USD', 'CAD'), [0.98, 0.98, 0.96, 0.96])
+    eq_(db.get_rates(dates, 'CAD', 'USD'), [db.get_rate(d, 'CAD', 'USD') for d in dates])
+
+def test_set_rate_after_lookup():
+    # Rates set after a lookup are merged in the rates we've looked up.
+    db, log = set_ratedb_for_tests()
+    USD.set_CAD_value(0.98, date(2008, 5, 20))
+    eq_(db.get_rate(date(2008, 5, 25), 'USD', 'CAD'), 0.98)
+    USD.set_CAD_value(0.96, date(2008, 5, 22))
+    USD.set_CAD_value(0.97, date(2008, 5, 20))
+    eq_(db.get_rate(date(2008, 5, 21), 'USD', 'CAD'), 0.97)
+    eq_(db.get_rate(date(2008, 5, 25), 'USD', 'CAD'), 0.96)
+
+def test_rate_change_dates():
+    # The first rate is used for previous dates too, so it's not a change date.
+    set_ratedb_for_tests()
+    USD.set_CAD_value(0.98, date(2008, 5, 20))
+    USD.set_CAD_value(0.96, date(2008, 5, 22))
+    USD.set_CAD_value(0.97, date(2008, 5, 30))
+    eq_(USD.rate_change_dates(CAD, date(2008, 5, 1), date(2008, 5, 25)), [date(2008, 5, 22)])
+    eq_(CAD.rate_change_dates(USD, date(2008, 5, 1), date(2008, 6, 1)), [date(2008, 5, 22), date(2008, 5, 30)])
+
+def test_convert_amounts():
+    set_ratedb_for_tests()
+    USD.set_CAD_value(0.98, date(2008, 5, 20))
+    USD.set_CAD_value(0.96, date(2008, 5, 22))
+    amounts = [Amount(42, USD), Amount(12, CAD), 0, Amount(10, USD)]
+    dates = [date(2008, 5, 20), date(2008, 5, 21), date(2008, 5, 21), date(2008, 5, 22)]
+    expected = [convert_amount(a, CAD, d) for a, d in zip(amounts, dates)]
+    eq_(convert_amounts(amounts, CAD, dates), expected)
+
 # ---
 def test_ask_for_rates_in_the_past():
     # If a rate is asked for a date lower than the lowest fetched date, fetch that range.
@@ -93,6 +130,21 @@ def test_dont_crash_on_None_rates():
     db.ensure_rates(date(2008, 5, 20), ['USD']) # no crash
     db.get_rate(date(2008, 5, 20), 'USD', 'CAD') # no crash
 
+def test_fill_voids_with_previous_rates(monkeypatch):
+    # When the provider doesn't return rates for some dates in the fetched range, these dates are
+    # filled with the nearest previous rate (or next rate if there's no previous one).
+    monkeypatch.patch_today(2008, 5, 30)
+
+    def provider(currency, start_date, end_date):
+        return [(date(2008, 5, 22), 1.42), (date(2008, 5, 25), 1.45)]
+
+    db, log = set_ratedb_for_tests(provider=provider)
+    db.ensure_rates(date(2008, 5, 20), ['USD'])
+    db.get_rate(date(2008, 5, 20), 'USD', 'CAD') # saves fetched rates
+    eq_(db.date_range('USD'), (date(2008, 5, 20), date(2008, 5, 29)))
+    rates = db.get_rates([date(2008, 5, 20) + timedelta(i) for i in range(10)], 'USD', 'CAD')
+    eq_(rates, [1.42] * 5 + [1.45] * 5)
+
 # --- Test for the default XMLRPC provider
 def exception_raiser(exception):
     def f(*args, **kwargs):
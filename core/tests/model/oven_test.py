@@ -0,0 +1,119 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.account import Account, AccountList, AccountType
+from ...model.amount import Amount
+from ...model.currency import USD
+from ...model.date import DateRange
+from ...model.oven import Oven, TransactionFlag
+from ...model.transaction import Transaction
+from ...model.transaction_list import TransactionList
+
+def entries_summary(account):
+    return [(e.date, e.amount, e.balance, e.reconciled_balance) for e in account.entries]
+
+class TestIncrementalCook:
+    def setup_method(self, method):
+        self.checking = Account('Checking', USD, AccountType.Asset)
+        self.savings = Account('Savings', USD, AccountType.Asset)
+        self.groceries = Account('Groceries', USD, AccountType.Expense)
+        self.accounts = AccountList(USD)
+        for account in [self.checking, self.savings, self.groceries]:
+            self.accounts.add(account)
+        self.transactions = TransactionList([
+            Transaction(date(2008, 1, 1), account=self.checking, amount=Amount(100, USD)),
+            Transaction(date(2008, 1, 2), account=self.savings, amount=Amount(50, USD)),
+            Transaction(date(2008, 1, 3), account=self.groceries, amount=Amount(10, USD)),
+            Transaction(date(2008, 1, 4), account=self.savings, amount=Amount(20, USD)),
+        ])
+        self.grocery_txn = self.transactions[2]
+        self.grocery_txn.splits[1].account = self.checking
+        self.oven = Oven(self.accounts, self.transactions, [], [])
+        self.oven.cook(date.min, date(2008, 1, 4))
+
+    def test_only_affected_accounts_are_recooked(self):
+        # Entries of accounts that aren't affected aren't re-created, but the cooked transaction
+        # list is still complete.
+        savings_entries = list(self.savings.entries)
+        self.grocery_txn.splits[0].amount = Amount(15, USD)
+        self.grocery_txn.splits[1].amount = Amount(-15, USD)
+        affected = self.grocery_txn.affected_accounts()
+        self.oven.cook(date(2008, 1, 3), date(2008, 1, 4), affected_accounts=affected)
+        for old, new in zip(savings_entries, self.savings.entries):
+            assert old is new
+        eq_(self.checking.entries.balance(), Amount(85, USD))
+        eq_(self.groceries.entries.balance(), Amount(15, USD))
+        eq_(len(self.oven.transactions), 4)
+
+    def test_same_result_as_full_cook(self):
+        self.grocery_txn.splits[1].account = self.savings
+        self.grocery_txn.splits[1].reconciliation_date = date(2008, 1, 3)
+        affected = self.grocery_txn.affected_accounts() | {self.checking}
+        self.oven.cook(date(2008, 1, 3), date(2008, 1, 4), affected_accounts=affected)
+        incremental = [entries_summary(a) for a in self.accounts]
+        self.oven.cook(date.min, date(2008, 1, 4))
+        full = [entries_summary(a) for a in self.accounts]
+        eq_(incremental, full)
+
+    def test_cook_further_recooks_everything(self):
+        # When we have to cook further than the last time, we can't rely on affected accounts
+        # because new spawns could affect any account.
+        savings_entries = list(self.savings.entries)
+        self.oven.cook(date(2008, 1, 3), date(2008, 2, 1), affected_accounts={self.groceries})
+        assert self.savings.entries[-1] is not savings_entries[-1]
+
+    def test_incremental_cook_after_continue_cooking(self):
+        # When we already cooked further than ``until_date`` (a graph extended cooking past our
+        # date range, for example), we still only re-cook affected accounts, up to where we cooked.
+        later_txn = Transaction(date(2008, 1, 20), account=self.checking, amount=Amount(5, USD))
+        self.transactions.add(later_txn)
+        self.oven.continue_cooking(date(2008, 2, 1))
+        savings_entries = list(self.savings.entries)
+        self.grocery_txn.splits[0].amount = Amount(15, USD)
+        self.grocery_txn.splits[1].amount = Amount(-15, USD)
+        affected = self.grocery_txn.affected_accounts()
+        self.oven.cook(date(2008, 1, 3), date(2008, 1, 4), affected_accounts=affected)
+        for old, new in zip(savings_entries, self.savings.entries):
+            assert old is new
+        eq_(self.checking.entries.balance(), Amount(90, USD))
+        incremental = [entries_summary(a) for a in self.accounts]
+        self.oven.cook(date.min, date(2008, 2, 1))
+        full = [entries_summary(a) for a in self.accounts]
+        eq_(incremental, full)
+
+    def test_transaction_flags_follow_cooked_transactions(self):
+        # Flags are kept aligned with cooked transactions and are re-computed for those that are
+        # re-cooked.
+        eq_(len(self.oven.transaction_flags), 4)
+        eq_(self.oven.transaction_flags[2], TransactionFlag.Expense)
+        self.grocery_txn.splits[0].account = self.savings
+        self.grocery_txn.splits[0].reconciliation_date = date(2008, 1, 3)
+        self.oven.cook(date(2008, 1, 3), date(2008, 1, 4))
+        eq_(len(self.oven.transaction_flags), 4)
+        eq_(self.oven.transaction_flags[2], TransactionFlag.Transfer | TransactionFlag.Reconciled)
+        eq_(self.oven.transaction_flags[0], TransactionFlag.Unassigned)
+
+    def test_generation_of_unaffected_accounts(self):
+        # Entry lists of accounts that aren't re-cooked keep their generation.
+        savings_generation = self.savings.entries.generation
+        checking_generation = self.checking.entries.generation
+        self.grocery_txn.splits[0].amount = Amount(15, USD)
+        self.grocery_txn.splits[1].amount = Amount(-15, USD)
+        affected = self.grocery_txn.affected_accounts()
+        self.oven.cook(date(2008, 1, 3), date(2008, 1, 4), affected_accounts=affected)
+        eq_(self.savings.entries.generation, savings_generation)
+        assert self.checking.entries.generation != checking_generation
+
+    def test_entries_in_range(self):
+        entries = self.savings.entries.entries_in_range(DateRange(date(2008, 1, 2), date(2008, 1, 3)))
+        eq_([e.date for e in entries], [date(2008, 1, 2)])
+        entries = self.checking.entries.entries_in_range(DateRange(date(2007, 1, 1), date(2009, 1, 1)))
+        eq_(entries, list(self.checking.entries))
+        eq_(self.checking.entries.entries_in_range(DateRange(date(2008, 1, 4), date(2009, 1, 1))), [])
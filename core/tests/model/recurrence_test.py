@@ -0,0 +1,52 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.recurrence import Recurrence, RepeatType, Spawn
+from ...model.transaction import Transaction
+
+def spawn_dates(spawns):
+    return [s.date for s in spawns]
+
+class TestSpawnHorizon:
+    def setup_method(self, method):
+        self.recurrence = Recurrence(Transaction(date(2008, 1, 1)), RepeatType.Monthly, 1)
+
+    def test_spawn_further(self):
+        # Spawning further re-uses the spawns we already have.
+        first = self.recurrence.get_spawns(date(2008, 3, 1))
+        eq_(len(first), 3)
+        second = self.recurrence.get_spawns(date(2008, 5, 1))
+        eq_(len(second), 5)
+        for old, new in zip(first, second):
+            assert old is new
+
+    def test_spawn_less_far(self):
+        self.recurrence.get_spawns(date(2008, 5, 1))
+        eq_(spawn_dates(self.recurrence.get_spawns(date(2008, 2, 15))), [date(2008, 1, 1), date(2008, 2, 1)])
+
+    def test_start(self):
+        # Only spawns with a date >= start are returned, even when exceptions move their date.
+        exception = Spawn(self.recurrence, self.recurrence.ref, date(2008, 2, 1), date(2008, 3, 15))
+        self.recurrence.date2exception[date(2008, 2, 1)] = exception
+        spawns = self.recurrence.get_spawns(date(2008, 5, 1), start=date(2008, 3, 10))
+        eq_(spawn_dates(spawns), [date(2008, 3, 15), date(2008, 4, 1), date(2008, 5, 1)])
+
+    def test_exception_added_after_spawning(self):
+        # Changing exceptions directly invalidates the spawns we have.
+        self.recurrence.get_spawns(date(2008, 5, 1))
+        self.recurrence.date2exception[date(2008, 3, 1)] = None
+        spawns = self.recurrence.get_spawns(date(2008, 5, 1))
+        eq_(len(spawns), 4)
+        assert date(2008, 3, 1) not in spawn_dates(spawns)
+
+    def test_stop_date_changed(self):
+        self.recurrence.get_spawns(date(2008, 5, 1))
+        self.recurrence.stop_date = date(2008, 2, 1)
+        eq_(len(self.recurrence.get_spawns(date(2008, 5, 1))), 2)
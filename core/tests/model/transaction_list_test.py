@@ -0,0 +1,62 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.transaction import Transaction
+from ...model.transaction_list import TransactionList
+
+class TestDateIndex:
+    def setup_method(self, method):
+        self.transactions = TransactionList()
+        self.first = Transaction(date(2008, 1, 1), 'first')
+        self.second = Transaction(date(2008, 1, 1), 'second')
+        self.other = Transaction(date(2008, 1, 2), 'other')
+        for txn in [self.first, self.second, self.other]:
+            self.transactions.add(txn)
+
+    def test_add_positions(self):
+        # Added transactions go after those of the same date.
+        eq_([t.position for t in self.transactions], [0, 1, 0])
+        txn = Transaction(date(2008, 1, 1))
+        self.transactions.add(txn)
+        eq_(txn.position, 2)
+
+    def test_date_changed(self):
+        # Transactions that had their date changed are found under their new date once they're
+        # re-indexed.
+        self.second.date = date(2008, 1, 2)
+        self.transactions.clear_cache(changed=[self.second])
+        eq_(self.transactions.transactions_at_date(date(2008, 1, 1)), {self.first})
+        eq_(self.transactions.transactions_at_date(date(2008, 1, 2)), {self.second, self.other})
+        txn = Transaction(date(2008, 1, 2))
+        self.transactions.add(txn)
+        eq_(txn.position, 2)
+
+    def test_move_last_after_date_change(self):
+        # move_last() doesn't need the transaction to have been re-indexed first.
+        self.first.date = date(2008, 1, 2)
+        self.transactions.move_last(self.first)
+        eq_(self.first.position, 1)
+        eq_(self.transactions.transactions_at_date(date(2008, 1, 2)), {self.first, self.other})
+
+    def test_remove_after_date_change(self):
+        self.second.date = date(2008, 1, 3)
+        self.transactions.remove(self.second)
+        eq_(self.transactions.transactions_at_date(date(2008, 1, 1)), {self.first})
+        eq_(self.transactions.transactions_at_date(date(2008, 1, 3)), set())
+        txn = Transaction(date(2008, 1, 1))
+        self.transactions.add(txn)
+        eq_(txn.position, 1)
+
+    def test_clear(self):
+        self.transactions.clear()
+        eq_(self.transactions.transactions_at_date(date(2008, 1, 1)), set())
+        txn = Transaction(date(2008, 1, 1))
+        self.transactions.add(txn)
+        eq_(txn.position, 0)
@@ -0,0 +1,40 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+from datetime import date
+
+from hscommon.testutil import eq_
+
+from ...model.account import Account, AccountType
+from ...model.amount import Amount
+from ...model.currency import USD
+from ...model.transaction import Transaction
+
+def test_set_splits_preserve_instances():
+    # When preserving instances, all split attributes are copied to our existing splits.
+    checking = Account('Checking', USD, AccountType.Asset)
+    txn = Transaction(date(2008, 1, 1), account=checking, amount=Amount(42, USD))
+    other = Transaction(date(2008, 1, 1), amount=Amount(12, USD), account=None)
+    other.splits[0].memo = 'foo'
+    other.splits[0].reference = 'ref'
+    other.splits[0].reconciliation_date = date(2008, 1, 2)
+    split = txn.splits[0]
+    txn.set_splits(other.splits, preserve_instances=True)
+    assert txn.splits[0] is split
+    assert split.transaction is txn
+    eq_(split.account, None)
+    eq_(split.amount, Amount(12, USD))
+    eq_(split.memo, 'foo')
+    eq_(split.reference, 'ref')
+    eq_(split.reconciliation_date, date(2008, 1, 2))
+
+def test_descriptions_and_payees_are_interned():
+    description = ''.join(['foo', 'bar'])
+    txn1 = Transaction(date(2008, 1, 1), 'foobar')
+    txn2 = Transaction(date(2008, 1, 1), description)
+    assert txn1.description is txn2.description
+    txn2.change(payee=''.join(['foo', 'bar']))
+    assert txn2.payee is txn1.description
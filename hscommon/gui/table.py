@@ -11,6 +11,76 @@ from collections import MutableSequence, namedtuple
 from .base import GUIObject
 from .selectable_list import Selectable
 
+class LazyRowList(MutableSequence):
+    """List of rows of which some are only created when they're accessed for the first time.
+
+    Rows that haven't been created yet are kept as ``(factory, item)`` tuples, which are replaced by
+    ``factory(item)`` on first access. This is what allows :meth:`Table.extend_lazily` to fill a
+    table with a large number of rows without paying for rows that are never displayed.
+
+    Operations that need every row (iteration, slicing, sorting) create all pending rows.
+    """
+    def __init__(self, rows=()):
+        self._slots = list(rows)
+
+    def __contains__(self, value):
+        try:
+            self.index(value)
+            return True
+        except ValueError:
+            return False
+
+    def __delitem__(self, key):
+        self._slots.__delitem__(key)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._row(index) for index in range(*key.indices(len(self._slots)))]
+        return self._row(key)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __setitem__(self, key, value):
+        self._slots.__setitem__(key, value)
+
+    def _row(self, index):
+        slot = self._slots[index]
+        if type(slot) is tuple:
+            factory, item = slot
+            slot = self._slots[index] = factory(item)
+        return slot
+
+    def extend_lazily(self, items, factory):
+        """Appends a pending row for each of ``items``. See :meth:`Table.extend_lazily`."""
+        self._slots.extend((factory, item) for item in items)
+
+    def index(self, value):
+        """Returns the index of ``value`` without creating pending rows.
+
+        A row that hasn't been created yet can't be ``value``.
+        """
+        for index, slot in enumerate(self._slots):
+            if type(slot) is not tuple and slot == value:
+                return index
+        raise ValueError("%r is not in list" % value)
+
+    def insert(self, index, value):
+        self._slots.insert(index, value)
+
+    def sort(self, key=None, reverse=False):
+        rows = self[:]
+        rows.sort(key=key, reverse=reverse)
+        self._slots = rows
+
+    def source(self, index):
+        """Returns the row at ``index`` if it has been created, or the item it's going to be created
+        from if it hasn't.
+        """
+        slot = self._slots[index]
+        return slot[1] if type(slot) is tuple else slot
+
+
 # We used to directly subclass list, but it caused problems at some point with deepcopy
 class Table(MutableSequence, Selectable):
     """Sortable and selectable sequence of :class:`Row`.
@@ -30,6 +100,9 @@ class Table(MutableSequence, Selectable):
         self._header = None
         self._footer = None
 
+    def __contains__(self, value):
+        return self._rows.__contains__(value)
+
     def __delitem__(self, key):
         self._rows.__delitem__(key)
         if self._header is not None and ((not self) or (self[0] is not self._header)):
@@ -57,6 +130,27 @@ class Table(MutableSequence, Selectable):
         else:
             self._rows.append(item)
 
+    def extend_lazily(self, items, factory):
+        """Appends a row for each of ``items``, but only create them when they're accessed.
+
+        The row for an item is created with ``factory(item)`` the first time it's accessed, which is
+        usually when the view asks for it. Large tables can thus be filled without paying for rows
+        that are never displayed. Like with :meth:`append`, rows are added before the footer.
+
+        Use :meth:`row_source` to look at the table's content without creating rows.
+        """
+        if not isinstance(self._rows, LazyRowList):
+            self._rows = LazyRowList(self._rows)
+        footer = self._footer
+        if footer is not None:
+            self._rows.pop()
+        self._rows.extend_lazily(items, factory)
+        if footer is not None:
+            self._rows.append(footer)
+
+    def index(self, value):
+        return self._rows.index(value)
+
     def insert(self, index, item):
         """Inserts ``item`` at ``index`` in the table.
 
@@ -81,6 +175,17 @@ class Table(MutableSequence, Selectable):
         self._rows.remove(row)
         self._check_selection_range()
 
+    def row_source(self, index):
+        """Returns the row at ``index`` or, if it hasn't been created yet, the item it's going to be
+        created from.
+
+        See :meth:`extend_lazily`.
+        """
+        if isinstance(self._rows, LazyRowList):
+            return self._rows.source(index)
+        else:
+            return self._rows[index]
+
     def sort_by(self, column_name, desc=False):
         """Sort table by ``column_name``.
 
@@ -12,30 +12,100 @@ listeners. If the listener is connected, whenever the broadcaster calls :meth:`~
 the method with the same name as the broadcasted message is called on the listener.
 """
 
+import time
 from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
 
 class Broadcaster:
     """Broadcasts messages that are received by all listeners.
+
+    Notifications can be batched with :meth:`notification_batch`. While a batch is opened, messages
+    are queued instead of being dispatched, and when the outermost batch closes, each listener
+    receives each queued message once, in the order in which the messages were first sent. Messages
+    in ``UNBATCHED_NOTIFICATIONS`` (typically messages that ask listeners to do something *before*
+    a change happens) flush the queue and are dispatched right away.
+
+    We also count dispatches and time them by message in :attr:`dispatch_counts` and
+    :attr:`dispatch_times`.
     """
+    UNBATCHED_NOTIFICATIONS = set()
+
     def __init__(self):
         self.listeners = set()
-    
+        #: ``{msg: int}``. Number of times a message was dispatched to a listener.
+        self.dispatch_counts = defaultdict(int)
+        #: ``{msg: float}``. Seconds spent dispatching a message to listeners.
+        self.dispatch_times = defaultdict(float)
+        self._batch_depth = 0
+        # (listener, msg) in the order they were sent
+        self._pending = []
+        self._pending_set = set()
+
+    def _dispatch(self, listener, msg):
+        start = time.perf_counter()
+        listener.dispatch(msg)
+        self.dispatch_counts[msg] += 1
+        self.dispatch_times[msg] += time.perf_counter() - start
+
+    def _flush_pending(self):
+        while self._pending:
+            pending = self._pending
+            self._pending = []
+            self._pending_set = set()
+            for listener, msg in pending:
+                if listener in self.listeners: # disconnected in the meantime
+                    self._dispatch(listener, msg)
+
     def add_listener(self, listener):
         self.listeners.add(listener)
-    
+
+    @contextmanager
+    def notification_batch(self):
+        """Context manager batching the notifications sent within it.
+
+        Batches can be nested. Queued notifications are dispatched when the outermost batch closes,
+        even if it closes because of an exception.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_pending()
+
     def notify(self, msg):
         """Notify all connected listeners of ``msg``.
         
         That means that each listeners will have their method with the same name as ``msg`` called.
         """
+        if self._batch_depth:
+            if msg not in self.UNBATCHED_NOTIFICATIONS:
+                for listener in self.listeners:
+                    key = (listener, msg)
+                    if key not in self._pending_set:
+                        self._pending_set.add(key)
+                        self._pending.append(key)
+                return
+            self._flush_pending()
         for listener in self.listeners.copy(): # listeners can change during iteration
             if listener in self.listeners: # disconnected during notification
-                listener.dispatch(msg)
+                self._dispatch(listener, msg)
     
     def remove_listener(self, listener):
         self.listeners.discard(listener)
     
 
+def batched(method):
+    """Decorates a :class:`Broadcaster` method so that it runs in a :meth:`~Broadcaster.notification_batch`."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.notification_batch():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 class Listener:
     """A listener is initialized with the broadcaster it's going to listen to. Initially, it is not connected.
     """
@@ -138,3 +138,71 @@ def test_bind_messages():
     b.notify('bar')
     b.notify('hello') # Normal dispatching still work
     eq_(l.hello_count, 3)
+
+class RecordingListener(Listener):
+    def __init__(self, broadcaster):
+        Listener.__init__(self, broadcaster)
+        self.messages = []
+        for msg in ['foo', 'bar', 'will_change']:
+            self.bind_messages({msg}, lambda msg=msg: self.messages.append(msg))
+
+def test_notification_batch():
+    # Within a batch, notifications are queued and each listener gets each message only once, in
+    # the order they were first sent.
+    b = Broadcaster()
+    l = RecordingListener(b)
+    l.connect()
+    with b.notification_batch():
+        b.notify('foo')
+        b.notify('bar')
+        b.notify('foo')
+        with b.notification_batch():
+            b.notify('bar')
+        eq_(l.messages, [])
+    eq_(l.messages, ['foo', 'bar'])
+
+def test_notification_batch_unbatched_notifications():
+    # Unbatched notifications flush the queue and are dispatched right away.
+    class MyBroadcaster(Broadcaster):
+        UNBATCHED_NOTIFICATIONS = {'will_change'}
+
+    b = MyBroadcaster()
+    l = RecordingListener(b)
+    l.connect()
+    with b.notification_batch():
+        b.notify('foo')
+        b.notify('will_change')
+        eq_(l.messages, ['foo', 'will_change'])
+        b.notify('foo')
+    eq_(l.messages, ['foo', 'will_change', 'foo'])
+
+def test_notification_batch_flushes_on_exception():
+    b = Broadcaster()
+    l = RecordingListener(b)
+    l.connect()
+    try:
+        with b.notification_batch():
+            b.notify('foo')
+            raise ValueError()
+    except ValueError:
+        pass
+    eq_(l.messages, ['foo'])
+
+def test_batched_disconnect_before_flush():
+    # Listeners disconnected before the batch is flushed don't get notified.
+    b, l = create_pair()
+    l.connect()
+    with b.notification_batch():
+        b.notify('hello')
+        l.disconnect()
+    eq_(l.hello_count, 0)
+
+def test_dispatch_counts():
+    b, l = create_pair()
+    l.connect()
+    b.notify('hello')
+    with b.notification_batch():
+        b.notify('hello')
+        b.notify('hello')
+    eq_(b.dispatch_counts['hello'], 2)
+    assert b.dispatch_times['hello'] >= 0
@@ -102,6 +102,41 @@ def test_in():
     some_list = [table]
     assert Table() not in some_list
 
+def lazy_table_with_footer():
+    table, footer = table_with_footer()
+    created = []
+    def factory(index):
+        created.append(index)
+        return TestRow(table, index)
+    table.extend_lazily([3, 2], factory)
+    return table, footer, created
+
+def test_extend_lazily():
+    # Rows are only created when they're accessed, and they're created only once.
+    table, footer, created = lazy_table_with_footer()
+    eq_(len(table), 4)
+    eq_(created, [])
+    assert table[-1] is footer
+    eq_(table.row_source(2), 2)
+    row = table[2]
+    eq_(row.index, 2)
+    assert table[2] is row
+    eq_(created, [2])
+    eq_(table.row_source(2), row)
+
+def test_extend_lazily_index():
+    # Looking up a row doesn't create pending rows.
+    table, footer, created = lazy_table_with_footer()
+    eq_(table.index(footer), 3)
+    assert footer in table
+    eq_(created, [])
+
+def test_extend_lazily_sort():
+    table, footer, created = lazy_table_with_footer()
+    table.sort_by('index')
+    eq_([row.index for row in table], [0, 2, 3, 1])
+    assert table.footer is footer
+
 def test_footer_del_all():
     # Removing all rows doesn't crash when doing the footer check.
     table, footer = table_with_footer()
@@ -0,0 +1,69 @@
+# Copyright 2016 Virgil Dupras
+#
+# This software is licensed under the "GPLv3" License as described in the "LICENSE" file,
+# which should be included with this package. The terms are also available at
+# http://www.gnu.org/licenses/gpl-3.0.html
+
+# Measures how much memory transactions (with their splits) and cooked entries take.
+#
+# Usage (from the root of the repository):
+#
+#     PYTHONPATH=. python support/memory_benchmark.py [transaction_count]
+#
+# We create ``transaction_count`` (100000 by default) transactions of 2 splits each, spread over 50
+# accounts, add them to a TransactionList and cook them with an Oven. The results are in bytes per
+# transaction, as traced by tracemalloc. Strings are shared between transactions, like they are
+# when a document is loaded, so they're mostly not counted.
+
+import gc
+import random
+import sys
+import tracemalloc
+from datetime import date, timedelta
+
+from core.model.account import Account, AccountList, AccountType
+from core.model.amount import Amount
+from core.model.currency import USD
+from core.model.oven import Oven
+from core.model.transaction import Transaction
+from core.model.transaction_list import TransactionList
+
+ACCOUNT_COUNT = 50
+TXNS_PER_DAY = 50
+
+def traced_memory():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+def main(transaction_count):
+    random.seed(0)
+    accounts = AccountList(USD)
+    for i in range(ACCOUNT_COUNT):
+        account_type = AccountType.Asset if i < ACCOUNT_COUNT // 2 else AccountType.Expense
+        accounts.add(Account('account %d' % i, USD, account_type))
+    descriptions = ['description %d' % i for i in range(300)]
+    payees = ['payee %d' % i for i in range(200)]
+    start_date = date(2000, 1, 1)
+    tracemalloc.start()
+    start = traced_memory()
+    transactions = TransactionList()
+    for i in range(transaction_count):
+        txn = Transaction(
+            start_date + timedelta(days=i // TXNS_PER_DAY), descriptions[i % len(descriptions)],
+            payees[i % len(payees)], account=accounts[i % (ACCOUNT_COUNT // 2)],
+            amount=Amount(random.randint(1, 10000) / 100, USD)
+        )
+        txn.splits[1].account = accounts[ACCOUNT_COUNT // 2 + i % (ACCOUNT_COUNT // 2)]
+        transactions.add(txn, position=i % TXNS_PER_DAY)
+    loaded = traced_memory()
+    oven = Oven(accounts, transactions, [], [])
+    oven.cook(date.min, start_date + timedelta(days=transaction_count // TXNS_PER_DAY + 1))
+    cooked = traced_memory()
+    tracemalloc.stop()
+    print("Python {}, {} transactions".format(sys.version.split()[0], transaction_count))
+    print("Transactions and splits: {:.0f} bytes/transaction".format((loaded - start) / transaction_count))
+    print("Cooked entries: {:.0f} bytes/transaction".format((cooked - loaded) / transaction_count))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)